@@ -1,17 +1,21 @@
 import os
+import json
+import time
 import numpy as np
+import pandas as pd
 import threading
-from flask import Flask, render_template, request
-import joblib
-from housing.pipeline.pipeline import Pipeline
-from housing.entity.housing_predictor import HousingData, HousingPredictor
-from housing.config.configuration import Configuration
+from flask import Flask, render_template, request, jsonify, g, Response
+from housing.serving import HousingData, HousingBatchData, HousingPredictor, PredictionBatcher, SchemaValidator, \
+    DataDriftDetector, ServiceMetrics, PROMETHEUS_CONTENT_TYPE, FORM_PARSING_PHASE, FRAME_BUILD_PHASE, \
+    TEMPLATE_RENDER_PHASE
+from housing.exception.exception import get_error_message
+from housing.util.util import read_yaml_file
+from housing.entity.job_queue import JobQueue, RetrainingJob, ACTIVE_JOB_STATUSES
+from housing.entity.experiment_store import ExperimentStore, EXPERIMENT_COLUMNS, STAGE_METRICS_COLUMNS
 from housing.constant import *
 
 app = Flask(__name__)
 
-# Load the pipeline for retraining the model
-
 
 ROOT_DIR = os.getcwd()
 LOG_FOLDER_NAME = "logs"
@@ -20,14 +24,106 @@ SAVED_MODELS_DIR_NAME = "saved_models"
 MODEL_CONFIG_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "model.yaml")
 LOG_DIR = os.path.join(ROOT_DIR, LOG_FOLDER_NAME)
 PIPELINE_DIR = os.path.join(ROOT_DIR, PIPELINE_FOLDER_NAME)
-MODEL_DIR = os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME)
+# directory of the saved model generations, saved_models unless MODEL_DIR is set
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME))
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "schema.yaml")
+NDJSON_MIMETYPE = "application/x-ndjson"
+# micro-batching of concurrent "/" predictions, off unless PREDICTION_BATCHING=1
+PREDICTION_BATCHING = os.environ.get("PREDICTION_BATCHING", "0") == "1"
+PREDICTION_BATCH_MAX_SIZE = int(os.environ.get("PREDICTION_BATCH_MAX_SIZE", "32"))
+PREDICTION_BATCH_MAX_WAIT_MS = float(os.environ.get("PREDICTION_BATCH_MAX_WAIT_MS", "2"))
+# number of most recent prediction inputs drift is monitored over, 0 disables monitoring
+DRIFT_WINDOW_SIZE = int(os.environ.get("DRIFT_WINDOW_SIZE", "1000"))
+# request and prediction phase metrics served on /metrics, on unless METRICS_ENABLED=0
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
 HOUSING_DATA_KEY = "housing_data"
 MEDIAN_HOUSING_VALUE_KEY = "median_house_value"
 
+housing_schema = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+housing_schema_validator = SchemaValidator(dataset_schema=housing_schema, include_target=False)
+data_drift_detector = None
+if DRIFT_WINDOW_SIZE > 0:
+    data_validation_config_info = read_yaml_file(file_path=CONFIG_FILE_PATH)[DATA_VALIDATION_CONFIG_KEY]
+    data_drift_detector = DataDriftDetector(
+        dataset_schema=housing_schema,
+        p_value_threshold=data_validation_config_info.get(DATA_VALIDATION_DRIFT_P_VALUE_THRESHOLD_KEY, 0.05),
+        psi_threshold=data_validation_config_info.get(DATA_VALIDATION_DRIFT_PSI_THRESHOLD_KEY, 0.2),
+        drift_share_threshold=data_validation_config_info.get(DATA_VALIDATION_DRIFT_SHARE_THRESHOLD_KEY, 0.5))
+service_metrics = ServiceMetrics(enabled=METRICS_ENABLED)
+housing_predictor = HousingPredictor(model_dir=MODEL_DIR, data_drift_detector=data_drift_detector,
+                                     drift_window_size=DRIFT_WINDOW_SIZE, service_metrics=service_metrics)
+housing_predictor.start_watcher()
+prediction_batcher = None
+if PREDICTION_BATCHING:
+    prediction_batcher = PredictionBatcher(predict_records=housing_predictor.predict_records,
+                                           max_batch_size=PREDICTION_BATCH_MAX_SIZE,
+                                           max_wait_ms=PREDICTION_BATCH_MAX_WAIT_MS,
+                                           service_metrics=service_metrics).start()
+
+
+training_pipeline_config = None
+retraining_job_queue = None
+experiment_store = None
+
+
+def get_training_pipeline_config():
+    global training_pipeline_config
+    if training_pipeline_config is None:
+        from housing.config.configuration import Configuration
+
+        training_pipeline_config = Configuration().training_pipeline_config
+    return training_pipeline_config
+
+
+def get_retraining_job_queue() -> JobQueue:
+    """
+    Retraining runs in `python -m housing.pipeline.worker`, the web processes only enqueue and poll jobs.
+    """
+    global retraining_job_queue
+    if retraining_job_queue is None:
+        retraining_job_queue = JobQueue(db_file_path=get_training_pipeline_config().job_queue_file_path)
+    return retraining_job_queue
+
+
+def get_experiment_store() -> ExperimentStore:
+    global experiment_store
+    if experiment_store is None:
+        experiment_store = ExperimentStore(db_file_path=get_training_pipeline_config().experiment_store_file_path)
+    return experiment_store
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_start_time = time.perf_counter()
+    service_metrics.start_request()
+
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if "request_start_time" not in g:
+        return
+    # the route pattern, not the path, keeps the label values bounded
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    service_metrics.finish_request(endpoint=endpoint, method=request.method,
+                                   status=g.get("response_status", 500),
+                                   start_time=g.request_start_time)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(service_metrics.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
+        start_time = time.perf_counter()
         longitude = float(request.form['longitude'])
         latitude = float(request.form['latitude'])
         housing_median_age = float(request.form['housing_median_age'])
@@ -37,6 +133,7 @@ def index():
         households = float(request.form['households'])
         median_income = float(request.form['median_income'])
         ocean_proximity = request.form['ocean_proximity']
+        start_time = service_metrics.observe_phase(FORM_PARSING_PHASE, start_time)
 
         housing_data = HousingData(longitude=longitude,
                                    latitude=latitude,
@@ -47,42 +144,137 @@ def index():
                                    households=households,
                                    median_income=median_income,
                                    ocean_proximity=ocean_proximity)
-        housing_df = housing_data.get_housing_input_data_frame()
-        housing_predictor = HousingPredictor(model_dir=MODEL_DIR)
-        prediction = housing_predictor.predict(X=housing_df)
+        housing_record = housing_data.get_housing_data_as_record()
+        service_metrics.observe_phase(FRAME_BUILD_PHASE, start_time)
+        report = housing_schema_validator.validate_record(record=housing_record)
+        if not report.is_valid:
+            return SchemaValidator.get_error_message(report), 400
+        housing_predictor.observe_record(record=housing_record)
+        if prediction_batcher is not None:
+            prediction = [prediction_batcher.predict_record(record=housing_record)]
+        else:
+            prediction = housing_predictor.predict_record(record=housing_record)
 
         prediction_str = f"${prediction[0]:,.2f}"
         # Render the template with the prediction result
-        return render_template('result.html', longitude=longitude, latitude=latitude,
+        start_time = time.perf_counter()
+        page = render_template('result.html', longitude=longitude, latitude=latitude,
                                housing_median_age=housing_median_age, total_rooms=total_rooms,
                                total_bedrooms=total_bedrooms, population=population, households=households,
                                median_income=median_income,
                                ocean_proximity=ocean_proximity, prediction=prediction_str)
+        service_metrics.observe_phase(TEMPLATE_RENDER_PHASE, start_time)
+        return page
 
     # Render the template with the input form
     return render_template('index.html')
 
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        start_time = time.perf_counter()
+        if request.mimetype == NDJSON_MIMETYPE:
+            records = [json.loads(line) for line in request.get_data(as_text=True).splitlines()
+                       if line.strip()]
+        else:
+            records = request.get_json(force=True)
+        housing_df = HousingBatchData(records=records,
+                                      dataset_schema=housing_schema,
+                                      schema_validator=housing_schema_validator).get_housing_input_data_frame()
+        service_metrics.observe_phase(FRAME_BUILD_PHASE, start_time)
+    except Exception as e:
+        return jsonify({"error": get_error_message(e)}), 400
+
+    housing_predictor.observe_dataframe(dataframe=housing_df)
+    predictions = housing_predictor.predict_batch(X=housing_df)
+    return jsonify({"predictions": predictions.tolist()})
+
+
+@app.route('/drift', methods=['GET'])
+def drift():
+    report = housing_predictor.get_drift_report()
+    if report is None:
+        return jsonify({"error": "Drift is not monitored for the serving model"}), 404
+    return jsonify(report)
+
+
 @app.route('/retrain', methods=['GET', 'POST'])
 def retrain():
+    job_queue = get_retraining_job_queue()
     message = ""
-    pipeline = Pipeline(config=Configuration(
-        current_time_stamp=get_current_time_stamp()))
-    if Pipeline.experiment.running_status == False and Pipeline.experiment.stop_time != np.nan:
-        message = "Training is completed."
     if request.method == 'POST':
-        if not Pipeline.experiment.running_status:
-            message = "Re-Training started."
-            pipeline.start()
+        cancel_job_id = request.form.get("cancel_job_id")
+        if cancel_job_id:
+            job = job_queue.cancel(job_id=cancel_job_id)
+            message = f"Job [{cancel_job_id}] not found." if job is None else job.message
+        elif job_queue.get_jobs(statuses=ACTIVE_JOB_STATUSES):
+            message = "Training is already queued or in progress."
         else:
-            message = "Training is already in progress."
+            job = job_queue.enqueue()
+            message = f"Re-Training job [{job.job_id}] queued."
 
+    jobs = job_queue.get_jobs(limit=5)
+    experiment_rows = get_experiment_store().get_experiments(limit=5)
+    experiments = pd.DataFrame(experiment_rows, columns=EXPERIMENT_COLUMNS)
+    # stages and candidate searches of the most recent experiment
+    stage_metrics = get_experiment_store().get_stage_metrics(experiment_id=experiment_rows[-1]["experiment_id"]) \
+        if experiment_rows else []
     context = {
-        "experiment": pipeline.get_experiments_status().to_html(classes='table table-striped col-12'),
+        "experiment": experiments.drop(columns=["experiment_file_path", "initialization_timestamp"]).to_html(
+            classes='table table-striped col-12'),
+        "stage_metrics": pd.DataFrame(stage_metrics, columns=STAGE_METRICS_COLUMNS).round(3).to_html(
+            classes='table table-striped col-12', index=False, na_rep=""),
+        "stage_metrics_experiment_id": experiment_rows[-1]["experiment_id"] if experiment_rows else None,
+        "jobs": pd.DataFrame(jobs, columns=RetrainingJob._fields).to_html(classes='table table-striped col-12',
+                                                                          index=False),
+        "active_jobs": [job for job in jobs if job.status in ACTIVE_JOB_STATUSES],
         "message": message
     }
     return render_template('retrain.html', context=context)
 
 
+@app.route('/retrain/jobs', methods=['GET', 'POST'])
+def retraining_jobs():
+    job_queue = get_retraining_job_queue()
+    if request.method == 'POST':
+        active_jobs = job_queue.get_jobs(statuses=ACTIVE_JOB_STATUSES)
+        if active_jobs:
+            return jsonify({"error": "Training is already queued or in progress",
+                            "active_jobs": [job._asdict() for job in active_jobs]}), 409
+        return jsonify(job_queue.enqueue()._asdict()), 202
+    return jsonify([job._asdict() for job in job_queue.get_jobs(limit=int(request.args.get("limit", 20)))])
+
+
+@app.route('/experiments', methods=['GET'])
+def experiments():
+    return jsonify(get_experiment_store().get_experiments(limit=int(request.args.get("limit", 20))))
+
+
+@app.route('/experiments/<experiment_id>', methods=['GET'])
+def experiment(experiment_id):
+    experiment_row = get_experiment_store().get_experiment(experiment_id=experiment_id)
+    if experiment_row is None:
+        return jsonify({"error": f"Experiment [{experiment_id}] not found"}), 404
+    experiment_row["stages"] = get_experiment_store().get_stage_metrics(experiment_id=experiment_id)
+    return jsonify(experiment_row)
+
+
+@app.route('/retrain/jobs/<job_id>', methods=['GET'])
+def retraining_job(job_id):
+    job = get_retraining_job_queue().get_job(job_id=job_id)
+    if job is None:
+        return jsonify({"error": f"Job [{job_id}] not found"}), 404
+    return jsonify(job._asdict())
+
+
+@app.route('/retrain/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_retraining_job(job_id):
+    job = get_retraining_job_queue().cancel(job_id=job_id)
+    if job is None:
+        return jsonify({"error": f"Job [{job_id}] not found"}), 404
+    return jsonify(job._asdict())
+
+
 if __name__ == '__main__':
     app.run(debug=True,port=8080,host='0.0.0.0')
@@ -1,25 +1,89 @@
 import os
 import sys
-import requests
-from six.moves import urllib
 
-import tarfile
 import pandas as pd
 import numpy as np
 
-from sklearn.model_selection import StratifiedShuffleSplit
+from sklearn.model_selection import ShuffleSplit, StratifiedShuffleSplit
 
 from housing.logger.logger import logging
 from housing.exception.exception import HousingException
 
 from housing.entity.config_entity import DataIngestionConfig
 from housing.config.configuration import Configuration
-from housing.entity.artifact_entity import DataIngestionArtifact
+from housing.entity.artifact_entity import DataIngestionArtifact, IncrementalTrainingState
+from housing.entity.artifact_cache import ArtifactCache
+from housing.entity.artifact_store import ArtifactStore
+from housing.entity.dataset_downloader import DatasetDownloader
+from housing.constant import DATA_INGESTION_ARTIFACT_DIR_NAME, INCOME_CATEGORY_BINS, TEST_SPLIT_RATIO
+from housing.util.util import get_file_hash, load_data, read_data_in_chunks, read_yaml_file, save_data
+from housing.constant import DATASET_SCHEMA_COLUMNS_KEY
+
+
+class IngestedDataWriter:
+
+    def __init__(self, file_path: str):
+        """
+        Appends DataFrame chunks to a .parquet, .feather or .csv file, keeping the column types of
+        the first chunk so that every chunk lands in the same file schema.
+
+        :param file_path: output file, the format is given by its extension
+        :type file_path: str
+        """
+        try:
+            self.file_path = file_path
+            self.file_extension = os.path.splitext(file_path)[1]
+            self.arrow_schema = None
+            self.arrow_writer = None
+            self.rows_written = 0
+            self.is_open = False
+            self.empty_dataframe = None
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def write(self, dataframe: pd.DataFrame):
+        try:
+            if len(dataframe) == 0 and not self.is_open:
+                # an empty chunk can not fix column types, it is only written if no rows ever come
+                self.empty_dataframe = dataframe
+                return
+            if self.file_extension in (".parquet", ".feather"):
+                import pyarrow as pa
+
+                table = pa.Table.from_pandas(dataframe, schema=self.arrow_schema, preserve_index=False)
+                if self.arrow_writer is None:
+                    self.arrow_schema = table.schema
+                    if self.file_extension == ".parquet":
+                        import pyarrow.parquet as pq
+                        self.arrow_writer = pq.ParquetWriter(self.file_path, self.arrow_schema)
+                    else:
+                        # feather v2 is the arrow ipc file format
+                        self.arrow_writer = pa.ipc.new_file(self.file_path, self.arrow_schema)
+                self.arrow_writer.write_table(table)
+            else:
+                dataframe.to_csv(self.file_path, index=False,
+                                 mode="a" if self.is_open else "w",
+                                 header=not self.is_open)
+            self.is_open = True
+            self.rows_written += len(dataframe)
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def close(self):
+        if not self.is_open and self.empty_dataframe is not None:
+            save_data(dataframe=self.empty_dataframe, file_path=self.file_path)
+        if self.arrow_writer is not None:
+            self.arrow_writer.close()
+            self.arrow_writer = None
 
 
 class DataIngestion:
 
-    def __init__(self, data_ingestion_config: DataIngestionConfig):
+    def __init__(self, data_ingestion_config: DataIngestionConfig, artifact_cache: ArtifactCache = None,
+                 artifact_store: ArtifactStore = None, incremental_state: IncrementalTrainingState = None):
         """
         This is a constructor function that initializes a class object with a data ingestion
         configuration and logs any errors that occur.
@@ -28,11 +92,22 @@ class DataIngestion:
         `DataIngestionConfig` class, which contains configuration information for data ingestion. This
         parameter is passed to the constructor of a class that is being initialized
         :type data_ingestion_config: DataIngestionConfig
+        :param artifact_cache: when given, the train/test split of an already seen tgz file is reused
+        :type artifact_cache: ArtifactCache
+        :param artifact_store: in process store used to hand live objects over between stages
+        :type artifact_store: ArtifactStore
+        :param incremental_state: when given, only the rows appended to the raw file after the
+        `raw_row_count` rows already trained on are split, and appended to the splits of the previous
+        run, so the splits always hold every row trained on
+        :type incremental_state: IncrementalTrainingState
         """
         try:
             logging.info(
                 f"\n\n{'='*20} Data Ingestion log Started {'='*20}\n\n")
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_cache = artifact_cache
+            self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore(enabled=False)
+            self.incremental_state = incremental_state
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
@@ -40,7 +115,9 @@ class DataIngestion:
 
     def download_housing_data(self,) -> str:
         """
-        It downloads the housing data from the remote url and stores it in the local file system
+        It downloads the housing data from the remote url into the shared tgz download directory,
+        with parallel resumable range requests, unless the copy already there matches the configured
+        sha256.
         :return: The file path of the downloaded file.
         """
         try:
@@ -50,26 +127,16 @@ class DataIngestion:
             # folder location to download file
             tgz_download_dir = self.data_ingestion_config.tgz_download_dir
 
-            os.makedirs(tgz_download_dir, exist_ok=True)
-
-            housing_file_name = os.path.basename(download_url)
-
-            tgz_file_path = os.path.join(tgz_download_dir, housing_file_name)
-
             logging.info(f"""
              --> Started Downloading......
              --> From URL : [{download_url}]
-             --> Into Folder : [{tgz_file_path}]
+             --> Into Folder : [{tgz_download_dir}]
              """)
 
-            urllib.request.urlretrieve(download_url, tgz_file_path)
-            # print(download_url)
-            # response = requests.get(download_url)
-            # with open(tgz_file_path, 'wb') as f:
-            #     f.write(response.content)
-
-            logging.info(
-                f"File :[{tgz_file_path}] has been downloaded successfully.")
+            dataset_downloader = DatasetDownloader(download_dir=tgz_download_dir,
+                                                   download_workers=self.data_ingestion_config.download_workers)
+            tgz_file_path = dataset_downloader.download(url=download_url,
+                                                        sha256=self.data_ingestion_config.dataset_sha256)
 
             return tgz_file_path
 
@@ -77,53 +144,62 @@ class DataIngestion:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
-    def extract_tgz_file(self, tgz_file_path: str):
+    def extract_tgz_file(self, tgz_file_path: str) -> str:
         """
-        It extracts the contents of a tgz file to a directory
+        It extracts the contents of a tgz file to a directory, an archive already extracted by a
+        previous run is not extracted again
 
         :param tgz_file_path: The path to the tgz file that you want to extract
         :type tgz_file_path: str
+        :return: directory holding the extracted files
         """
         try:
-            raw_data_dir = self.data_ingestion_config.raw_data_dir
-
-            if os.path.exists(raw_data_dir):
-                os.remove(raw_data_dir)
-
-            logging.info(f"""
-            --> Extracting Data from tgz file :  [{tgz_file_path}]
-            --> to raw data dir : [{raw_data_dir}]
-            """)
-
-            os.makedirs(raw_data_dir, exist_ok=True)
-
-            with tarfile.open(tgz_file_path) as housing_tgz_file_obj:
-                housing_tgz_file_obj.extractall(path=raw_data_dir)
+            return DatasetDownloader.extract(tgz_file_path=tgz_file_path,
+                                             extract_dir=self.data_ingestion_config.raw_data_dir)
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
-    def split_data_as_train_test(self,) -> DataIngestionArtifact:
+    def split_data_as_train_test(self, raw_data_dir: str) -> DataIngestionArtifact:
         """
         It reads the data from the raw data directory, splits the data into train and test, and writes
         the train and test data into the ingested train and test directories
+
+        :param raw_data_dir: directory holding the extracted raw data file
+        :type raw_data_dir: str
         :return: DataIngestionArtifact
         """
         try:
 
-            raw_data_dir = self.data_ingestion_config.raw_data_dir
-
             file_name = os.listdir(raw_data_dir)[0]
 
             housing_file_path = os.path.join(raw_data_dir, file_name)
 
-            housing_data_frame = pd.read_csv(housing_file_path)
+            dataset_schema = read_yaml_file(file_path=self.data_ingestion_config.schema_file_path)
+
+            # the housing feed is append only, rows already trained on are skipped without parsing
+            skipped_row_count = 0
+            if self.incremental_state is not None:
+                skipped_row_count = self.incremental_state.raw_row_count
+
+            logging.info(f'Reading file data from [{housing_file_path}] skipping {skipped_row_count} rows')
+            housing_data_frame = pd.read_csv(housing_file_path,
+                                             dtype=dataset_schema[DATASET_SCHEMA_COLUMNS_KEY],
+                                             skiprows=range(1, skipped_row_count + 1))
+            raw_row_count = skipped_row_count + len(housing_data_frame)
+
+            if len(housing_data_frame) == 0:
+                logging.info("No new rows to ingest")
+                return DataIngestionArtifact(train_file_path=None,
+                                             test_file_path=None,
+                                             is_ingested=False,
+                                             message="No new rows to ingest",
+                                             raw_row_count=raw_row_count)
 
-            logging.info(f'Reading file data from [{housing_file_path}]')
             housing_data_frame['income_category'] = pd.cut(
                 housing_data_frame['median_income'],
-                bins=[0.0, 1.5, 3.0, 4.5, 6.0, np.inf],
+                bins=INCOME_CATEGORY_BINS,
                 labels=[1, 2, 3, 4, 5]
             )
 
@@ -132,7 +208,10 @@ class DataIngestion:
             start_test_set = None
 
             split = StratifiedShuffleSplit(
-                n_splits=1, test_size=0.2, random_state=0)
+                n_splits=1, test_size=TEST_SPLIT_RATIO, random_state=0)
+            if housing_data_frame["income_category"].value_counts().loc[lambda counts: counts > 0].min() < 2:
+                # a small increment can leave an income category with a single row
+                split = ShuffleSplit(n_splits=1, test_size=TEST_SPLIT_RATIO, random_state=0)
 
             for train_index, test_index in split.split(housing_data_frame, housing_data_frame["income_category"]):
                 start_train_set = housing_data_frame.loc[train_index].drop(
@@ -140,29 +219,145 @@ class DataIngestion:
                 start_test_set = housing_data_frame.loc[test_index].drop(
                     ["income_category"], axis=1)
 
+            if self.incremental_state is not None:
+                # the splits hold every row trained on so far, the new rows last
+                logging.info(f'Appending new rows to the splits of the previous run')
+                start_train_set = pd.concat([load_data(file_path=self.incremental_state.train_file_path,
+                                                       schema_file_path=self.data_ingestion_config.schema_file_path),
+                                             start_train_set], ignore_index=True)
+                start_test_set = pd.concat([load_data(file_path=self.incremental_state.test_file_path,
+                                                      schema_file_path=self.data_ingestion_config.schema_file_path),
+                                            start_test_set], ignore_index=True)
+
+            ingested_file_name = f"{os.path.splitext(file_name)[0]}.{self.data_ingestion_config.ingested_file_format}"
             train_file_path = os.path.join(
-                self.data_ingestion_config.ingested_train_dir, file_name)
+                self.data_ingestion_config.ingested_train_dir, ingested_file_name)
             test_file_path = os.path.join(
-                self.data_ingestion_config.ingested_test_dir, file_name)
+                self.data_ingestion_config.ingested_test_dir, ingested_file_name)
 
             if start_train_set is not None:
                 os.makedirs(
                     self.data_ingestion_config.ingested_train_dir, exist_ok=True)
                 logging.info(
                     f'Exporting training Dataset into [{train_file_path}]')
-                start_train_set.to_csv(train_file_path, index=False)
+                save_data(dataframe=start_train_set, file_path=train_file_path)
+                self.artifact_store.put(train_file_path, start_train_set.reset_index(drop=True))
 
             if start_test_set is not None:
                 os.makedirs(
                     self.data_ingestion_config.ingested_test_dir, exist_ok=True)
                 logging.info(
                     f'Exporting testing Dataset into [{test_file_path}]')
-                start_test_set.to_csv(test_file_path, index=False)
+                save_data(dataframe=start_test_set, file_path=test_file_path)
+                self.artifact_store.put(test_file_path, start_test_set.reset_index(drop=True))
 
             data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
                                                             test_file_path=test_file_path,
                                                             is_ingested=True,
-                                                            message=f"Data Ingestion Completed Successefully")
+                                                            message=f"Data Ingestion Completed Successefully",
+                                                            raw_row_count=raw_row_count)
+
+            logging.info(
+                f'Data Ingestion Artifact : [{data_ingestion_artifact}]')
+
+            return data_ingestion_artifact
+
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def split_data_as_train_test_in_chunks(self, raw_data_dir: str, chunk_size: int) -> DataIngestionArtifact:
+        """
+        Streaming variant of `split_data_as_train_test` for raw files larger than memory. The raw file
+        is read `chunk_size` rows at a time and the split is stratified on the income category with a
+        running row count per category kept across chunks: the k-th row of a category goes to the test
+        split when it brings the category's test rows to floor(k * TEST_SPLIT_RATIO). Every category
+        thus gets exactly its test share, give or take one row, and the assignment does not change with
+        the chunk size or when rows are appended. Chunks are appended to the ingested files, so memory
+        is bounded by `chunk_size`.
+
+        :param raw_data_dir: directory holding the extracted raw data file
+        :type raw_data_dir: str
+        :param chunk_size: number of raw rows held in memory at a time
+        :type chunk_size: int
+        :return: DataIngestionArtifact
+        """
+        try:
+            file_name = os.listdir(raw_data_dir)[0]
+
+            housing_file_path = os.path.join(raw_data_dir, file_name)
+
+            dataset_schema = read_yaml_file(file_path=self.data_ingestion_config.schema_file_path)
+
+            skipped_row_count = 0
+            if self.incremental_state is not None:
+                skipped_row_count = self.incremental_state.raw_row_count
+
+            ingested_file_name = f"{os.path.splitext(file_name)[0]}.{self.data_ingestion_config.ingested_file_format}"
+            train_file_path = os.path.join(
+                self.data_ingestion_config.ingested_train_dir, ingested_file_name)
+            test_file_path = os.path.join(
+                self.data_ingestion_config.ingested_test_dir, ingested_file_name)
+
+            logging.info(f'Streaming file data from [{housing_file_path}] in chunks of {chunk_size} rows '
+                         f'skipping {skipped_row_count} rows')
+            train_writer = IngestedDataWriter(file_path=train_file_path)
+            test_writer = IngestedDataWriter(file_path=test_file_path)
+            category_row_counts = np.zeros(len(INCOME_CATEGORY_BINS) + 1, dtype=np.int64)
+            category_test_counts = np.zeros(len(INCOME_CATEGORY_BINS) + 1, dtype=np.int64)
+            try:
+                if self.incremental_state is not None:
+                    # the splits hold every row trained on so far, the new rows last
+                    for writer, previous_file_path in [(train_writer, self.incremental_state.train_file_path),
+                                                       (test_writer, self.incremental_state.test_file_path)]:
+                        if os.path.abspath(previous_file_path) == os.path.abspath(writer.file_path):
+                            raise Exception(f"Split [{previous_file_path}] of the previous run would be overwritten")
+                        for previous_chunk in read_data_in_chunks(file_path=previous_file_path,
+                                                                  chunk_size=chunk_size,
+                                                                  dtype=dataset_schema[DATASET_SCHEMA_COLUMNS_KEY]):
+                            writer.write(previous_chunk)
+                for housing_chunk in pd.read_csv(housing_file_path,
+                                                 dtype=dataset_schema[DATASET_SCHEMA_COLUMNS_KEY],
+                                                 skiprows=range(1, skipped_row_count + 1),
+                                                 chunksize=chunk_size):
+                    income_category = np.digitize(housing_chunk['median_income'].to_numpy(), INCOME_CATEGORY_BINS)
+                    # position of every row in the stream of its income category, counted from 1
+                    category_position = category_row_counts[income_category] + \
+                        pd.Series(income_category).groupby(income_category).cumcount().to_numpy() + 1
+                    is_test = np.floor(category_position * TEST_SPLIT_RATIO) > \
+                        np.floor((category_position - 1) * TEST_SPLIT_RATIO)
+
+                    category_row_counts += np.bincount(income_category, minlength=len(category_row_counts))
+                    category_test_counts += np.bincount(income_category[is_test],
+                                                        minlength=len(category_test_counts))
+
+                    train_writer.write(housing_chunk[~is_test])
+                    test_writer.write(housing_chunk[is_test])
+            finally:
+                train_writer.close()
+                test_writer.close()
+
+            new_row_count = int(category_row_counts.sum())
+            raw_row_count = skipped_row_count + new_row_count
+            if new_row_count == 0:
+                logging.info("No new rows to ingest")
+                return DataIngestionArtifact(train_file_path=None,
+                                             test_file_path=None,
+                                             is_ingested=False,
+                                             message="No new rows to ingest",
+                                             raw_row_count=raw_row_count)
+
+            for income_category in np.flatnonzero(category_row_counts):
+                logging.info(f"Income category [{income_category}]: {category_row_counts[income_category]} rows, "
+                             f"test share {category_test_counts[income_category] / category_row_counts[income_category]:.3f}")
+            logging.info(f'Exported {train_writer.rows_written} training rows into [{train_file_path}] and '
+                         f'{test_writer.rows_written} testing rows into [{test_file_path}]')
+
+            data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
+                                                            test_file_path=test_file_path,
+                                                            is_ingested=True,
+                                                            message=f"Data Ingestion Completed Successefully",
+                                                            raw_row_count=raw_row_count)
 
             logging.info(
                 f'Data Ingestion Artifact : [{data_ingestion_artifact}]')
@@ -182,9 +377,38 @@ class DataIngestion:
         try:
             tgz_file_path = self.download_housing_data()
 
-            self.extract_tgz_file(tgz_file_path=tgz_file_path)
-
-            return self.split_data_as_train_test()
+            fingerprint = None
+            if self.artifact_cache is not None:
+                fingerprint = ArtifactCache.get_fingerprint({
+                    "tgz_file": get_file_hash(tgz_file_path),
+                    "schema_file": get_file_hash(self.data_ingestion_config.schema_file_path),
+                    "ingested_file_format": self.data_ingestion_config.ingested_file_format,
+                    "test_split_ratio": TEST_SPLIT_RATIO,
+                    "income_category_bins": INCOME_CATEGORY_BINS,
+                    "incremental_state": None if self.incremental_state is None else self.incremental_state._asdict(),
+                    "streaming": self.data_ingestion_config.streaming_chunk_size is not None,
+                    "code_version": ArtifactCache.get_code_version(sys.modules[__name__])
+                })
+                data_ingestion_artifact = self.artifact_cache.get_artifact(stage_name=DATA_INGESTION_ARTIFACT_DIR_NAME,
+                                                                           fingerprint=fingerprint,
+                                                                           artifact_type=DataIngestionArtifact)
+                if data_ingestion_artifact is not None:
+                    return data_ingestion_artifact
+
+            raw_data_dir = self.extract_tgz_file(tgz_file_path=tgz_file_path)
+
+            streaming_chunk_size = self.data_ingestion_config.streaming_chunk_size
+            if streaming_chunk_size is not None:
+                data_ingestion_artifact = self.split_data_as_train_test_in_chunks(raw_data_dir=raw_data_dir,
+                                                                                  chunk_size=streaming_chunk_size)
+            else:
+                data_ingestion_artifact = self.split_data_as_train_test(raw_data_dir=raw_data_dir)
+
+            if self.artifact_cache is not None:
+                self.artifact_cache.save_artifact(stage_name=DATA_INGESTION_ARTIFACT_DIR_NAME,
+                                                  fingerprint=fingerprint,
+                                                  artifact=data_ingestion_artifact)
+            return data_ingestion_artifact
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
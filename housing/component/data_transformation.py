@@ -4,7 +4,6 @@ import pandas as pd
 import numpy as np
 
 
-from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer, KNNImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -14,93 +13,21 @@ from sklearn.pipeline import Pipeline
 from housing.constant import *
 from housing.exception.exception import HousingException
 from housing.logger.logger import logging
-from housing.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact
+from housing.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact, \
+    IncrementalTrainingState
 from housing.entity.config_entity import DataIngestionConfig, DataTransformationConfig, DataValidationConfig
 from housing.config.configuration import Configuration
-from housing.util.util import read_yaml_file, load_data, save_numpy_array_data, save_object
-
-
-class FeatureGenerator(BaseEstimator, TransformerMixin):
-
-    def __init__(self, add_bedrooms_per_room=True,
-                 total_rooms_ix=3,
-                 population_ix=5,
-                 households_ix=6,
-                 total_bedrooms_ix=4, columns=None):
-        """
-        FeatureGenerator Initialization
-        add_bedrooms_per_room: bool
-        total_rooms_ix: int index number of total rooms columns
-        population_ix: int index number of total population columns
-        households_ix: int index number of  households columns
-        total_bedrooms_ix: int index number of bedrooms columns
-        """
-        try:
-            self.columns = columns
-            if self.columns is not None:
-                total_rooms_ix = self.columns.index(COLUMN_TOTAL_ROOMS)
-                population_ix = self.columns.index(COLUMN_POPULATION)
-                households_ix = self.columns.index(COLUMN_HOUSEHOLDS)
-                total_bedrooms_ix = self.columns.index(COLUMN_TOTAL_BEDROOM)
-
-            self.add_bedrooms_per_room = add_bedrooms_per_room
-            self.total_rooms_ix = total_rooms_ix
-            self.population_ix = population_ix
-            self.households_ix = households_ix
-            self.total_bedrooms_ix = total_bedrooms_ix
-
-        except Exception as e:
-            logging.info(f"Error Occurred at {HousingException(e,sys)}")
-            raise HousingException(e, sys)
-
-    def fit(self, X, y=None):
-        """
-        The fit function is used to fit the data into the model
-
-        :param X: A numpy array or sparse matrix of shape [n_samples, n_features]
-        :param y: the target variable
-        :return: The fit method returns the instance of the class.
-        """
-        return self
-
-    def transform(self, X, y=None):
-        """
-        It takes the total number of rooms in a district, divides it by the number of households, and
-        adds this value to the data as a new attribute
-
-        :param X: The input data
-        :param y: The target variable
-        :return: The generated feature is being returned.
-        """
-        try:
-            room_per_household = X[:, self.total_rooms_ix] / \
-                X[:, self.households_ix]
-
-            population_per_household = X[:,
-                                         self.population_ix] / X[:, self.households_ix]
-
-            if self.add_bedrooms_per_room:
-                bedrooms_per_room = X[:, self.total_bedrooms_ix] / \
-                    X[:, self.total_rooms_ix]
-
-                generated_feature = np.c_[
-                    X, room_per_household, population_per_household, bedrooms_per_room]
-
-            else:
-                generated_feature = np.c_[
-                    X, room_per_household, population_per_household]
-
-            return generated_feature
-
-        except Exception as e:
-            logging.info(f"Error Occurred at {HousingException(e,sys)}")
-            raise HousingException(e, sys)
+from housing.entity.artifact_store import ArtifactStore
+from housing.entity.housing_estimator import FeatureGenerator, CompiledPreprocessor
+from housing.entity.model_factory import keeps_fitted_parts
+from housing.util.util import read_yaml_file, load_data, load_object, save_numpy_array_data, save_object
 
 
 class DataTransformation:
 
     def __init__(self, data_transformation_config: DataTransformationConfig,
-                 data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact
+                 data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact,
+                 artifact_store: ArtifactStore = None, incremental_state: IncrementalTrainingState = None
                  ):
         """
         The function takes in three arguments: data_transformation_config, data_ingestion_artifact,
@@ -114,6 +41,12 @@ class DataTransformation:
         :type data_ingestion_artifact: DataIngestionArtifact
         :param data_validation_artifact: This is the output of the data validation step
         :type data_validation_artifact: DataValidationArtifact
+        :param artifact_store: in process store used to hand live objects over between stages
+        :type artifact_store: ArtifactStore
+        :param incremental_state: when given, the preprocessing object of the previous run is reused
+        instead of being fitted from scratch: unchanged when the previous model keeps its fitted parts,
+        otherwise updated with the training rows ingested after its `train_row_count` rows
+        :type incremental_state: IncrementalTrainingState
         """
 
         try:
@@ -123,6 +56,8 @@ class DataTransformation:
             self.data_transformation_config = data_transformation_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_artifact = data_validation_artifact
+            self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore(enabled=False)
+            self.incremental_state = incremental_state
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
@@ -172,6 +107,109 @@ class DataTransformation:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    def update_data_transformer_object(self, preprocessing_obj: ColumnTransformer,
+                                       input_feature_df: pd.DataFrame) -> ColumnTransformer:
+        """
+        It folds the new rows of `input_feature_df` into an already fitted preprocessing object.
+
+        The numerical imputer medians are approximated by the count weighted mean of the previous
+        medians and the medians of the new rows, the previous count being the scaler's
+        `n_samples_seen_`. Both scalers are updated exactly with `partial_fit`. The one hot categories
+        are kept, so a category never seen before requires a full retrain.
+
+        :param preprocessing_obj: preprocessing object fitted by a previous run
+        :type preprocessing_obj: ColumnTransformer
+        :param input_feature_df: new input rows
+        :type input_feature_df: pd.DataFrame
+        :return: the updated preprocessing object
+        """
+        try:
+            fitted_transformers = {name: (transformer, list(columns))
+                                   for name, transformer, columns in preprocessing_obj.transformers_}
+
+            num_pipeline, numerical_columns = fitted_transformers['num_pipeline']
+            num_imputer = num_pipeline.named_steps['impute']
+            num_scaler = num_pipeline.named_steps['scaler']
+
+            numerical_df = input_feature_df[numerical_columns]
+            previous_count = np.asarray(num_scaler.n_samples_seen_, dtype=float)
+            new_count = numerical_df.notna().sum().to_numpy(dtype=float)
+            new_median = numerical_df.median().to_numpy(dtype=float)
+            num_imputer.statistics_ = np.where(
+                new_count > 0,
+                (previous_count * num_imputer.statistics_ + new_count * np.nan_to_num(new_median)) /
+                (previous_count + new_count),
+                num_imputer.statistics_)
+            logging.info(f"Updated numerical impute values: {num_imputer.statistics_}")
+            feature_generator = num_pipeline.named_steps['feature_generator']
+            num_scaler.partial_fit(feature_generator.transform(num_imputer.transform(numerical_df)))
+
+            self.check_known_categories(preprocessing_obj=preprocessing_obj, input_feature_df=input_feature_df)
+            cat_pipeline, categorical_columns = fitted_transformers['cat_pipeline']
+            one_hot_encoder = cat_pipeline.named_steps['one_hot_encoder']
+            cat_imputer = cat_pipeline.named_steps['impute']
+            cat_pipeline.named_steps['scaler'].partial_fit(
+                one_hot_encoder.transform(cat_imputer.transform(input_feature_df[categorical_columns])))
+
+            return preprocessing_obj
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def check_known_categories(self, preprocessing_obj: ColumnTransformer, input_feature_df: pd.DataFrame):
+        """
+        It makes sure the fitted one hot encoder knows every category of `input_feature_df`, a category
+        never seen before requires a full retrain.
+        """
+        try:
+            fitted_transformers = {name: (transformer, list(columns))
+                                   for name, transformer, columns in preprocessing_obj.transformers_}
+            cat_pipeline, categorical_columns = fitted_transformers['cat_pipeline']
+            one_hot_encoder = cat_pipeline.named_steps['one_hot_encoder']
+            for column, categories in zip(categorical_columns, one_hot_encoder.categories_):
+                unseen_categories = set(input_feature_df[column].dropna()) - set(categories)
+                if unseen_categories:
+                    raise Exception(f"Column [{column}] has categories {unseen_categories} unseen by the "
+                                    f"previous preprocessing object, run a full retrain")
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def previous_model_keeps_fitted_parts(self) -> bool:
+        """
+        It tells whether the model of the previous run keeps its fitted parts through the incremental
+        update. Its trees or coefficients were learned on inputs scaled by the previous preprocessing
+        object, which must then stay unchanged for them to predict as before.
+        """
+        try:
+            trained_model_file_path = self.incremental_state.trained_model_file_path
+            previous_model = self.artifact_store.get(trained_model_file_path,
+                                                     lambda: load_object(file_path=trained_model_file_path))
+            return keeps_fitted_parts(previous_model.trained_model_object)
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def check_compiled_preprocessing_parity(self, preprocessing_obj: ColumnTransformer,
+                                            input_feature_df: pd.DataFrame) -> CompiledPreprocessor:
+        """
+        It compiles the fitted preprocessing object and makes sure the compiled single record path
+        reproduces the sklearn output on a sample of `input_feature_df`.
+        :return: CompiledPreprocessor
+        """
+        try:
+            compiled_preprocessor = CompiledPreprocessor(preprocessing_object=preprocessing_obj)
+            sample_df = input_feature_df.head(COMPILED_PREPROCESSING_PARITY_SAMPLE_SIZE)
+            parity_error = compiled_preprocessor.get_parity_error(preprocessing_object=preprocessing_obj,
+                                                                  X=sample_df)
+            logging.info(f"Compiled preprocessing max absolute difference: {parity_error}")
+            if parity_error > COMPILED_PREPROCESSING_PARITY_TOLERANCE:
+                raise Exception(f"Compiled preprocessing differs from sklearn by {parity_error}")
+            return compiled_preprocessor
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         """
         It takes the training and testing dataframe, splits the input and target feature, applies the
@@ -182,7 +220,10 @@ class DataTransformation:
         try:
             logging.info('Obtaining preprocessing Object')
 
-            preprocessing_obj = self.get_data_transformer_object()
+            if self.incremental_state is not None:
+                preprocessing_obj = load_object(file_path=self.incremental_state.preprocessed_object_file_path)
+            else:
+                preprocessing_obj = self.get_data_transformer_object()
 
             logging.info('Getting Train and Test File Path')
             train_file_path = self.data_ingestion_artifact.train_file_path
@@ -193,10 +234,10 @@ class DataTransformation:
             logging.info(
                 'Loading Training And Testing File As Panda DataFrame')
 
-            train_df = load_data(file_path=train_file_path,
-                                 schema_file_path=schema_file_path)
-            test_df = load_data(file_path=test_file_path,
-                                schema_file_path=schema_file_path)
+            train_df = self.artifact_store.get(train_file_path, lambda: load_data(file_path=train_file_path,
+                                                                                  schema_file_path=schema_file_path))
+            test_df = self.artifact_store.get(test_file_path, lambda: load_data(file_path=test_file_path,
+                                                                                schema_file_path=schema_file_path))
 
             dataset_schema = read_yaml_file(schema_file_path)
             target_column_name = dataset_schema[TARGET_COLUMN_KEY]
@@ -204,58 +245,78 @@ class DataTransformation:
             logging.info(
                 f"Splitting input and target feature from training and testing dataframe.")
             input_feature_train_df = train_df.drop(
-                columns=[target_column_name], axis=1)
+                columns=[target_column_name])
             target_feature_train_df = train_df[target_column_name]
 
             input_feature_test_df = test_df.drop(
-                columns=[target_column_name], axis=1)
+                columns=[target_column_name])
             target_feature_test_df = test_df[target_column_name]
 
+            if self.incremental_state is not None:
+                # the previous rows come first in the ingested split, only the new ones are folded in
+                new_input_feature_train_df = input_feature_train_df.iloc[self.incremental_state.train_row_count:]
+                if self.previous_model_keeps_fitted_parts():
+                    logging.info(f"Keeping previous preprocessing object unchanged for the previous model")
+                    self.check_known_categories(preprocessing_obj=preprocessing_obj,
+                                                input_feature_df=new_input_feature_train_df)
+                else:
+                    logging.info(f"Updating previous preprocessing object with the new training rows")
+                    preprocessing_obj = self.update_data_transformer_object(
+                        preprocessing_obj=preprocessing_obj, input_feature_df=new_input_feature_train_df)
+            else:
+                preprocessing_obj.fit(input_feature_train_df)
+
             logging.info(
                 f"Applying preprocessing object on training dataframe and testing dataframe")
-            input_feature_train_arr = preprocessing_obj.fit_transform(
+            input_feature_train_arr = preprocessing_obj.transform(
                 input_feature_train_df)
             input_feature_test_arr = preprocessing_obj.transform(
                 input_feature_test_df)
 
-            train_arr = np.c_[input_feature_train_arr,
-                              np.array(target_feature_train_df)]
-
-            test_arr = np.c_[input_feature_test_arr,
-                             np.array(target_feature_test_df)]
+            logging.info(f"Checking compiled preprocessing parity on testing dataframe")
+            self.check_compiled_preprocessing_parity(preprocessing_obj=preprocessing_obj,
+                                                     input_feature_df=input_feature_test_df)
 
             transformed_train_dir = self.data_transformation_config.transformed_train_dir
             transformed_test_dir = self.data_transformation_config.transformed_test_dir
 
-            train_file_name = os.path.basename(
-                train_file_path).replace(".csv", ".npz")
-            test_file_name = os.path.basename(
-                test_file_path).replace(".csv", ".npz")
+            train_file_name = os.path.splitext(
+                os.path.basename(train_file_path))[0]
+            test_file_name = os.path.splitext(
+                os.path.basename(test_file_path))[0]
 
             transformed_train_file_path = os.path.join(
-                transformed_train_dir, train_file_name)
+                transformed_train_dir, f"{train_file_name}.npy")
+            transformed_train_target_file_path = os.path.join(
+                transformed_train_dir, f"{train_file_name}_target.npy")
             transformed_test_file_path = os.path.join(
-                transformed_test_dir, test_file_name)
+                transformed_test_dir, f"{test_file_name}.npy")
+            transformed_test_target_file_path = os.path.join(
+                transformed_test_dir, f"{test_file_name}_target.npy")
 
-            logging.info(f"Saving transformed training and testing array.")
+            logging.info(f"Saving transformed training and testing features and targets as separate arrays.")
 
-            save_numpy_array_data(
-                file_path=transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(
-                file_path=transformed_test_file_path, array=test_arr)
+            for file_path, array in [(transformed_train_file_path, input_feature_train_arr),
+                                     (transformed_train_target_file_path, np.array(target_feature_train_df)),
+                                     (transformed_test_file_path, input_feature_test_arr),
+                                     (transformed_test_target_file_path, np.array(target_feature_test_df))]:
+                save_numpy_array_data(file_path=file_path, array=array)
+                self.artifact_store.put(file_path, array)
 
             preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
 
             logging.info(f"Saving preprocessing object.")
             save_object(file_path=preprocessing_obj_file_path,
                         obj=preprocessing_obj)
+            self.artifact_store.put(preprocessing_obj_file_path, preprocessing_obj)
 
             data_transformation_artifact = DataTransformationArtifact(is_transformed=True,
                                                                       message="Data transformation successful.",
                                                                       transformed_train_file_path=transformed_train_file_path,
                                                                       transformed_test_file_path=transformed_test_file_path,
-                                                                      preprocessed_object_file_path=preprocessing_obj_file_path
-
+                                                                      preprocessed_object_file_path=preprocessing_obj_file_path,
+                                                                      transformed_train_target_file_path=transformed_train_target_file_path,
+                                                                      transformed_test_target_file_path=transformed_test_target_file_path
                                                                       )
             logging.info(
                 f"Data transformation artifact: {data_transformation_artifact}")
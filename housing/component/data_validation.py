@@ -2,26 +2,25 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-from collections import Counter
 import json
 
-from evidently.model_profile import Profile
-from evidently.model_profile.sections import DataDriftProfileSection
-from evidently.dashboard import Dashboard
-from evidently.dashboard.tabs import DataDriftTab
-
 
 from housing.logger.logger import logging
 from housing.exception.exception import HousingException
 from housing.entity.config_entity import DataValidationConfig
-from housing.util.util import read_yaml_file
+from housing.util.util import read_yaml_file, load_data
 from housing.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from housing.config.configuration import Configuration
+from housing.entity.artifact_store import ArtifactStore
+from housing.entity.schema_validator import SchemaValidator
+from housing.entity.data_drift import DataDriftDetector
+from housing.constant import SCHEMA_VALIDATION_REPORT_FILE_NAME, DRIFT_REFERENCE_PROFILE_FILE_NAME
 
 
 class DataValidation:
 
-    def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact):
+    def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact,
+                 artifact_store: ArtifactStore = None):
         """
         This is a constructor function that initializes the data validation configuration and data
         ingestion artifact, and logs any errors that occur.
@@ -33,12 +32,16 @@ class DataValidation:
         about the data that has been ingested, such as the file path, file format, and any other
         relevant metadata
         :type data_ingestion_artifact: DataIngestionArtifact
+        :param artifact_store: in process store used to hand live objects over between stages
+        :type artifact_store: ArtifactStore
         """
         try:
             logging.info(
                 f"\n\n{'='*20} Data Validation log Started {'='*20}\n\n")
             self.data_validation_config = data_validation_config
             self.data_ingestion_artifact = data_ingestion_artifact
+            self.train_test_df = None
+            self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore(enabled=False)
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
@@ -46,13 +49,20 @@ class DataValidation:
     def get_train_and_test_df(self):
         """
         It reads the train and test data from the data ingestion artifact and returns the dataframes.
+        The files are read once, typed with the schema, and reused by every validation step.
         :return: The train_df and test_df are being returned.
         """
         try:
-            train_df = pd.read_csv(
-                self.data_ingestion_artifact.train_file_path)
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
-            return train_df, test_df
+            if self.train_test_df is None:
+                schema_file_path = self.data_validation_config.schema_file_path
+                train_file_path = self.data_ingestion_artifact.train_file_path
+                test_file_path = self.data_ingestion_artifact.test_file_path
+                train_df = self.artifact_store.get(train_file_path, lambda: load_data(file_path=train_file_path,
+                                                                                      schema_file_path=schema_file_path))
+                test_df = self.artifact_store.get(test_file_path, lambda: load_data(file_path=test_file_path,
+                                                                                    schema_file_path=schema_file_path))
+                self.train_test_df = (train_df, test_df)
+            return self.train_test_df
         except Exception as e:
             raise HousingException(e, sys)
 
@@ -96,71 +106,38 @@ class DataValidation:
 
     def validate_dataset_schema(self) -> bool:
         """
-        It checks if the number of columns in the schema file matches the number of columns in the train
-        and test dataframes, if the target column is present in both the dataframes, if the datatypes of
-        the columns in the schema file match the datatypes of the columns in the train and test
-        dataframes, and if the domain values of the categorical columns in the schema file match the
-        domain values of the categorical columns in the train and test dataframes
+        It validates the train and test dataframes against the schema file with `SchemaValidator`:
+        exact column set including the target column, dtypes, domain values of every categorical
+        column, numeric ranges and null rates. Both reports are saved next to the drift report.
         :return: A boolean value
         """
         try:
-            is_schema_validated = False
-
             schema_file_path = self.data_validation_config.schema_file_path
-            schema_config = read_yaml_file(file_path=schema_file_path)
+            schema_validator = SchemaValidator(dataset_schema=read_yaml_file(file_path=schema_file_path))
 
+            logging.info(f'Validating Train and Test Data with Given Schema at [{schema_file_path}]')
             train_df, test_df = self.get_train_and_test_df()
-            train_df_columns = train_df.columns
-            test_df_columns = test_df.columns
-
-            logging.info('Validating Number of Columns')
-            number_of_cols_validate = False
-            if (len((schema_config['columns'].keys())) == (len(train_df_columns))) & (len((schema_config['columns'].keys())) == (len(test_df_columns))):
-                number_of_cols_validate = True
-                logging.info('Number of cols are Validated')
-            else:
-                raise Exception('Number of cols are not matching')
-
-            logging.info(f'Checking weather target Columns is Available]')
-            is_target_column_available = False
-            if (schema_config['target_column'] in train_df_columns) and (schema_config['target_column'] in test_df_columns):
-                is_target_column_available = True
-                logging.info(
-                    f'Target Column is Available [{schema_config["target_column"]}]')
-            else:
-                raise Exception('target col is not available')
-
-            logging.info(
-                f'Validating Datatype of Columns with Given Schema at [{schema_file_path}]')
-            data_type_of_cols_validate = False
-            if (Counter(schema_config['numerical_columns'])) == (Counter([col for col in train_df.columns if train_df[col].dtype != 'O' and col != schema_config['target_column']])) \
-                    and (Counter(schema_config['numerical_columns'])) == (Counter([col for col in test_df.columns if test_df[col].dtype != 'O' and col != schema_config['target_column']])) \
-                    and (Counter(schema_config['categorical_columns'])) == (Counter([col for col in train_df.columns if test_df[col].dtype == 'O'])) \
-                    and (Counter(schema_config['categorical_columns'])) == (Counter([col for col in test_df.columns if test_df[col].dtype == 'O'])):
-                data_type_of_cols_validate = True
-                logging.info(
-                    'DataType of Columns are passed Successfully for both Data')
-            else:
-                raise Exception('DataType of Columns is not matching')
-
-            logging.info(
-                f'Validating Domain Values of Columns with Given Schema at [{schema_file_path}]')
-            is_domain_value_validate = False
-            if Counter(schema_config['domain_value']['ocean_proximity']) == Counter(train_df['ocean_proximity'].unique()) == Counter(test_df['ocean_proximity'].unique()):
-                is_domain_value_validate = True
-                logging.info(
-                    f'Domain values of Columns [{list(schema_config["domain_value"].keys())}] are passed Successfully for both Data')
-            else:
-                raise Exception('domain value prob')
-
-            is_schema_validated = number_of_cols_validate and is_domain_value_validate and is_target_column_available and data_type_of_cols_validate
-
-            if not is_schema_validated:
-                message = f"Either Number of Columns or Datatype of Columns or Domain VAlues of Column  is Not Matched "
+            schema_validation_reports = {
+                "train": schema_validator.validate(train_df),
+                "test": schema_validator.validate(test_df)
+            }
+
+            schema_report_file_path = os.path.join(os.path.dirname(self.data_validation_config.report_file_path),
+                                                   SCHEMA_VALIDATION_REPORT_FILE_NAME)
+            os.makedirs(os.path.dirname(schema_report_file_path), exist_ok=True)
+            with open(schema_report_file_path, "w") as schema_report_file:
+                json.dump({dataset_name: report._asdict() for dataset_name, report in schema_validation_reports.items()},
+                          schema_report_file, indent=2)
+
+            error_messages = [f"{dataset_name}: {SchemaValidator.get_error_message(report)}"
+                              for dataset_name, report in schema_validation_reports.items() if not report.is_valid]
+            if error_messages:
+                message = f"Schema validation failed, see [{schema_report_file_path}]: {' | '.join(error_messages)}"
                 logging.info(message)
                 raise Exception(message)
 
-            return is_schema_validated
+            logging.info(f'Train and Test Data are Validated with the Schema')
+            return True
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
@@ -168,21 +145,32 @@ class DataValidation:
 
     def get_and_save_data_drift_report(self):
         """
-        It takes the train and test dataframes, calculates the data drift report and saves it to a file
+        It profiles the train dataframe, compares the test dataframe with that profile using
+        `DataDriftDetector` and saves the json report to a file. The profile is saved next to the
+        report, it ships with the model as the reference of online drift monitoring.
         :return: The report is being returned.
         """
         try:
-            profile = Profile(sections=[DataDriftProfileSection()])
+            data_validation_config = self.data_validation_config
+            data_drift_detector = DataDriftDetector(
+                dataset_schema=read_yaml_file(file_path=data_validation_config.schema_file_path),
+                bin_count=data_validation_config.drift_bin_count,
+                p_value_threshold=data_validation_config.drift_p_value_threshold,
+                psi_threshold=data_validation_config.drift_psi_threshold,
+                drift_share_threshold=data_validation_config.drift_share_threshold)
             train_df, test_df = self.get_train_and_test_df()
-            profile.calculate(train_df, test_df)
-            report = json.loads(profile.json())
+            reference_profile = data_drift_detector.get_reference_profile(reference_df=train_df)
+            report = data_drift_detector.get_drift_report(reference_profile=reference_profile, current_df=test_df)
 
             report_file_path = self.data_validation_config.report_file_path
             report_dir = os.path.dirname(report_file_path)
             os.makedirs(report_dir, exist_ok=True)
 
             with open(self.data_validation_config.report_file_path, "w") as report_file:
-                json.dump(report, report_file)
+                json.dump(report, report_file, indent=2)
+
+            with open(self.get_reference_profile_file_path(), "w") as reference_profile_file:
+                json.dump(reference_profile, reference_profile_file)
 
             return report
 
@@ -190,11 +178,19 @@ class DataValidation:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    def get_reference_profile_file_path(self) -> str:
+        return os.path.join(os.path.dirname(self.data_validation_config.report_file_path),
+                            DRIFT_REFERENCE_PROFILE_FILE_NAME)
+
     def save_data_drift_report_page(self):
         """
-        It takes a dataframe, splits it into train and test, and then saves the report page to a file
+        It saves the evidently data drift dashboard of the train and test dataframes. evidently is
+        only imported here, the page is optional and off unless `save_report_page` is set
         """
         try:
+            from evidently.dashboard import Dashboard
+            from evidently.dashboard.tabs import DataDriftTab
+
             dashboard = Dashboard(tabs=[DataDriftTab()])
             train_df, test_df = self.get_train_and_test_df()
             dashboard.calculate(train_df, test_df)
@@ -211,14 +207,19 @@ class DataValidation:
 
     def is_data_drift_found(self) -> bool:
         """
-        It checks if there is a data drift in the model and if there is, it saves the data drift report
-        page
+        It computes and saves the data drift report, saves the report page when enabled, and returns
+        whether the share of drifted features is above the configured threshold
         """
         try:
             report = self.get_and_save_data_drift_report()
-            self.save_data_drift_report_page()
-
-            return True
+            if self.data_validation_config.save_report_page:
+                self.save_data_drift_report_page()
+
+            drifted_features = [column for column, feature in report["features"].items()
+                                if feature["drift_detected"]]
+            logging.info(f"Data drift: {report['number_of_drifted_features']} of {report['number_of_features']} "
+                         f"features drifted {drifted_features}, dataset drift [{report['dataset_drift']}]")
+            return report["dataset_drift"]
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
@@ -232,13 +233,16 @@ class DataValidation:
         try:
             self.is_train_test_file_exists()
             self.validate_dataset_schema()
-            self.is_data_drift_found()
+            if self.is_data_drift_found() and self.data_validation_config.fail_on_data_drift:
+                raise Exception(f"Data drift found between train and test data, "
+                                f"see [{self.data_validation_config.report_file_path}]")
 
             data_validation_artifact = DataValidationArtifact(schema_file_path=self.data_validation_config.schema_file_path,
                                                               report_file_path=self.data_validation_config.report_file_path,
                                                               report_page_file_path=self.data_validation_config.report_page_file_path,
                                                               is_validated=True,
-                                                              message='Data validation performed successfully')
+                                                              message='Data validation performed successfully',
+                                                              reference_profile_file_path=self.get_reference_profile_file_path())
             logging.info(
                 f"Data VAlidation Artifact: [{data_validation_artifact}]")
             return data_validation_artifact
@@ -12,6 +12,7 @@ from housing.util.util import read_yaml_file, load_data, load_numpy_array_data,
 from housing.entity.config_entity import ModelEvaluationConfig
 from housing.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact
 from housing.entity.model_factory import evaluate_regression_model
+from housing.entity.artifact_store import ArtifactStore
 
 
 class ModelEvaluation:
@@ -19,7 +20,8 @@ class ModelEvaluation:
     def __init__(self, model_evaluation_config: ModelEvaluationConfig,
                  data_ingestion_artifact: DataIngestionArtifact,
                  data_validation_artifact: DataValidationArtifact,
-                 model_trainer_artifact: ModelTrainerArtifact) -> None:
+                 model_trainer_artifact: ModelTrainerArtifact,
+                 artifact_store: ArtifactStore = None) -> None:
         """
         This is the constructor function for a class that takes in several artifacts and a configuration
         object and initializes them as class attributes.
@@ -43,6 +45,8 @@ class ModelEvaluation:
         predictions. The ModelTrainerArtifact is used in the model evaluation process to load the
         trained model
         :type model_trainer_artifact: ModelTrainerArtifact
+        :param artifact_store: in process store used to hand live objects over between stages
+        :type artifact_store: ArtifactStore
         """
 
         try:
@@ -52,6 +56,7 @@ class ModelEvaluation:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_artifact = data_validation_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore(enabled=False)
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
@@ -138,20 +143,18 @@ class ModelEvaluation:
         """
         try:
             trained_model_file_path = self.model_trainer_artifact.trained_model_file_path
-            trained_model_object = load_object(
-                file_path=trained_model_file_path)
+            trained_model_object = self.artifact_store.get(trained_model_file_path,
+                                                           lambda: load_object(file_path=trained_model_file_path))
 
             train_file_path = self.data_ingestion_artifact.train_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
             schema_file_path = self.data_validation_artifact.schema_file_path
 
             logging.info('Loading data for model evaluation')
-            train_dataframe = load_data(file_path=train_file_path,
-                                        schema_file_path=schema_file_path
-                                        )
-            test_dataframe = load_data(file_path=test_file_path,
-                                       schema_file_path=schema_file_path
-                                       )
+            train_dataframe = self.artifact_store.get(train_file_path, lambda: load_data(file_path=train_file_path,
+                                                                                         schema_file_path=schema_file_path))
+            test_dataframe = self.artifact_store.get(test_file_path, lambda: load_data(file_path=test_file_path,
+                                                                                       schema_file_path=schema_file_path))
 
             schema_content = read_yaml_file(file_path=schema_file_path)
 
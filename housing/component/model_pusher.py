@@ -1,9 +1,11 @@
 import os
 import sys
-import shutil
 
 from housing.exception.exception import HousingException
 from housing.logger.logger import logging
+from housing.constant import *
+from housing.util.util import read_yaml_file, write_yaml_file_atomically, copy_file_atomically, \
+    copy_object_atomically
 from housing.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact
 from housing.entity.config_entity import ModelPusherConfig
 
@@ -11,7 +13,8 @@ from housing.entity.config_entity import ModelPusherConfig
 class ModelPusher:
 
     def __init__(self, model_pusher_config: ModelPusherConfig,
-                 model_evaluation_artifact: ModelEvaluationArtifact) -> None:
+                 model_evaluation_artifact: ModelEvaluationArtifact,
+                 reference_profile_file_path: str = None) -> None:
         """
         This is a constructor function that initializes the model pusher configuration and model
         evaluation artifact.
@@ -24,11 +27,15 @@ class ModelPusher:
         model. It may include metrics such as accuracy, precision, recall, and F1 score, as well as any
         other relevant information about the model's performance
         :type model_evaluation_artifact: ModelEvaluationArtifact
+        :param reference_profile_file_path: drift reference profile of the training data, exported
+        next to the model for online drift monitoring
+        :type reference_profile_file_path: str
         """
         try:
             logging.info(f"\n\n{'=' * 30}Model Pusher log started.{'=' * 30}\n\n")
             self.model_pusher_config = model_pusher_config
             self.model_evaluation_artifact = model_evaluation_artifact
+            self.reference_profile_file_path = reference_profile_file_path
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
@@ -48,12 +55,19 @@ class ModelPusher:
             logging.info(f'Exporting Model File :[{export_model_file_path}]')
             os.makedirs(export_dir, exist_ok=True)
 
-            shutil.copy(src=evaluated_model_file_path,
-                        dst=export_model_file_path)
+            copy_object_atomically(src=evaluated_model_file_path,
+                                   dst=export_model_file_path)
 
             logging.info(
                 f"Trained model: {evaluated_model_file_path} is copied in export dir:[{export_model_file_path}]")
 
+            if self.reference_profile_file_path is not None and os.path.exists(self.reference_profile_file_path):
+                copy_file_atomically(src=self.reference_profile_file_path,
+                                     dst=os.path.join(export_dir, DRIFT_REFERENCE_PROFILE_FILE_NAME))
+                logging.info(f"Drift reference profile is copied in export dir:[{export_dir}]")
+
+            self.update_model_pointer(export_model_file_path=export_model_file_path)
+
             model_pusher_artifact = ModelPusherArtifact(is_model_pusher=True,
                                                         export_model_file_path=export_model_file_path
                                                         )
@@ -65,6 +79,37 @@ class ModelPusher:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    def update_model_pointer(self, export_model_file_path: str) -> int:
+        """
+        This function atomically rewrites the `CURRENT` pointer of the export root so that it names the
+        newly exported model and bumps its generation counter, which is what serving processes watch.
+
+        :param export_model_file_path: path of the model file that has just been exported
+        :type export_model_file_path: str
+        :return: the new generation number
+        """
+        try:
+            export_root_dir = os.path.dirname(self.model_pusher_config.export_dir_path)
+            pointer_file_path = os.path.join(export_root_dir, MODEL_POINTER_FILE_NAME)
+
+            generation = 0
+            if os.path.exists(pointer_file_path):
+                pointer_content = read_yaml_file(file_path=pointer_file_path) or dict()
+                generation = int(pointer_content.get(MODEL_POINTER_GENERATION_KEY, 0))
+            generation += 1
+
+            pointer_content = {
+                MODEL_POINTER_GENERATION_KEY: generation,
+                MODEL_PATH_KEY: os.path.relpath(export_model_file_path, export_root_dir)
+            }
+            write_yaml_file_atomically(file_path=pointer_file_path, data=pointer_content)
+            logging.info(f"Model pointer [{pointer_file_path}] updated: {pointer_content}")
+            return generation
+
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         """
         This function attempts to export a model and returns a ModelPusherArtifact, but raises a
@@ -1,59 +1,31 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
 from typing import List
 
 
-from sklearn.linear_model import LinearRegression, Ridge, Lasso
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.ensemble import RandomForestRegressor, AdaBoostRegressor, GradientBoostingRegressor
-from xgboost import XGBRegressor
-from catboost import CatBoostRegressor
-
-
 from housing.logger.logger import logging
 from housing.exception.exception import HousingException
 from housing.util.util import read_yaml_file, save_object, load_numpy_array_data, load_object
 from housing.config.configuration import DataIngestionConfig, DataTransformationConfig, DataValidationConfig, ModelTrainerConfig
 from housing.entity.config_entity import DataValidationConfig, DataIngestionConfig, DataTransformationConfig
-from housing.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact, ModelTrainerArtifact
-from housing.entity.model_factory import MetricInfoArtifact, ModelFactory, GridSearchedBestModel, evaluate_regression_model
-
-
-class HousingEstimatorModel:
-    def __init__(self, preprocessing_object, trained_model_object) -> None:
-        """
-        This function takes in a preprocessing object and a trained model object and assigns them to the
-        class variables preprocessing_object and trained_model_object.
-
-        :param preprocessing_object: This is the object of the class Preprocessing
-        :param trained_model_object: This is the object of the class that contains the trained model
-        """
-        self.preprocessing_object = preprocessing_object
-        self.trained_model_object = trained_model_object
-
-    def predict(self, X):
-
-        try:
-            transformed_features = self.preprocessing_object.transform(X)
-            predictions = self.trained_model_object.predict(
-                transformed_features)
-            return predictions
-        except Exception as e:
-            logging.info(f'Error Occurred at {HousingException(e,sys)}')
-            raise HousingException(e, sys)
-
-    def __repr__(self) -> str:
-        return f"{type(self.trained_model_object).__name__}()"
-
-    def __str__(self) -> str:
-        return f"{type(self.trained_model_object).__name__}()"
+from housing.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact, ModelTrainerArtifact, \
+    IncrementalTrainingState
+from housing.entity.model_factory import MetricInfoArtifact, ModelFactory, GridSearchedBestModel, evaluate_regression_model, \
+    keeps_fitted_parts
+from housing.entity.housing_estimator import HousingEstimatorModel
+from housing.entity.artifact_store import ArtifactStore
+from housing.entity.instrumentation import Instrumentation
 
 
 class ModelTrainer:
 
     def __init__(self, model_trainer_config: ModelTrainerConfig,
-                 data_transformation_artifact: DataTransformationArtifact) -> None:
+                 data_transformation_artifact: DataTransformationArtifact,
+                 artifact_store: ArtifactStore = None,
+                 incremental_state: IncrementalTrainingState = None,
+                 instrumentation: Instrumentation = None) -> None:
         """
         The function takes in two arguments, a ModelTrainerConfig object and a DataTransformationArtifact
         object. 
@@ -75,17 +47,60 @@ class ModelTrainer:
         :param data_transformation_artifact: This is the artifact that is created by the
         DataTransformation class
         :type data_transformation_artifact: DataTransformationArtifact
+        :param artifact_store: in process store used to hand live objects over between stages
+        :type artifact_store: ArtifactStore
+        :param incremental_state: when given, the model of the previous run is updated with the
+        accumulated training rows instead of running model selection, and evaluated on the whole test split
+        :type incremental_state: IncrementalTrainingState
+        :param instrumentation: records the metrics of every candidate search of model selection
+        :type instrumentation: Instrumentation
         """
         try:
             logging.info(
                 f"\n\n{'='*20} Model Trainer log Started {'='*20}\n\n")
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore(enabled=False)
+            self.incremental_state = incremental_state
+            self.instrumentation = instrumentation
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    def update_trained_model(self, estimator, X, y, new_row_start: int):
+        """
+        It updates a fitted estimator with the accumulated training rows `X`, `y`, whose rows from
+        `new_row_start` on were added since it was fitted.
+
+        Estimators with `partial_fit` take one more pass over the new rows only. Ensembles with
+        `warm_start` (random forest, gradient boosting) keep their fitted estimators and grow
+        `incremental_estimators` new ones on all the accumulated rows. Both keep their fitted parts, so
+        data transformation left their preprocessing object unchanged. Any other estimator is refitted
+        on the accumulated rows; the `warm_start` of Lasso only seeds its solver with the previous
+        coefficients, the result is that of a full refit.
+
+        :param estimator: estimator fitted by a previous run
+        :param new_row_start: index of the first new row in `X`
+        :return: the updated estimator
+        """
+        try:
+            if hasattr(estimator, "partial_fit"):
+                logging.info(f"Partially fitting {type(estimator).__name__} on {len(X) - new_row_start} new rows")
+                estimator.partial_fit(X[new_row_start:], y[new_row_start:])
+            elif keeps_fitted_parts(estimator):
+                n_estimators = estimator.get_params()["n_estimators"] + self.model_trainer_config.incremental_estimators
+                logging.info(f"Growing {type(estimator).__name__} to {n_estimators} estimators on {len(X)} rows")
+                estimator.set_params(warm_start=True, n_estimators=n_estimators)
+                estimator.fit(X, y)
+            else:
+                logging.info(f"Refitting {type(estimator).__name__} on {len(X)} rows")
+                estimator.fit(X, y)
+            return estimator
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         """
         It takes the transformed training and testing data, splits it into input and target columns,
@@ -96,42 +111,48 @@ class ModelTrainer:
         :return: ModelTrainerArtifact
         """
         try:
-            logging.info('loading Transformed Training and Testing Data...')
+            logging.info('Memory mapping Transformed Training and Testing Input and Target Data...')
 
-            transformed_train_file_path = self.data_transformation_artifact.transformed_train_file_path
-            train_array = load_numpy_array_data(transformed_train_file_path)
+            data_transformation_artifact = self.data_transformation_artifact
+            X_train, y_train, X_test, y_test = [
+                self.artifact_store.get(file_path, lambda file_path=file_path: load_numpy_array_data(file_path,
+                                                                                                     mmap_mode='r'))
+                for file_path in [data_transformation_artifact.transformed_train_file_path,
+                                  data_transformation_artifact.transformed_train_target_file_path,
+                                  data_transformation_artifact.transformed_test_file_path,
+                                  data_transformation_artifact.transformed_test_target_file_path]]
 
-            transformed_test_file_path = self.data_transformation_artifact.transformed_test_file_path
-            test_array = load_numpy_array_data(transformed_test_file_path)
-
-            logging.info(
-                f'Splitting Training and Testing Data... into Input and Target Column')
-
-            X_train, y_train, X_test, y_test = train_array[:, :-
-                                                           1], train_array[:, -1], test_array[:, :-1], test_array[:, -1]
-
-            logging.info('Extracting Model Config File')
-            model_config_file_path = self.model_trainer_config.model_config_file_path
-
-            logging.info('Start finding Best Model using Model Factory Class')
             base_accuracy = self.model_trainer_config.base_accuracy
             logging.info(f"Expected(Base) accuracy Should be {base_accuracy}")
 
-            model_factory = ModelFactory(
-                model_config_path=model_config_file_path)
+            if self.incremental_state is not None:
+                logging.info('Updating previously trained model with the accumulated rows')
+                trained_model_file_path = self.incremental_state.trained_model_file_path
+                previous_model = self.artifact_store.get(trained_model_file_path,
+                                                         lambda: load_object(file_path=trained_model_file_path))
+                model_list = [self.update_trained_model(estimator=previous_model.trained_model_object,
+                                                        X=X_train, y=y_train,
+                                                        new_row_start=self.incremental_state.train_row_count)]
+            else:
+                logging.info('Extracting Model Config File')
+                model_config_file_path = self.model_trainer_config.model_config_file_path
+
+                logging.info('Start finding Best Model using Model Factory Class')
+                model_factory = ModelFactory(
+                    model_config_path=model_config_file_path, instrumentation=self.instrumentation)
 
-            logging.info(f'Initializing Model Selection operation')
-            best_model = model_factory.get_best_model(
-                X=X_train, y=y_train, base_accuracy=0.6)
+                logging.info(f'Initializing Model Selection operation')
+                best_model = model_factory.get_best_model(
+                    X=X_train, y=y_train, base_accuracy=0.6)
 
-            logging.info(f"Best model found on training dataset: {best_model}")
+                logging.info(f"Best model found on training dataset: {best_model}")
 
-            logging.info(f"Extracting trained model list.")
+                logging.info(f"Extracting trained model list.")
 
-            grid_searched_model_list: List[GridSearchedBestModel] = model_factory.grid_searched_best_model_list
+                grid_searched_model_list: List[GridSearchedBestModel] = model_factory.grid_searched_best_model_list
 
-            model_list = [
-                model.best_model for model in grid_searched_model_list]
+                model_list = [
+                    model.best_model for model in grid_searched_model_list]
 
             logging.info(
                 f'Evaluation all trained model on Training and Testing both Dataset')
@@ -141,11 +162,15 @@ class ModelTrainer:
                                                                         base_accuracy=base_accuracy
                                                                         )
 
+            if metric_info is None:
+                raise Exception(f"No trained model reached the base accuracy {base_accuracy}")
+
             logging.info(
                 f"Best found model on both training and testing dataset.")
 
-            preprocessing_obj = load_object(
-                file_path=self.data_transformation_artifact.preprocessed_object_file_path)
+            preprocessed_object_file_path = self.data_transformation_artifact.preprocessed_object_file_path
+            preprocessing_obj = self.artifact_store.get(preprocessed_object_file_path,
+                                                        lambda: load_object(file_path=preprocessed_object_file_path))
             model_object = metric_info.model_object
 
             trained_model_file_path = self.model_trainer_config.trained_model_file_path
@@ -153,7 +178,9 @@ class ModelTrainer:
                                                   trained_model_object=model_object
                                                   )
             logging.info(f"Saving Model at path : {trained_model_file_path}")
-            save_object(file_path=trained_model_file_path, obj=housing_model)
+            save_object(file_path=trained_model_file_path, obj=housing_model,
+                        object_format=self.model_trainer_config.model_file_format)
+            self.artifact_store.put(trained_model_file_path, housing_model)
 
             model_trainer_artifact = ModelTrainerArtifact(is_trained=True,
                                                           message='Model Trained Successfully',
@@ -13,14 +13,14 @@ from housing.entity.config_entity import DataIngestionConfig, DataTransformation
 
 class Configuration:
     def __init__(self, config_file_path: str = CONFIG_FILE_PATH,
-                 current_time_stamp=get_current_time_stamp()) -> None:
+                 current_time_stamp=None) -> None:
 
         try:
             self.config_info = read_yaml_file(file_path=config_file_path)
 
             self.training_pipeline_config = self.get_training_pipeline_config()
 
-            self.time_stamp = current_time_stamp
+            self.time_stamp = current_time_stamp if current_time_stamp is not None else get_current_time_stamp()
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
@@ -41,8 +41,30 @@ class Configuration:
                 training_pipeline_config[TRAINING_PIPELINE_ARTIFACT_DIR_KEY]
             )
 
+            artifact_cache_dir = None
+            if training_pipeline_config.get(TRAINING_PIPELINE_ARTIFACT_CACHE_KEY, False):
+                artifact_cache_dir = os.path.join(artifact_dir, ARTIFACT_CACHE_DIR_NAME)
+
+            in_memory_handoff = bool(training_pipeline_config.get(TRAINING_PIPELINE_IN_MEMORY_HANDOFF_KEY, False))
+
+            incremental_state_file_path = None
+            if training_pipeline_config.get(TRAINING_PIPELINE_INCREMENTAL_TRAINING_KEY, False):
+                incremental_state_file_path = os.path.join(artifact_dir, INCREMENTAL_STATE_DIR_NAME,
+                                                           INCREMENTAL_STATE_FILE_NAME)
+
+            job_queue_file_path = os.path.join(artifact_dir, JOB_QUEUE_DIR_NAME, JOB_QUEUE_FILE_NAME)
+            max_concurrent_jobs = int(training_pipeline_config.get(TRAINING_PIPELINE_MAX_CONCURRENT_JOBS_KEY, 1))
+            experiment_store_file_path = os.path.join(artifact_dir, EXPERIMENT_DIR_NAME, EXPERIMENT_STORE_FILE_NAME)
+            trace_memory = bool(training_pipeline_config.get(TRAINING_PIPELINE_TRACE_MEMORY_KEY, False))
+
             training_pipeline_config = TrainingPipelineConfig(
-                artifact_dir=artifact_dir)
+                artifact_dir=artifact_dir, artifact_cache_dir=artifact_cache_dir,
+                in_memory_handoff=in_memory_handoff,
+                incremental_state_file_path=incremental_state_file_path,
+                job_queue_file_path=job_queue_file_path,
+                max_concurrent_jobs=max_concurrent_jobs,
+                experiment_store_file_path=experiment_store_file_path,
+                trace_memory=trace_memory)
 
             logging.info(
                 f"Training Pipeline Config: {training_pipeline_config}")
@@ -63,6 +85,9 @@ class Configuration:
             data_ingestion_config_info = self.config_info[DATA_INGESTION_CONFIG_KEY]
 
             dataset_download_url = data_ingestion_config_info[DATA_INGESTION_DOWNLOAD_URL_KEY]
+            dataset_sha256 = data_ingestion_config_info.get(DATA_INGESTION_DATASET_SHA256_KEY)
+            download_workers = data_ingestion_config_info.get(DATA_INGESTION_DOWNLOAD_WORKERS_KEY,
+                                                              DEFAULT_DOWNLOAD_WORKERS)
 
             artifact_dir = self.training_pipeline_config.artifact_dir
 
@@ -72,8 +97,10 @@ class Configuration:
                 self.time_stamp
             )
 
+            # downloaded archives and their extracted content are shared by all runs
             raw_data_dir = os.path.join(
-                data_ingestion_artifact_dir,
+                artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR_NAME,
                 data_ingestion_config_info[DATA_INGESTION_RAW_DATA_DIR_KEY]
             )
 
@@ -83,7 +110,8 @@ class Configuration:
             )
 
             tgz_download_dir = os.path.join(
-                data_ingestion_artifact_dir,
+                artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR_NAME,
                 data_ingestion_config_info[DATA_INGESTION_TGZ_DOWNLOAD_DIR_KEY]
             )
 
@@ -97,12 +125,29 @@ class Configuration:
                 data_ingestion_config_info[DATA_INGESTION_INGESTED_TEST_DIR_KEY]
             )
 
+            ingested_file_format = data_ingestion_config_info.get(DATA_INGESTION_INGESTED_FILE_FORMAT_KEY,
+                                                                  DEFAULT_INGESTED_FILE_FORMAT)
+
+            streaming_chunk_size = data_ingestion_config_info.get(DATA_INGESTION_STREAMING_CHUNK_SIZE_KEY)
+
+            data_validation_config_info = self.config_info[DATA_VALIDATION_CONFIG_KEY]
+            schema_file_path = os.path.join(
+                ROOT_DIR,
+                data_validation_config_info[DATA_VALIDATION_SCHEMA_DIR_KEY],
+                data_validation_config_info[DATA_VALIDATION_SCHEMA_FILE_NAME_KEY]
+            )
+
             data_ingestion_config = DataIngestionConfig(
                 dataset_download_url=dataset_download_url,
+                dataset_sha256=dataset_sha256,
+                download_workers=download_workers,
                 tgz_download_dir=tgz_download_dir,
                 raw_data_dir=raw_data_dir,
                 ingested_train_dir=ingested_train_dir,
-                ingested_test_dir=ingested_test_dir
+                ingested_test_dir=ingested_test_dir,
+                ingested_file_format=ingested_file_format,
+                schema_file_path=schema_file_path,
+                streaming_chunk_size=streaming_chunk_size
             )
 
             logging.info(f"Data Ingestion Config: {data_ingestion_config}")
@@ -148,7 +193,14 @@ class Configuration:
             data_validation_config = DataValidationConfig(
                 schema_file_path=schema_file_path,
                 report_file_path=report_file_path,
-                report_page_file_path=report_page_file_path
+                report_page_file_path=report_page_file_path,
+                save_report_page=data_validation_config_info.get(DATA_VALIDATION_SAVE_REPORT_PAGE_KEY, False),
+                drift_bin_count=data_validation_config_info.get(DATA_VALIDATION_DRIFT_BIN_COUNT_KEY, 10),
+                drift_p_value_threshold=data_validation_config_info.get(
+                    DATA_VALIDATION_DRIFT_P_VALUE_THRESHOLD_KEY, 0.05),
+                drift_psi_threshold=data_validation_config_info.get(DATA_VALIDATION_DRIFT_PSI_THRESHOLD_KEY, 0.2),
+                drift_share_threshold=data_validation_config_info.get(DATA_VALIDATION_DRIFT_SHARE_THRESHOLD_KEY, 0.5),
+                fail_on_data_drift=data_validation_config_info.get(DATA_VALIDATION_FAIL_ON_DATA_DRIFT_KEY, False)
             )
 
             return data_validation_config
@@ -235,9 +287,15 @@ class Configuration:
 
             base_accuracy = model_trainer_config_info[MODEL_TRAINER_BASE_ACCURACY_KEY]
 
+            incremental_estimators = model_trainer_config_info.get(MODEL_TRAINER_INCREMENTAL_ESTIMATORS_KEY,
+                                                                   DEFAULT_INCREMENTAL_ESTIMATORS)
+
             model_trainer_config = ModelTrainerConfig(trained_model_file_path=trained_model_file_path,
                                                       base_accuracy=base_accuracy,
-                                                      model_config_file_path=model_config_file_path)
+                                                      model_config_file_path=model_config_file_path,
+                                                      incremental_estimators=incremental_estimators,
+                                                      model_file_format=model_trainer_config_info.get(
+                                                          MODEL_TRAINER_MODEL_FILE_FORMAT_KEY, PICKLE_OBJECT_FORMAT))
 
             logging.info(f"Model Trainer Config {model_trainer_config}")
 
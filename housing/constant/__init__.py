@@ -16,25 +16,51 @@ CONFIG_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, CONFIG_FILE_NAME)
 TRAINING_PIPELINE_CONFIG_KEY = 'training_pipeline_config'
 TRAINING_PIPELINE_NAME_KEY = 'pipeline_name'
 TRAINING_PIPELINE_ARTIFACT_DIR_KEY = 'artifact_dir'
+TRAINING_PIPELINE_ARTIFACT_CACHE_KEY = 'artifact_cache'
+ARTIFACT_CACHE_DIR_NAME = 'cache'
+TRAINING_PIPELINE_IN_MEMORY_HANDOFF_KEY = 'in_memory_handoff'
+TRAINING_PIPELINE_INCREMENTAL_TRAINING_KEY = 'incremental_training'
+INCREMENTAL_STATE_DIR_NAME = 'incremental'
+INCREMENTAL_STATE_FILE_NAME = 'state.yaml'
+TRAINING_PIPELINE_MAX_CONCURRENT_JOBS_KEY = 'max_concurrent_jobs'
+TRAINING_PIPELINE_TRACE_MEMORY_KEY = 'trace_memory'
+JOB_QUEUE_DIR_NAME = 'job_queue'
+JOB_QUEUE_FILE_NAME = 'jobs.db'
 
 
 # Data Ingestion Config Constants
 DATA_INGESTION_ARTIFACT_DIR_NAME = 'data_ingestion'
 DATA_INGESTION_CONFIG_KEY = 'data_ingestion_config'
 DATA_INGESTION_DOWNLOAD_URL_KEY = 'dataset_download_url'
+DATA_INGESTION_DATASET_SHA256_KEY = 'dataset_sha256'
+DATA_INGESTION_DOWNLOAD_WORKERS_KEY = 'download_workers'
+DEFAULT_DOWNLOAD_WORKERS = 4
 DATA_INGESTION_RAW_DATA_DIR_KEY = 'raw_data_dir'
 DATA_INGESTION_TGZ_DOWNLOAD_DIR_KEY = 'tgz_download_dir'
 DATA_INGESTION_INGESTED_DIR_KEY = "ingested_dir"
 DATA_INGESTION_INGESTED_TRAIN_DIR_KEY = "ingested_train_dir"
 DATA_INGESTION_INGESTED_TEST_DIR_KEY = "ingested_test_dir"
+DATA_INGESTION_INGESTED_FILE_FORMAT_KEY = "ingested_file_format"
+DEFAULT_INGESTED_FILE_FORMAT = "csv"
+DATA_INGESTION_STREAMING_CHUNK_SIZE_KEY = "streaming_chunk_size"
+INCOME_CATEGORY_BINS = [0.0, 1.5, 3.0, 4.5, 6.0, float("inf")]
+TEST_SPLIT_RATIO = 0.2
 
 # Data Validation Config Constant
 DATA_VALIDATION_ARTIFACT_DIR_NAME = 'data_validation'
+SCHEMA_VALIDATION_REPORT_FILE_NAME = 'schema_report.json'
+DRIFT_REFERENCE_PROFILE_FILE_NAME = 'reference_profile.json'
 DATA_VALIDATION_SCHEMA_FILE_NAME_KEY = 'schema_file_name'
 DATA_VALIDATION_CONFIG_KEY = 'data_validation_config'
 DATA_VALIDATION_SCHEMA_DIR_KEY = 'schema_dir'
 DATA_VALIDATION_REPORT_FILE_NAME_KEY = 'report_file_name'
 DATA_VALIDATION_REPORT_PAGE_FILE_NAME_KEY = 'report_page_file_name'
+DATA_VALIDATION_SAVE_REPORT_PAGE_KEY = 'save_report_page'
+DATA_VALIDATION_DRIFT_BIN_COUNT_KEY = 'drift_bin_count'
+DATA_VALIDATION_DRIFT_P_VALUE_THRESHOLD_KEY = 'drift_p_value_threshold'
+DATA_VALIDATION_DRIFT_PSI_THRESHOLD_KEY = 'drift_psi_threshold'
+DATA_VALIDATION_DRIFT_SHARE_THRESHOLD_KEY = 'drift_share_threshold'
+DATA_VALIDATION_FAIL_ON_DATA_DRIFT_KEY = 'fail_on_data_drift'
 
 
 # Data Transformation Config Constant
@@ -47,6 +73,8 @@ DATA_TRANSFORMATION_TRANSFORMED_TRAIN_DIR_KEY = "transformed_train_dir"
 DATA_TRANSFORMATION_TRANSFORMED_TEST_DIR_KEY = "transformed_test_dir"
 DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY = "preprocessing_dir"
 DATA_TRANSFORMATION_PREPROCESSED_FILE_NAME_KEY = "preprocessed_object_file_name"
+COMPILED_PREPROCESSING_PARITY_SAMPLE_SIZE = 100
+COMPILED_PREPROCESSING_PARITY_TOLERANCE = 1e-9
 
 
 COLUMN_TOTAL_ROOMS = "total_rooms"
@@ -56,6 +84,11 @@ COLUMN_TOTAL_BEDROOM = "total_bedrooms"
 DATASET_SCHEMA_COLUMNS_KEY = "columns"
 NUMERICAL_COLUMN_KEY = "numerical_columns"
 CATEGORICAL_COLUMN_KEY = "categorical_columns"
+DOMAIN_VALUE_KEY = "domain_value"
+NUMERICAL_RANGE_KEY = "numerical_range"
+RANGE_MIN_KEY = "min"
+RANGE_MAX_KEY = "max"
+MAX_NULL_RATE_KEY = "max_null_rate"
 
 
 TARGET_COLUMN_KEY = "target_column"
@@ -71,6 +104,9 @@ MODEL_TRAINER_BASE_ACCURACY_KEY = "base_accuracy"
 MODEL_TRAINER_DIFF_BETWEEN_TRAIN_TEST_ACCURACY_KEY = "test_train_acc_diff"
 MODEL_TRAINER_MODEL_CONFIG_DIR_KEY = "model_config_dir"
 MODEL_TRAINER_MODEL_CONFIG_FILE_NAME_KEY = "model_config_file_name"
+MODEL_TRAINER_INCREMENTAL_ESTIMATORS_KEY = "incremental_estimators"
+MODEL_TRAINER_MODEL_FILE_FORMAT_KEY = "model_file_format"
+DEFAULT_INCREMENTAL_ESTIMATORS = 20
 
 # Model Evaluation Config Constant
 MODEL_EVALUATION_CONFIG_KEY = "model_evaluation_config"
@@ -81,10 +117,22 @@ MODEL_EVALUATION_ARTIFACT_DIR = "model_evaluation"
 # Model Pusher Config Constant
 MODEL_PUSHER_CONFIG_KEY = "model_pusher_config"
 MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
+MODEL_POINTER_FILE_NAME = "CURRENT"
+MODEL_POINTER_GENERATION_KEY = "generation"
 
 BEST_MODEL_KEY = "best_model"
 HISTORY_KEY = "history"
 MODEL_PATH_KEY = "model_path"
 
+# Object file formats of save_object / load_object
+PICKLE_OBJECT_FORMAT = "pickle"
+JOBLIB_OBJECT_FORMAT = "joblib"
+OBJECT_MANIFEST_HEADER = "# housing object manifest"
+OBJECT_FORMAT_KEY = "object_format"
+OBJECT_DATA_FILE_NAME_KEY = "data_file_name"
+OBJECT_CLASS_KEY = "object_class"
+
 EXPERIMENT_DIR_NAME = "experiment"
+# legacy append-only history, imported once into the experiment store
 EXPERIMENT_FILE_NAME = "experiment.csv"
+EXPERIMENT_STORE_FILE_NAME = "experiment.db"
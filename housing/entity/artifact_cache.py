@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import inspect
+import hashlib
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+from housing.util.util import get_file_hash, read_yaml_file, write_yaml_file_atomically
+
+
+class ArtifactCache:
+
+    def __init__(self, cache_dir: str):
+        """
+        Content addressed index of stage artifacts. Each pipeline stage is identified by a fingerprint
+        of its inputs (input file hashes, relevant config values, hash of the stage's source code) and
+        the artifact it produced is recorded under `<cache_dir>/<stage>/<fingerprint>.yaml`.
+
+        :param cache_dir: directory holding the cache index
+        :type cache_dir: str
+        """
+        try:
+            self.cache_dir = cache_dir
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_code_version(*modules) -> str:
+        """
+        It hashes the source files of `modules`, so editing a stage invalidates its cached artifacts.
+        """
+        try:
+            return "".join(get_file_hash(inspect.getsourcefile(module)) for module in modules)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_fingerprint(fingerprint_inputs: dict) -> str:
+        """
+        It returns the sha256 of the canonical json encoding of `fingerprint_inputs`.
+        """
+        try:
+            encoded_inputs = json.dumps(fingerprint_inputs, sort_keys=True, default=str)
+            return hashlib.sha256(encoded_inputs.encode("utf-8")).hexdigest()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_record_file_path(self, stage_name: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, f"{fingerprint}.yaml")
+
+    def get_artifact(self, stage_name: str, fingerprint: str, artifact_type):
+        """
+        It returns the artifact recorded for `fingerprint`, or None when there is none or when one of
+        the files it points at has since been removed.
+
+        :param stage_name: name of the pipeline stage
+        :param fingerprint: fingerprint of the stage inputs
+        :param artifact_type: namedtuple class of the stage artifact
+        """
+        try:
+            record_file_path = self.get_record_file_path(stage_name, fingerprint)
+            if not os.path.exists(record_file_path):
+                return None
+
+            artifact = artifact_type(**read_yaml_file(file_path=record_file_path))
+            for field_name, value in artifact._asdict().items():
+                if field_name.endswith("_path") and value is not None and not os.path.exists(value):
+                    logging.info(f"Cached {stage_name} artifact is stale, [{value}] is missing")
+                    return None
+
+            logging.info(f"Reusing cached {stage_name} artifact [{fingerprint}]: {artifact}")
+            return artifact
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def save_artifact(self, stage_name: str, fingerprint: str, artifact):
+        try:
+            record_file_path = self.get_record_file_path(stage_name, fingerprint)
+            artifact_content = {key: value.item() if hasattr(value, "item") else value
+                                for key, value in artifact._asdict().items()}
+            write_yaml_file_atomically(file_path=record_file_path, data=artifact_content)
+            logging.info(f"Cached {stage_name} artifact [{fingerprint}]")
+        except Exception as e:
+            raise HousingException(e, sys) from e
@@ -3,15 +3,17 @@ from collections import namedtuple
 
 DataIngestionArtifact = namedtuple('DataIngestionArtifact',
                                    ["train_file_path", "test_file_path",
-                                       "is_ingested", "message"])
+                                       "is_ingested", "message", "raw_row_count"])
 
 DataValidationArtifact = namedtuple('DataValidationArtifact',
                                     ['schema_file_path', 'report_file_path',
-                                     'report_page_file_path', 'is_validated', 'message'])
+                                     'report_page_file_path', 'is_validated', 'message',
+                                     'reference_profile_file_path'])
 
 DataTransformationArtifact = namedtuple("DataTransformationArtifact",
                                         ["is_transformed", "message", "transformed_train_file_path",
-                                         "transformed_test_file_path", "preprocessed_object_file_path"])
+                                         "transformed_test_file_path", "preprocessed_object_file_path",
+                                         "transformed_train_target_file_path", "transformed_test_target_file_path"])
 
 ModelTrainerArtifact = namedtuple("ModelTrainerArtifact", ["is_trained", "message",
                                                            "trained_model_file_path",
@@ -24,3 +26,9 @@ ModelEvaluationArtifact = namedtuple("ModelEvaluationArtifact", ["is_model_accep
 
 ModelPusherArtifact = namedtuple("ModelPusherArtifact", ["is_model_pusher",
                                                          "export_model_file_path"])
+
+IncrementalTrainingState = namedtuple("IncrementalTrainingState", ["raw_row_count",
+                                                                   "preprocessed_object_file_path",
+                                                                   "trained_model_file_path",
+                                                                   "train_file_path", "test_file_path",
+                                                                   "train_row_count"])
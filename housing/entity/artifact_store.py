@@ -0,0 +1,54 @@
+import os
+import sys
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+
+
+class ArtifactStore:
+
+    def __init__(self, enabled: bool = True):
+        """
+        In process store of the live objects behind artifact file paths (DataFrames, arrays, fitted
+        preprocessors, models). Stages still persist every artifact to disk, but a downstream stage
+        asking for a path that was produced in the same run gets the object back without a disk
+        round trip. A disabled store always falls through to the loader.
+
+        :param enabled: when False nothing is retained
+        :type enabled: bool
+        """
+        try:
+            self.enabled = enabled
+            self.hits = 0
+            self._objects = dict()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def put(self, file_path: str, obj):
+        """
+        It registers `obj` as the live content of `file_path` and returns it.
+        """
+        if self.enabled:
+            self._objects[os.path.abspath(file_path)] = obj
+        return obj
+
+    def get(self, file_path: str, loader):
+        """
+        It returns the live object of `file_path`, calling `loader()` to read it from disk (and
+        retaining the result) when it is not held yet.
+
+        :param file_path: path of the persisted artifact
+        :param loader: callable reading the artifact from disk
+        """
+        try:
+            key = os.path.abspath(file_path)
+            if key in self._objects:
+                self.hits += 1
+                logging.info(f"Artifact [{file_path}] handed over in memory")
+                return self._objects[key]
+            return self.put(file_path, loader())
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def clear(self):
+        self._objects.clear()
@@ -3,13 +3,20 @@ from collections import namedtuple
 
 DataIngestionConfig = namedtuple("DataIngestionConfig",
                                  ["dataset_download_url",
+                                  "dataset_sha256",
+                                  "download_workers",
                                   "tgz_download_dir",
                                   "raw_data_dir",
                                   "ingested_train_dir",
-                                  "ingested_test_dir"])
+                                  "ingested_test_dir",
+                                  "ingested_file_format",
+                                  "schema_file_path",
+                                  "streaming_chunk_size"])
 
 DataValidationConfig = namedtuple("DataValidationConfig", [
-                                  "schema_file_path", "report_file_path", "report_page_file_path"])
+                                  "schema_file_path", "report_file_path", "report_page_file_path",
+                                  "save_report_page", "drift_bin_count", "drift_p_value_threshold",
+                                  "drift_psi_threshold", "drift_share_threshold", "fail_on_data_drift"])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig",
                                       ["add_bedroom_per_room",
@@ -20,7 +27,9 @@ DataTransformationConfig = namedtuple("DataTransformationConfig",
 ModelTrainerConfig = namedtuple("ModelTrainerConfig",
                                 ["trained_model_file_path",
                                  "base_accuracy",
-                                 "model_config_file_path"])
+                                 "model_config_file_path",
+                                 "incremental_estimators",
+                                 "model_file_format"])
 
 ModelEvaluationConfig = namedtuple("ModelEvaluationConfig",
                                    ["model_evaluation_file_path",
@@ -28,4 +37,7 @@ ModelEvaluationConfig = namedtuple("ModelEvaluationConfig",
 
 ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path"])
 
-TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ['artifact_dir'])
+TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ['artifact_dir', 'artifact_cache_dir',
+                                                               'in_memory_handoff', 'incremental_state_file_path',
+                                                               'job_queue_file_path', 'max_concurrent_jobs',
+                                                               'experiment_store_file_path', 'trace_memory'])
@@ -0,0 +1,200 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from housing.exception.exception import HousingException
+from housing.constant import *
+
+NUMERICAL_FEATURE_TYPE = "numerical"
+CATEGORICAL_FEATURE_TYPE = "categorical"
+DEFAULT_BIN_COUNT = 10
+DEFAULT_P_VALUE_THRESHOLD = 0.05
+DEFAULT_PSI_THRESHOLD = 0.2
+DEFAULT_DRIFT_SHARE_THRESHOLD = 0.5
+# floor of a bin proportion in the PSI, keeps empty bins finite
+PSI_MIN_PROPORTION = 1e-4
+
+
+class DataDriftDetector:
+
+    def __init__(self, dataset_schema: dict, bin_count: int = DEFAULT_BIN_COUNT,
+                 p_value_threshold: float = DEFAULT_P_VALUE_THRESHOLD,
+                 psi_threshold: float = DEFAULT_PSI_THRESHOLD,
+                 drift_share_threshold: float = DEFAULT_DRIFT_SHARE_THRESHOLD):
+        """
+        Native replacement of the evidently data drift profile. A reference dataset is summarised once
+        into a profile of per feature histograms (quantile bins for numerical columns, category counts
+        for categorical ones), and any dataset is compared with it by binning it on the same edges, one
+        vectorized pass per column. Numerical features are compared with the two sample
+        Kolmogorov-Smirnov test on the binned distributions, categorical ones with the chi-square test
+        of homogeneity, and every feature gets its population stability index (PSI).
+
+        A feature drifts when its test p-value is below `p_value_threshold` and its PSI is above
+        `psi_threshold`, i.e. the shift is both significant and material; the dataset drifts when the
+        share of drifted features exceeds `drift_share_threshold`.
+
+        :param dataset_schema: content of config/schema.yaml
+        :param bin_count: number of quantile bins of numerical features
+        :param p_value_threshold: significance level of the per feature tests
+        :param psi_threshold: minimum PSI of a drifted feature
+        :param drift_share_threshold: share of drifted features above which the dataset drifts
+        """
+        try:
+            self.numerical_columns = dataset_schema[NUMERICAL_COLUMN_KEY]
+            self.categorical_columns = dataset_schema[CATEGORICAL_COLUMN_KEY]
+            self.domain_values = dataset_schema.get(DOMAIN_VALUE_KEY, {})
+            self.bin_count = bin_count
+            self.p_value_threshold = p_value_threshold
+            self.psi_threshold = psi_threshold
+            self.drift_share_threshold = drift_share_threshold
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_reference_profile(self, reference_df: pd.DataFrame) -> dict:
+        """
+        It summarises `reference_df` into plain lists, so the profile can be saved as json or yaml and
+        compared with later data without the reference rows.
+        """
+        try:
+            features = {}
+            numerical_values = reference_df[self.numerical_columns].to_numpy(dtype=float)
+            quantiles = np.linspace(0, 1, self.bin_count + 1)[1:-1]
+            bin_edges = np.nanquantile(numerical_values, quantiles, axis=0)
+            for column_index, column in enumerate(self.numerical_columns):
+                feature_profile = {"type": NUMERICAL_FEATURE_TYPE,
+                                   "bin_edges": np.unique(bin_edges[:, column_index]).tolist()}
+                feature_profile["counts"] = self.get_histogram(feature_profile,
+                                                               numerical_values[:, column_index]).tolist()
+                features[column] = feature_profile
+
+            for column in self.categorical_columns:
+                categories = list(dict.fromkeys(list(self.domain_values.get(column, [])) +
+                                                reference_df[column].dropna().unique().tolist()))
+                feature_profile = {"type": CATEGORICAL_FEATURE_TYPE, "categories": [str(c) for c in categories]}
+                feature_profile["counts"] = self.get_histogram(feature_profile,
+                                                               reference_df[column].to_numpy()).tolist()
+                features[column] = feature_profile
+
+            return {"row_count": len(reference_df), "features": features}
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_histogram(feature_profile: dict, values: np.ndarray) -> np.ndarray:
+        """
+        It counts `values` in the bins of `feature_profile`, missing values are left out. Categorical
+        values outside the profile categories are counted in one extra bin.
+        """
+        try:
+            if feature_profile["type"] == NUMERICAL_FEATURE_TYPE:
+                bin_edges = np.asarray(feature_profile["bin_edges"], dtype=float)
+                values = np.asarray(values, dtype=float)
+                values = values[~np.isnan(values)]
+                return np.bincount(np.searchsorted(bin_edges, values, side="right"),
+                                   minlength=len(bin_edges) + 1)
+            categories = feature_profile["categories"]
+            values = pd.Series(values).dropna().astype(str)
+            bin_indices = values.map({category: index for index, category in enumerate(categories)})
+            return np.bincount(bin_indices.fillna(len(categories)).to_numpy(dtype=np.int64),
+                               minlength=len(categories) + 1)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_psi(reference_counts: np.ndarray, current_counts: np.ndarray) -> float:
+        reference_proportions = np.maximum(reference_counts / max(reference_counts.sum(), 1), PSI_MIN_PROPORTION)
+        current_proportions = np.maximum(current_counts / max(current_counts.sum(), 1), PSI_MIN_PROPORTION)
+        return float(np.sum((current_proportions - reference_proportions) *
+                            np.log(current_proportions / reference_proportions)))
+
+    @staticmethod
+    def get_chi_square_test(observed: np.ndarray):
+        """
+        Chi-square test of homogeneity of a contingency table, with Yates' correction for one degree
+        of freedom; the same result as `scipy.stats.chi2_contingency` without importing scipy.stats,
+        which would dominate the import time of the serving path.
+        :return: (chi-square statistic, p-value)
+        """
+        expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / observed.sum()
+        degrees_of_freedom = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+        if degrees_of_freedom == 1:
+            difference = expected - observed
+            observed = observed + np.sign(difference) * np.minimum(0.5, np.abs(difference))
+        chi_square_statistic = float(np.sum((observed - expected) ** 2 / expected))
+        return chi_square_statistic, float(special.chdtrc(degrees_of_freedom, chi_square_statistic))
+
+    def get_feature_drift(self, feature_profile: dict, current_counts: np.ndarray) -> dict:
+        """
+        It compares the histogram `current_counts` of one feature with its reference histogram.
+        """
+        try:
+            reference_counts = np.asarray(feature_profile["counts"], dtype=float)
+            current_counts = np.asarray(current_counts, dtype=float)
+            reference_size, current_size = reference_counts.sum(), current_counts.sum()
+
+            feature_drift = {"type": feature_profile["type"]}
+            if reference_size == 0 or current_size == 0:
+                p_value, psi = 1.0, 0.0
+            elif feature_profile["type"] == NUMERICAL_FEATURE_TYPE:
+                ks_statistic = float(np.max(np.abs(np.cumsum(reference_counts) / reference_size -
+                                                   np.cumsum(current_counts) / current_size)))
+                effective_size = reference_size * current_size / (reference_size + current_size)
+                p_value = float(special.kolmogorov(np.sqrt(effective_size) * ks_statistic))
+                feature_drift["ks_statistic"] = ks_statistic
+            else:
+                observed_bins = (reference_counts + current_counts) > 0
+                if observed_bins.sum() < 2:
+                    chi_square_statistic, p_value = 0.0, 1.0
+                else:
+                    chi_square_statistic, p_value = self.get_chi_square_test(
+                        np.vstack([reference_counts[observed_bins], current_counts[observed_bins]]))
+                feature_drift["chi_square_statistic"] = float(chi_square_statistic)
+            if reference_size > 0 and current_size > 0:
+                psi = self.get_psi(reference_counts, current_counts)
+            feature_drift.update({"p_value": float(p_value),
+                                  "psi": psi,
+                                  "drift_detected": bool(p_value < self.p_value_threshold and
+                                                         psi > self.psi_threshold)})
+            return feature_drift
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_drift_report_from_histograms(self, reference_profile: dict, current_histograms: dict,
+                                         current_row_count: int) -> dict:
+        """
+        It builds the drift report out of the current histogram of every profiled feature.
+        """
+        try:
+            features = {column: self.get_feature_drift(feature_profile, current_histograms[column])
+                        for column, feature_profile in reference_profile["features"].items()}
+            drifted_feature_count = sum(feature["drift_detected"] for feature in features.values())
+            drift_share = drifted_feature_count / len(features) if features else 0.0
+            return {
+                "dataset_drift": bool(drift_share > self.drift_share_threshold),
+                "drift_share": drift_share,
+                "number_of_features": len(features),
+                "number_of_drifted_features": drifted_feature_count,
+                "reference_row_count": reference_profile["row_count"],
+                "current_row_count": current_row_count,
+                "p_value_threshold": self.p_value_threshold,
+                "psi_threshold": self.psi_threshold,
+                "drift_share_threshold": self.drift_share_threshold,
+                "features": features,
+            }
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_drift_report(self, reference_profile: dict, current_df: pd.DataFrame) -> dict:
+        """
+        It compares `current_df` with the reference profile and returns the json serialisable report.
+        """
+        try:
+            current_histograms = {column: self.get_histogram(feature_profile, current_df[column].to_numpy())
+                                  for column, feature_profile in reference_profile["features"].items()}
+            return self.get_drift_report_from_histograms(reference_profile=reference_profile,
+                                                         current_histograms=current_histograms,
+                                                         current_row_count=len(current_df))
+        except Exception as e:
+            raise HousingException(e, sys) from e
@@ -0,0 +1,252 @@
+import os
+import sys
+import shutil
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+from housing.util.util import get_file_hash, read_yaml_file, write_yaml_file
+
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+REQUEST_TIMEOUT_SECONDS = 60
+PARTIAL_FILE_SUFFIX = ".part"
+# remote file identity the range files of an interrupted download were fetched from, and that the
+# cached archive was downloaded from
+PART_INFO_FILE_SUFFIX = ".yaml"
+ARCHIVE_INFO_FILE_SUFFIX = ".yaml"
+
+
+class DatasetDownloader:
+
+    def __init__(self, download_dir: str, download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+                 part_size: int = DEFAULT_PART_SIZE):
+        """
+        Downloads dataset archives into a directory shared by all pipeline runs.
+
+        Servers accepting byte ranges are fetched in `part_size` ranges by `download_workers` threads,
+        each range kept in its own `.part<index>` file so an interrupted download resumes where every
+        range stopped. The ETag, length and range size of the remote file are kept next to the range
+        files, which are discarded when the remote file or the range size changed, or when the server
+        sends no ETag to tell. Archives are verified against their expected sha256 and extracted once
+        per content hash. Without an expected sha256 the cached archive is reused while the server
+        still reports the strong ETag and length it was downloaded with, and its content still hashes
+        to the sha256 recorded then.
+
+        :param download_dir: directory holding downloaded archives
+        :type download_dir: str
+        :param download_workers: number of ranges fetched concurrently
+        :type download_workers: int
+        :param part_size: size in bytes of one range
+        :type part_size: int
+        """
+        try:
+            self.download_dir = download_dir
+            self.download_workers = max(1, download_workers)
+            self.part_size = part_size
+            os.makedirs(download_dir, exist_ok=True)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_remote_file_info(self, url: str):
+        """
+        It returns the url after redirects, the content length (None when unknown), whether the
+        server accepts byte ranges and the ETag (None when not sent).
+        """
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=REQUEST_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            content_length = response.headers.get("Content-Length")
+            accepts_ranges = response.headers.get("Accept-Ranges", "none").lower() == "bytes"
+            return response.url, int(content_length) if content_length is not None else None, accepts_ranges, \
+                response.headers.get("ETag")
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def download_range(self, url: str, part_file_path: str, start: int, end: int, etag: str = None):
+        """
+        It fetches bytes `start` to `end` (inclusive) of `url` into `part_file_path`, resuming after
+        the bytes already in the file. With a strong `etag` the server sends the whole file instead of
+        the range when the file changed meanwhile, which fails the download.
+        """
+        try:
+            downloaded_size = os.path.getsize(part_file_path) if os.path.exists(part_file_path) else 0
+            if start + downloaded_size > end:
+                return
+            headers = {"Range": f"bytes={start + downloaded_size}-{end}"}
+            if etag is not None and not etag.startswith("W/"):
+                headers["If-Range"] = etag
+            with requests.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise Exception(f"Server ignored range request for [{url}]")
+                with open(part_file_path, "ab") as part_file:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        part_file.write(chunk)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_part_file_paths(self, partial_file_path: str) -> list:
+        """
+        It returns the range files of `partial_file_path` left in the download directory.
+        """
+        try:
+            part_file_prefix = os.path.basename(partial_file_path)
+            return [os.path.join(self.download_dir, file_name) for file_name in os.listdir(self.download_dir)
+                    if file_name.startswith(part_file_prefix) and file_name[len(part_file_prefix):].isdigit()]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def prepare_part_files(self, partial_file_path: str, part_info: dict):
+        """
+        It keeps the range files of an interrupted download only when they were fetched from the same
+        remote file, by ETag and length, with the same range size, and records `part_info` for them.
+        """
+        try:
+            part_info_file_path = f"{partial_file_path}{PART_INFO_FILE_SUFFIX}"
+            previous_part_info = read_yaml_file(part_info_file_path) if os.path.exists(part_info_file_path) else None
+            if previous_part_info != part_info or part_info["etag"] is None:
+                part_file_paths = self.get_part_file_paths(partial_file_path)
+                if part_file_paths:
+                    logging.info(f"Discarding {len(part_file_paths)} range files of [{partial_file_path}], "
+                                 f"fetched from {previous_part_info}, the remote file is now {part_info}")
+                for part_file_path in part_file_paths:
+                    os.remove(part_file_path)
+            write_yaml_file(file_path=part_info_file_path, data=part_info)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def download_in_ranges(self, url: str, partial_file_path: str, content_length: int, etag: str = None):
+        try:
+            ranges = [(start, min(start + self.part_size, content_length) - 1)
+                      for start in range(0, content_length, self.part_size)]
+            part_file_paths = [f"{partial_file_path}{index}" for index in range(len(ranges))]
+            logging.info(f"Downloading {content_length} bytes in {len(ranges)} ranges "
+                         f"with {self.download_workers} workers")
+            self.prepare_part_files(partial_file_path=partial_file_path,
+                                    part_info={"etag": etag, "content_length": content_length,
+                                               "part_size": self.part_size})
+
+            with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+                futures = [executor.submit(self.download_range, url, part_file_path, start, end, etag)
+                           for part_file_path, (start, end) in zip(part_file_paths, ranges)]
+                for future in futures:
+                    future.result()
+
+            with open(partial_file_path, "wb") as partial_file:
+                for part_file_path in part_file_paths:
+                    with open(part_file_path, "rb") as part_file:
+                        shutil.copyfileobj(part_file, partial_file)
+            for part_file_path in part_file_paths:
+                os.remove(part_file_path)
+            os.remove(f"{partial_file_path}{PART_INFO_FILE_SUFFIX}")
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def download_in_one_request(self, url: str, partial_file_path: str):
+        try:
+            with requests.get(url, stream=True, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+                response.raise_for_status()
+                with open(partial_file_path, "wb") as partial_file:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        partial_file.write(chunk)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_archive_info(etag: str, content_length: int, sha256: str) -> dict:
+        return {"etag": etag, "content_length": content_length, "sha256": sha256}
+
+    def is_cached_archive_current(self, file_path: str, etag: str, content_length: int) -> bool:
+        """
+        It tells whether the cached archive `file_path` was downloaded from the remote file the server
+        now reports, by strong ETag and length, and is intact, by the sha256 recorded after download.
+        """
+        try:
+            archive_info_file_path = f"{file_path}{ARCHIVE_INFO_FILE_SUFFIX}"
+            if etag is None or etag.startswith("W/") or not os.path.exists(file_path) or \
+                    not os.path.exists(archive_info_file_path):
+                return False
+            archive_info = read_yaml_file(archive_info_file_path)
+            return archive_info == self.get_archive_info(etag=etag, content_length=content_length,
+                                                          sha256=archive_info.get("sha256")) and \
+                get_file_hash(file_path) == archive_info["sha256"]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def download(self, url: str, sha256: str = None) -> str:
+        """
+        It returns the cached archive of `url`, downloading it unless the cached copy matches `sha256`.
+        Without `sha256` the cached copy is reused while the server reports the same strong ETag and
+        length it was downloaded with, otherwise the archive is fetched again.
+
+        :param url: archive url
+        :param sha256: expected sha256 hex digest of the archive
+        :return: path of the verified archive in the download directory
+        """
+        try:
+            file_path = os.path.join(self.download_dir, os.path.basename(url))
+            if sha256 is not None and os.path.exists(file_path) and get_file_hash(file_path) == sha256:
+                logging.info(f"Cached archive [{file_path}] matches sha256, skipping download")
+                return file_path
+
+            download_url, content_length, accepts_ranges, etag = self.get_remote_file_info(url)
+            if sha256 is None and self.is_cached_archive_current(file_path=file_path, etag=etag,
+                                                                 content_length=content_length):
+                logging.info(f"Cached archive [{file_path}] matches ETag {etag}, skipping download")
+                return file_path
+
+            partial_file_path = f"{file_path}{PARTIAL_FILE_SUFFIX}"
+            if accepts_ranges and content_length:
+                self.download_in_ranges(url=download_url, partial_file_path=partial_file_path,
+                                        content_length=content_length, etag=etag)
+            else:
+                logging.info(f"[{download_url}] does not accept ranges, downloading in one request")
+                self.download_in_one_request(url=download_url, partial_file_path=partial_file_path)
+
+            downloaded_sha256 = get_file_hash(partial_file_path)
+            if sha256 is not None and downloaded_sha256 != sha256:
+                os.remove(partial_file_path)
+                raise Exception(f"Checksum mismatch for [{url}]: expected {sha256}, got {downloaded_sha256}")
+
+            os.replace(partial_file_path, file_path)
+            write_yaml_file(file_path=f"{file_path}{ARCHIVE_INFO_FILE_SUFFIX}",
+                            data=self.get_archive_info(etag=etag, content_length=content_length,
+                                                       sha256=downloaded_sha256))
+            logging.info(f"File :[{file_path}] has been downloaded successfully.")
+            return file_path
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def extract(tgz_file_path: str, extract_dir: str) -> str:
+        """
+        It returns the directory holding the extracted content of `tgz_file_path`. Every archive
+        content is extracted once, into a sub directory of `extract_dir` named after its sha256; the
+        directory is moved in place only once extraction finished, so an interrupted run never leaves
+        a partial copy behind.
+        """
+        try:
+            extracted_dir = os.path.join(extract_dir, get_file_hash(tgz_file_path)[:16])
+            if os.path.exists(extracted_dir):
+                logging.info(f"Reusing extracted archive [{extracted_dir}]")
+                return extracted_dir
+
+            logging.info(f"""
+            --> Extracting Data from tgz file :  [{tgz_file_path}]
+            --> to raw data dir : [{extracted_dir}]
+            """)
+            partial_extracted_dir = f"{extracted_dir}{PARTIAL_FILE_SUFFIX}"
+            if os.path.exists(partial_extracted_dir):
+                shutil.rmtree(partial_extracted_dir)
+            os.makedirs(partial_extracted_dir)
+            with tarfile.open(tgz_file_path) as housing_tgz_file_obj:
+                housing_tgz_file_obj.extractall(path=partial_extracted_dir)
+            os.replace(partial_extracted_dir, extracted_dir)
+            return extracted_dir
+        except Exception as e:
+            raise HousingException(e, sys) from e
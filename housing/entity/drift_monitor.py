@@ -0,0 +1,131 @@
+import sys
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+
+from housing.exception.exception import HousingException
+from housing.entity.data_drift import DataDriftDetector, NUMERICAL_FEATURE_TYPE
+
+DEFAULT_DRIFT_WINDOW_SIZE = 1000
+
+
+class DriftMonitor:
+
+    def __init__(self, data_drift_detector: DataDriftDetector, reference_profile: dict,
+                 window_size: int = DEFAULT_DRIFT_WINDOW_SIZE):
+        """
+        Sliding window histograms of live prediction inputs, kept on the bins of the reference profile
+        saved with the serving model. The bin index of every feature of the last `window_size` records
+        is kept in a ring buffer next to the running counts, so observing a record costs one bin
+        lookup per feature plus decrementing the bins of the record it evicts, whatever the window
+        size. Drift scores are only computed when a report is asked for.
+
+        :param data_drift_detector: detector holding the drift thresholds
+        :type data_drift_detector: DataDriftDetector
+        :param reference_profile: profile returned by `DataDriftDetector.get_reference_profile`
+        :type reference_profile: dict
+        :param window_size: number of most recent records the histograms are computed over
+        :type window_size: int
+        """
+        try:
+            self.data_drift_detector = data_drift_detector
+            self.reference_profile = reference_profile
+            self.window_size = max(1, window_size)
+            self.columns = list(reference_profile["features"])
+            self.numerical_columns = [column for column in self.columns
+                                      if reference_profile["features"][column]["type"] == NUMERICAL_FEATURE_TYPE]
+            self.bin_edges = {column: list(reference_profile["features"][column]["bin_edges"])
+                              for column in self.numerical_columns}
+            self.category_indices = {column: {category: index for index, category
+                                              in enumerate(reference_profile["features"][column]["categories"])}
+                                     for column in self.columns if column not in self.bin_edges}
+            self.bin_counts = [len(reference_profile["features"][column]["counts"]) for column in self.columns]
+            # one extra slot per feature counts missing values, it is left out of the histograms
+            self.missing_bin = max(self.bin_counts)
+            self.counts = np.zeros((len(self.columns), self.missing_bin + 1), dtype=np.int64)
+            self.window = np.full((self.window_size, len(self.columns)), self.missing_bin, dtype=np.int64)
+            self.feature_indices = np.arange(len(self.columns))
+            self.position = 0
+            self.observed_count = 0
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_record_bins(self, record: dict) -> np.ndarray:
+        bins = []
+        for column in self.columns:
+            value = record.get(column)
+            if value is None or (isinstance(value, float) and value != value):
+                bins.append(self.missing_bin)
+            elif column in self.bin_edges:
+                bins.append(bisect.bisect_right(self.bin_edges[column], float(value)))
+            else:
+                category_indices = self.category_indices[column]
+                bins.append(category_indices.get(str(value), len(category_indices)))
+        return np.array([bins], dtype=np.int64)
+
+    def get_dataframe_bins(self, dataframe: pd.DataFrame) -> np.ndarray:
+        bins = np.empty((len(dataframe), len(self.columns)), dtype=np.int64)
+        for column_index, column in enumerate(self.columns):
+            values = dataframe[column]
+            if column in self.bin_edges:
+                values = values.to_numpy(dtype=float)
+                column_bins = np.searchsorted(self.bin_edges[column], values, side="right")
+            else:
+                category_indices = self.category_indices[column]
+                column_bins = values.astype(str).map(category_indices).fillna(len(category_indices)).to_numpy()
+            bins[:, column_index] = np.where(pd.isna(values), self.missing_bin, column_bins)
+        return bins
+
+    def update(self, bins: np.ndarray):
+        """
+        It pushes rows of bin indices into the window, evicting the oldest rows once it is full.
+        """
+        try:
+            bins = bins[-self.window_size:]
+            with self._lock:
+                positions = (self.position + np.arange(len(bins))) % self.window_size
+                evicted_bins = self.window[positions]
+                np.subtract.at(self.counts, (self.feature_indices, evicted_bins), 1)
+                np.add.at(self.counts, (self.feature_indices, bins), 1)
+                self.window[positions] = bins
+                self.position = (self.position + len(bins)) % self.window_size
+                self.observed_count += len(bins)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def observe_record(self, record: dict):
+        try:
+            self.update(self.get_record_bins(record))
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def observe_dataframe(self, dataframe: pd.DataFrame):
+        try:
+            self.update(self.get_dataframe_bins(dataframe))
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_drift_report(self) -> dict:
+        """
+        It compares the current window with the reference profile, see
+        `DataDriftDetector.get_drift_report_from_histograms`.
+        """
+        try:
+            with self._lock:
+                counts = self.counts.copy()
+                row_count = min(self.observed_count, self.window_size)
+                observed_count = self.observed_count
+            current_histograms = {column: counts[column_index, :self.bin_counts[column_index]]
+                                  for column_index, column in enumerate(self.columns)}
+            report = self.data_drift_detector.get_drift_report_from_histograms(
+                reference_profile=self.reference_profile,
+                current_histograms=current_histograms,
+                current_row_count=row_count)
+            report["window_size"] = self.window_size
+            report["observed_row_count"] = observed_count
+            return report
+        except Exception as e:
+            raise HousingException(e, sys) from e
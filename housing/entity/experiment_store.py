@@ -0,0 +1,234 @@
+import os
+import sys
+import sqlite3
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+
+# stages whose duration is recorded with every experiment, in pipeline order
+EXPERIMENT_STAGE_NAMES = ["data_ingestion", "data_validation", "data_transformation", "model_trainer",
+                          "model_evaluation", "model_pusher"]
+EXPERIMENT_COLUMNS = ["experiment_id", "initialization_timestamp", "artifact_time_stamp", "running_status",
+                      "start_time", "stop_time", "execution_time", "message", "experiment_file_path", "accuracy",
+                      "is_model_accepted", "created_time_stamp", "updated_time_stamp"] + \
+    [f"{stage_name}_seconds" for stage_name in EXPERIMENT_STAGE_NAMES]
+STAGE_METRICS_COLUMNS = ["name", "parent", "wall_seconds", "cpu_seconds", "peak_rss_mb", "peak_traced_mb",
+                         "row_count"]
+SQLITE_TIMEOUT_SECONDS = 30
+
+
+class ExperimentStore:
+
+    def __init__(self, db_file_path: str):
+        """
+        Experiment history of the training pipeline in a local SQLite database, one row per experiment.
+        The row of a running experiment is upserted as the run progresses, and the history is read
+        with indexed tail queries, so neither writing nor showing the last runs depends on how many
+        runs were recorded before. The metrics of the stages and candidate searches of an experiment
+        are kept in a second table keyed by experiment.
+
+        :param db_file_path: path of the SQLite database, created on first use
+        :type db_file_path: str
+        """
+        try:
+            self.db_file_path = db_file_path
+            os.makedirs(os.path.dirname(db_file_path), exist_ok=True)
+            stage_columns = "".join(f", {stage_name}_seconds REAL" for stage_name in EXPERIMENT_STAGE_NAMES)
+            with self.connect() as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(f"""
+                    CREATE TABLE IF NOT EXISTS experiments (
+                        experiment_id TEXT PRIMARY KEY,
+                        initialization_timestamp TEXT,
+                        artifact_time_stamp TEXT,
+                        running_status INTEGER,
+                        start_time TEXT,
+                        stop_time TEXT,
+                        execution_time REAL,
+                        message TEXT,
+                        experiment_file_path TEXT,
+                        accuracy REAL,
+                        is_model_accepted INTEGER,
+                        created_time_stamp TEXT NOT NULL,
+                        updated_time_stamp TEXT NOT NULL{stage_columns}
+                    )""")
+                connection.execute("CREATE INDEX IF NOT EXISTS experiments_start_time "
+                                   "ON experiments (start_time)")
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS experiment_stages (
+                        experiment_id TEXT NOT NULL,
+                        stage_index INTEGER NOT NULL,
+                        name TEXT NOT NULL,
+                        parent TEXT,
+                        wall_seconds REAL,
+                        cpu_seconds REAL,
+                        peak_rss_mb REAL,
+                        peak_traced_mb REAL,
+                        row_count INTEGER,
+                        PRIMARY KEY (experiment_id, stage_index)
+                    )""")
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @contextmanager
+    def connect(self):
+        """
+        It yields a connection in autocommit mode and closes it.
+        """
+        connection = sqlite3.connect(self.db_file_path, timeout=SQLITE_TIMEOUT_SECONDS, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def to_column_value(value):
+        if isinstance(value, datetime):
+            return value.isoformat(sep=" ")
+        if isinstance(value, timedelta):
+            return value.total_seconds()
+        if isinstance(value, bool):
+            return int(value)
+        if hasattr(value, "item"):
+            # numpy scalars
+            return value.item()
+        return value
+
+    def save_experiment(self, experiment, stage_durations: dict = None):
+        """
+        It inserts the experiment, or updates its row when it was saved before.
+
+        :param experiment: Experiment namedtuple of the pipeline
+        :param stage_durations: seconds spent in each of `EXPERIMENT_STAGE_NAMES` so far
+        :type stage_durations: dict
+        """
+        try:
+            now = datetime.now().isoformat(sep=" ")
+            row = {key: self.to_column_value(value) for key, value in experiment._asdict().items()
+                   if key in EXPERIMENT_COLUMNS}
+            if row.get("experiment_file_path") is not None:
+                row["experiment_file_path"] = os.path.basename(row["experiment_file_path"])
+            for stage_name, seconds in (stage_durations or {}).items():
+                if stage_name in EXPERIMENT_STAGE_NAMES:
+                    row[f"{stage_name}_seconds"] = float(seconds)
+            row["created_time_stamp"] = now
+            row["updated_time_stamp"] = now
+
+            columns = list(row)
+            updated_columns = [column for column in columns
+                               if column not in ("experiment_id", "created_time_stamp")]
+            with self.connect() as connection:
+                connection.execute(
+                    f"INSERT INTO experiments ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                    f"ON CONFLICT (experiment_id) DO UPDATE SET "
+                    f"{', '.join(f'{column} = excluded.{column}' for column in updated_columns)}",
+                    [row[column] for column in columns])
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def save_stage_metrics(self, experiment_id: str, stage_metrics: list):
+        """
+        It replaces the stage metrics recorded for the experiment.
+
+        :param stage_metrics: StageMetrics namedtuples in the order they were recorded
+        :type stage_metrics: list
+        """
+        try:
+            with self.connect() as connection:
+                connection.execute("BEGIN")
+                try:
+                    connection.execute("DELETE FROM experiment_stages WHERE experiment_id = ?", (experiment_id,))
+                    connection.executemany(
+                        f"INSERT INTO experiment_stages (experiment_id, stage_index, {', '.join(STAGE_METRICS_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * (len(STAGE_METRICS_COLUMNS) + 2))})",
+                        [[experiment_id, stage_index] + [self.to_column_value(getattr(metrics, column))
+                                                         for column in STAGE_METRICS_COLUMNS]
+                         for stage_index, metrics in enumerate(stage_metrics)])
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_stage_metrics(self, experiment_id: str) -> list:
+        """
+        :return: the stage metrics of the experiment as dicts, in the order they were recorded
+        """
+        try:
+            with self.connect() as connection:
+                rows = connection.execute(f"SELECT {', '.join(STAGE_METRICS_COLUMNS)} FROM experiment_stages "
+                                          f"WHERE experiment_id = ? ORDER BY stage_index", (experiment_id,)).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_experiment(self, experiment_id: str) -> dict:
+        """
+        :return: the experiment row as a dict, None when there is no such experiment
+        """
+        try:
+            with self.connect() as connection:
+                row = connection.execute(f"SELECT {', '.join(EXPERIMENT_COLUMNS)} FROM experiments "
+                                         f"WHERE experiment_id = ?", (experiment_id,)).fetchone()
+            return dict(row) if row is not None else None
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_experiments(self, limit: int = 5) -> list:
+        """
+        It returns the `limit` most recently started experiments, oldest first, read backwards from
+        the start time index.
+
+        :return: list of experiment rows as dicts
+        """
+        try:
+            with self.connect() as connection:
+                rows = connection.execute(f"SELECT {', '.join(EXPERIMENT_COLUMNS)} FROM experiments "
+                                          f"ORDER BY start_time DESC, rowid DESC LIMIT ?", (int(limit),)).fetchall()
+            return [dict(row) for row in reversed(rows)]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_experiment_count(self) -> int:
+        try:
+            with self.connect() as connection:
+                return connection.execute("SELECT COUNT(*) FROM experiments").fetchone()[0]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def import_experiment_csv(self, csv_file_path: str) -> int:
+        """
+        It imports the history of the experiment.csv file the pipeline used to append to. The file
+        holds a start and a stop row per run, the last row of each experiment wins.
+
+        :return: number of imported experiments
+        """
+        try:
+            import pandas as pd
+
+            experiment_df = pd.read_csv(csv_file_path)
+            if "execution_time" in experiment_df:
+                experiment_df["execution_time"] = pd.to_timedelta(
+                    experiment_df["execution_time"], errors="coerce").dt.total_seconds()
+            experiment_df = experiment_df.drop_duplicates(subset="experiment_id", keep="last")
+            experiment_df = experiment_df.astype(object).where(experiment_df.notna(), None)
+            if "created_time_stamp" not in experiment_df:
+                experiment_df["created_time_stamp"] = datetime.now().isoformat(sep=" ")
+            experiment_df["updated_time_stamp"] = experiment_df["created_time_stamp"]
+            columns = [column for column in EXPERIMENT_COLUMNS if column in experiment_df]
+            with self.connect() as connection:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    f"INSERT OR IGNORE INTO experiments ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    [[self.to_column_value(value) for value in row]
+                     for row in experiment_df[columns].itertuples(index=False)])
+                connection.execute("COMMIT")
+            logging.info(f"Imported {len(experiment_df)} experiments from [{csv_file_path}]")
+            return len(experiment_df)
+        except Exception as e:
+            raise HousingException(e, sys) from e
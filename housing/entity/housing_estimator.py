@@ -0,0 +1,287 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
+
+from housing.constant import COLUMN_TOTAL_ROOMS, COLUMN_POPULATION, COLUMN_HOUSEHOLDS, COLUMN_TOTAL_BEDROOM
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+
+# The classes pickled into saved models. They live apart from the training components so that
+# unpickling a model, and therefore serving, only imports this module and what the pickled sklearn
+# objects need; housing.component.data_transformation and housing.component.model_trainer re-export
+# them for models saved before the move.
+
+
+class FeatureGenerator(BaseEstimator, TransformerMixin):
+
+    def __init__(self, add_bedrooms_per_room=True,
+                 total_rooms_ix=3,
+                 population_ix=5,
+                 households_ix=6,
+                 total_bedrooms_ix=4, columns=None):
+        """
+        FeatureGenerator Initialization
+        add_bedrooms_per_room: bool
+        total_rooms_ix: int index number of total rooms columns
+        population_ix: int index number of total population columns
+        households_ix: int index number of  households columns
+        total_bedrooms_ix: int index number of bedrooms columns
+        """
+        try:
+            self.columns = columns
+            if self.columns is not None:
+                total_rooms_ix = self.columns.index(COLUMN_TOTAL_ROOMS)
+                population_ix = self.columns.index(COLUMN_POPULATION)
+                households_ix = self.columns.index(COLUMN_HOUSEHOLDS)
+                total_bedrooms_ix = self.columns.index(COLUMN_TOTAL_BEDROOM)
+
+            self.add_bedrooms_per_room = add_bedrooms_per_room
+            self.total_rooms_ix = total_rooms_ix
+            self.population_ix = population_ix
+            self.households_ix = households_ix
+            self.total_bedrooms_ix = total_bedrooms_ix
+
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def fit(self, X, y=None):
+        """
+        The fit function is used to fit the data into the model
+
+        :param X: A numpy array or sparse matrix of shape [n_samples, n_features]
+        :param y: the target variable
+        :return: The fit method returns the instance of the class.
+        """
+        return self
+
+    def transform(self, X, y=None):
+        """
+        It takes the total number of rooms in a district, divides it by the number of households, and
+        adds this value to the data as a new attribute
+
+        :param X: The input data
+        :param y: The target variable
+        :return: The generated feature is being returned.
+        """
+        try:
+            room_per_household = X[:, self.total_rooms_ix] / \
+                X[:, self.households_ix]
+
+            population_per_household = X[:,
+                                         self.population_ix] / X[:, self.households_ix]
+
+            if self.add_bedrooms_per_room:
+                bedrooms_per_room = X[:, self.total_bedrooms_ix] / \
+                    X[:, self.total_rooms_ix]
+
+                generated_feature = np.c_[
+                    X, room_per_household, population_per_household, bedrooms_per_room]
+
+            else:
+                generated_feature = np.c_[
+                    X, room_per_household, population_per_household]
+
+            return generated_feature
+
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+
+class CompiledPreprocessor:
+
+    def __init__(self, preprocessing_object: ColumnTransformer):
+        """
+        Flattens the fitted ColumnTransformer built by `DataTransformation.get_data_transformer_object`
+        into plain NumPy arrays (impute statistics, generated feature indices, scaler means and scales,
+        one hot category tables) so a single record can be transformed without sklearn or pandas.
+
+        :param preprocessing_object: fitted preprocessing object
+        :type preprocessing_object: ColumnTransformer
+        """
+        try:
+            fitted_transformers = {name: (transformer, list(columns))
+                                   for name, transformer, columns in preprocessing_object.transformers_}
+
+            num_pipeline, self.numerical_columns = fitted_transformers['num_pipeline']
+            feature_generator = num_pipeline.named_steps['feature_generator']
+            num_scaler = num_pipeline.named_steps['scaler']
+            self.numerical_impute_values = num_pipeline.named_steps['impute'].statistics_.astype(float)
+            self.add_bedrooms_per_room = feature_generator.add_bedrooms_per_room
+            self.total_rooms_ix = feature_generator.total_rooms_ix
+            self.population_ix = feature_generator.population_ix
+            self.households_ix = feature_generator.households_ix
+            self.total_bedrooms_ix = feature_generator.total_bedrooms_ix
+            self.numerical_mean = num_scaler.mean_ if num_scaler.with_mean else \
+                np.zeros_like(num_scaler.scale_)
+            self.numerical_scale = num_scaler.scale_
+
+            cat_pipeline, self.categorical_columns = fitted_transformers['cat_pipeline']
+            cat_scaler = cat_pipeline.named_steps['scaler']
+            self.categorical_impute_values = list(cat_pipeline.named_steps['impute'].statistics_)
+            self.categories = [dict((category, index) for index, category in enumerate(categories))
+                               for categories in cat_pipeline.named_steps['one_hot_encoder'].categories_]
+            self.categorical_mean = cat_scaler.mean_ if cat_scaler.with_mean else \
+                np.zeros_like(cat_scaler.scale_)
+            self.categorical_scale = cat_scaler.scale_
+
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def transform_record(self, record: dict) -> np.ndarray:
+        """
+        It transforms one record, a dict of column name to raw value, exactly like the sklearn
+        preprocessing object would transform the equivalent one row DataFrame.
+
+        :param record: dict of input column name to scalar value
+        :return: feature array of shape (1, n_features)
+        """
+        try:
+            X = np.array([record[column] for column in self.numerical_columns], dtype=float)
+            X = np.where(np.isnan(X), self.numerical_impute_values, X)
+
+            generated_feature = [X[self.total_rooms_ix] / X[self.households_ix],
+                                 X[self.population_ix] / X[self.households_ix]]
+            if self.add_bedrooms_per_room:
+                generated_feature.append(X[self.total_bedrooms_ix] / X[self.total_rooms_ix])
+            numerical_feature = (np.r_[X, generated_feature] - self.numerical_mean) / self.numerical_scale
+
+            one_hot_feature = []
+            for column, impute_value, categories in zip(self.categorical_columns,
+                                                        self.categorical_impute_values,
+                                                        self.categories):
+                value = record[column]
+                if value is None or (isinstance(value, float) and np.isnan(value)):
+                    value = impute_value
+                one_hot = np.zeros(len(categories))
+                one_hot[categories[value]] = 1.0
+                one_hot_feature.append(one_hot)
+            categorical_feature = (np.concatenate(one_hot_feature) - self.categorical_mean) / \
+                self.categorical_scale
+
+            return np.r_[numerical_feature, categorical_feature].reshape(1, -1)
+
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def get_parity_error(self, preprocessing_object: ColumnTransformer, X: pd.DataFrame) -> float:
+        """
+        It returns the largest absolute difference between the compiled path and the sklearn
+        preprocessing object over every row of `X`.
+        """
+        try:
+            expected = preprocessing_object.transform(X)
+            if hasattr(expected, "toarray"):
+                expected = expected.toarray()
+            actual = np.vstack([self.transform_record(record) for record in X.to_dict(orient="records")])
+            return float(np.nanmax(np.abs(expected - actual)))
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+
+class HousingEstimatorModel:
+    def __init__(self, preprocessing_object, trained_model_object) -> None:
+        """
+        This function takes in a preprocessing object and a trained model object and assigns them to the
+        class variables preprocessing_object and trained_model_object.
+
+        :param preprocessing_object: This is the object of the class Preprocessing
+        :param trained_model_object: This is the object of the class that contains the trained model
+        """
+        self.preprocessing_object = preprocessing_object
+        self.trained_model_object = trained_model_object
+        self.compiled_preprocessing_object = CompiledPreprocessor(preprocessing_object=preprocessing_object)
+
+    def get_compiled_preprocessing_object(self) -> CompiledPreprocessor:
+        """
+        It returns the compiled preprocessing object, compiling it on first use for models that were
+        saved before it existed.
+        """
+        try:
+            compiled_preprocessing_object = getattr(self, "compiled_preprocessing_object", None)
+            if compiled_preprocessing_object is None:
+                compiled_preprocessing_object = CompiledPreprocessor(
+                    preprocessing_object=self.preprocessing_object)
+                self.compiled_preprocessing_object = compiled_preprocessing_object
+            return compiled_preprocessing_object
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def transform_record(self, record: dict):
+        """
+        It preprocesses one record through the compiled path, which works on a plain dict and skips
+        the ColumnTransformer and DataFrame overhead.
+
+        :param record: dict of input column name to scalar value
+        :return: array with one row of transformed features
+        """
+        try:
+            return self.get_compiled_preprocessing_object().transform_record(record)
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def transform_records(self, records: list):
+        try:
+            compiled_preprocessing_object = self.get_compiled_preprocessing_object()
+            return np.vstack([compiled_preprocessing_object.transform_record(record) for record in records])
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def transform(self, X):
+        try:
+            return self.preprocessing_object.transform(X)
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def predict_record(self, record: dict):
+        """
+        Fast path for one record: the compiled preprocessing works on a plain dict, skipping the
+        ColumnTransformer and DataFrame overhead, and only the estimator is called.
+
+        :param record: dict of input column name to scalar value
+        :return: array with one prediction
+        """
+        try:
+            return self.trained_model_object.predict(self.transform_record(record))
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def predict_records(self, records: list):
+        """
+        It scores a list of record dicts with one estimator call, preprocessing each record through
+        the compiled path.
+        """
+        try:
+            return self.trained_model_object.predict(self.transform_records(records))
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def predict(self, X):
+
+        try:
+            transformed_features = self.transform(X)
+            predictions = self.trained_model_object.predict(
+                transformed_features)
+            return predictions
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def __repr__(self) -> str:
+        return f"{type(self.trained_model_object).__name__}()"
+
+    def __str__(self) -> str:
+        return f"{type(self.trained_model_object).__name__}()"
@@ -1,11 +1,32 @@
 import os
 import sys
+import json
+import time
+import threading
+from collections import OrderedDict
 
 from housing.exception.exception import HousingException
-from housing.util.util import load_object
+from housing.logger.logger import logging
+from housing.constant import MODEL_PATH_KEY, MODEL_POINTER_FILE_NAME, MODEL_POINTER_GENERATION_KEY, \
+    NUMERICAL_COLUMN_KEY, CATEGORICAL_COLUMN_KEY, DRIFT_REFERENCE_PROFILE_FILE_NAME
+from housing.entity.schema_validator import SchemaValidator
+from housing.entity.data_drift import DataDriftDetector
+from housing.entity.drift_monitor import DriftMonitor, DEFAULT_DRIFT_WINDOW_SIZE
+from housing.entity.service_metrics import ServiceMetrics, Counter, COUNTER_METRIC_TYPE, GAUGE_METRIC_TYPE, \
+    MODEL_RESOLUTION_PHASE, PREPROCESSING_PHASE, PREDICT_PHASE
+from housing.util.util import load_object, read_yaml_file
 
+import numpy as np
 import pandas as pd
 
+MODEL_REGISTRY_MAX_SIZE = 3
+MODEL_REFRESH_INTERVAL_SECONDS = 5.0
+BATCH_PREDICTION_CHUNK_SIZE = 10000
+
+SMOKE_TEST_HOUSING_DATA = dict(longitude=-122.23, latitude=37.88, housing_median_age=41.0,
+                               total_rooms=880.0, total_bedrooms=129.0, population=322.0,
+                               households=126.0, median_income=8.3252, ocean_proximity="NEAR BAY")
+
 
 class HousingData:
 
@@ -43,6 +64,12 @@ class HousingData:
         except Exception as e:
             raise HousingException(e, sys) from e
 
+    def get_housing_data_as_record(self) -> dict:
+        try:
+            return {column: values[0] for column, values in self.get_housing_data_as_dict().items()}
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
     def get_housing_data_as_dict(self):
         try:
             input_data = {
@@ -60,29 +87,472 @@ class HousingData:
             raise HousingException(e, sys)
 
 
+class HousingBatchData:
+
+    def __init__(self, records: list, dataset_schema: dict, schema_validator: SchemaValidator = None):
+        """
+        :param records: list of dicts, one per district, keyed by input column name
+        :param dataset_schema: content of config/schema.yaml
+        :param schema_validator: validator of the input columns, built from `dataset_schema` when not
+        given; pass a shared one to avoid compiling the schema per request
+        """
+        try:
+            self.records = records
+            self.dataset_schema = dataset_schema
+            self.schema_validator = schema_validator if schema_validator is not None else \
+                SchemaValidator(dataset_schema=dataset_schema, include_target=False)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_housing_input_data_frame(self) -> pd.DataFrame:
+        """
+        It builds one columnar frame out of all records and validates it against the schema in one
+        vectorized pass: exact column set, numeric values, categorical domains and numeric ranges.
+        :return: DataFrame with the schema's input columns in schema order
+        """
+        try:
+            if not isinstance(self.records, list) or len(self.records) == 0:
+                raise Exception("Expected a non empty list of records")
+
+            numerical_columns = self.dataset_schema[NUMERICAL_COLUMN_KEY]
+            categorical_columns = self.dataset_schema[CATEGORICAL_COLUMN_KEY]
+            input_columns = numerical_columns + categorical_columns
+
+            housing_df = pd.DataFrame.from_records(self.records)
+
+            report = self.schema_validator.validate(housing_df, check_null_rate=False, coerce_numeric=True)
+            if not report.is_valid:
+                raise Exception(SchemaValidator.get_error_message(report))
+
+            housing_df = housing_df[input_columns]
+            housing_df[numerical_columns] = housing_df[numerical_columns].astype(float)
+            return housing_df
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+
+class ModelRegistry:
+
+    def __init__(self, max_size: int = MODEL_REGISTRY_MAX_SIZE):
+        """
+        Process wide cache of deserialized models. Entries are keyed by the model version directory
+        and the identity (inode, mtime) of the model file so an overwritten file is never served
+        stale, and the least recently used version is evicted once more than `max_size` are resident.
+        A model is loaded under a lock of its own key, so a cold load never blocks the lookups of the
+        models already resident, and concurrent requests for the same model load it once.
+
+        :param max_size: maximum number of model versions kept in memory
+        :type max_size: int
+        """
+        try:
+            self.max_size = max_size
+            self.hits = 0
+            self.misses = 0
+            self._models = OrderedDict()
+            # guards _models and _load_locks, never held while a model is loaded
+            self._lock = threading.Lock()
+            # model key -> lock held while that model is loaded
+            self._load_locks = {}
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_model_key(model_path: str) -> tuple:
+        """
+        It returns the cache key of a model file: (version directory, inode, mtime in ns)
+        """
+        try:
+            stat = os.stat(model_path)
+            return os.path.dirname(model_path), stat.st_ino, stat.st_mtime_ns
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_model(self, model_path: str, model_key: tuple = None):
+        """
+        It returns the deserialized model stored at `model_path`, loading it from disk only when it is
+        not already resident.
+
+        :param model_path: path of the pickled model file
+        :type model_path: str
+        :param model_key: key returned by `get_model_key`, computed from `model_path` when not given
+        :type model_key: tuple
+        :return: the loaded model object
+        """
+        try:
+            if model_key is None:
+                model_key = ModelRegistry.get_model_key(model_path)
+            model = self.get_resident_model(model_key)
+            if model is not None:
+                return model
+
+            with self._lock:
+                load_lock = self._load_locks.setdefault(model_key, threading.Lock())
+            with load_lock:
+                # another thread may have loaded the model while this one waited
+                model = self.get_resident_model(model_key)
+                if model is not None:
+                    return model
+
+                logging.info(f"Loading model into registry: [{model_path}]")
+                try:
+                    model = load_object(file_path=model_path, mmap_mode="r")
+                except Exception:
+                    with self._lock:
+                        self.misses += 1
+                        self._load_locks.pop(model_key, None)
+                    raise
+                # the model is resident before its load lock goes, so no thread can miss both
+                with self._lock:
+                    self.misses += 1
+                    self._load_locks.pop(model_key, None)
+                    self._models[model_key] = model
+                    while len(self._models) > self.max_size:
+                        evicted_key, _ = self._models.popitem(last=False)
+                        logging.info(f"Evicted model from registry: [{evicted_key}]")
+                return model
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_resident_model(self, model_key: tuple):
+        """
+        It returns the model of `model_key` when it is resident, counting the hit, otherwise None.
+        """
+        with self._lock:
+            model = self._models.get(model_key)
+            if model is not None:
+                self.hits += 1
+                self._models.move_to_end(model_key)
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
 class HousingPredictor:
+    registry = ModelRegistry()
+    # model_dir -> (last check time, model_dir mtime, model path, model key)
+    _resolved_model_paths = {}
 
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, refresh_interval: float = MODEL_REFRESH_INTERVAL_SECONDS,
+                 data_drift_detector: DataDriftDetector = None, drift_window_size: int = DEFAULT_DRIFT_WINDOW_SIZE,
+                 service_metrics: ServiceMetrics = None):
+        """
+        :param model_dir: directory holding one timestamped sub directory per exported model
+        :param refresh_interval: seconds between two checks of `model_dir` for a newer model
+        :param data_drift_detector: enables online drift monitoring of the inputs against the reference
+        profile exported with the serving model
+        :param drift_window_size: number of most recent records drift is computed over
+        :param service_metrics: records the latency of the model resolution, preprocessing and predict
+        phases, and exposes the model in use and the model cache hits and misses
+        """
         try:
+            self.service_metrics = service_metrics if service_metrics is not None else ServiceMetrics(enabled=False)
+            # lookups answered by the swapped in serving model, without going through the registry
+            self.serving_model_hits = Counter("serving_model_hits", "Lookups of the serving model.")
+            if self.service_metrics.enabled:
+                self.service_metrics.register_collector(self.collect_metrics)
             self.model_dir = model_dir
+            self.refresh_interval = refresh_interval
+            self.data_drift_detector = data_drift_detector
+            self.drift_window_size = drift_window_size
+            # replaced together with the serving model, None when drift is not monitored
+            self.drift_monitor = None
+            self.pointer_file_path = os.path.join(model_dir, MODEL_POINTER_FILE_NAME)
+            # (generation, model path, model) swapped in as a whole by the watcher thread
+            self.serving_model = None
+            self._watcher = None
+            self._stop_event = threading.Event()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def read_model_pointer(self):
+        """
+        It reads the `CURRENT` pointer written by the model pusher.
+        :return: (generation, model path) or None when no pointer has been written yet
+        """
+        try:
+            if not os.path.exists(self.pointer_file_path):
+                return None
+            pointer_content = read_yaml_file(file_path=self.pointer_file_path) or dict()
+            if MODEL_PATH_KEY not in pointer_content:
+                return None
+            model_path = os.path.join(self.model_dir, pointer_content[MODEL_PATH_KEY])
+            return int(pointer_content.get(MODEL_POINTER_GENERATION_KEY, 0)), model_path
         except Exception as e:
             raise HousingException(e, sys) from e
 
     def get_latest_model_path(self):
         try:
-            folder_name = list(map(int, os.listdir(self.model_dir)))
+            model_pointer = self.read_model_pointer()
+            if model_pointer is not None:
+                return model_pointer[1]
+
+            folder_name = [int(name) for name in os.listdir(self.model_dir) if name.isdigit()]
             latest_model_dir = os.path.join(self.model_dir, f"{max(folder_name)}")
-            file_name = os.listdir(latest_model_dir)[0]
+            file_name = [name for name in os.listdir(latest_model_dir) if name.endswith(".pkl")][0]
             latest_model_path = os.path.join(latest_model_dir, file_name)
             return latest_model_path
         except Exception as e:
             raise HousingException(e, sys) from e
 
+    def get_current_model_path(self):
+        """
+        It returns the latest model path and its registry key. The file system is only polled once
+        `refresh_interval` has elapsed, and `model_dir` is only re-listed when its mtime changed.
+        :return: (model_path, model_key)
+        """
+        try:
+            now = time.monotonic()
+            resolved = HousingPredictor._resolved_model_paths.get(self.model_dir)
+            if resolved is not None and now - resolved[0] < self.refresh_interval:
+                return resolved[2], resolved[3]
+
+            model_dir_mtime = os.stat(self.model_dir).st_mtime_ns
+            if resolved is not None and resolved[1] == model_dir_mtime:
+                model_path = resolved[2]
+            else:
+                model_path = self.get_latest_model_path()
+            model_key = ModelRegistry.get_model_key(model_path)
+            HousingPredictor._resolved_model_paths[self.model_dir] = (now, model_dir_mtime,
+                                                                     model_path, model_key)
+            return model_path, model_key
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def load_and_warm_model(self, model_path: str):
+        """
+        It loads the model at `model_path` through the registry and runs a smoke prediction on it,
+        so a model is only ever served after it has been fully unpickled and proven to predict.
+        """
+        try:
+            model = HousingPredictor.registry.get_model(model_path=model_path)
+            smoke_test_data = HousingData(**SMOKE_TEST_HOUSING_DATA)
+            prediction = model.predict(smoke_test_data.get_housing_input_data_frame())
+            if hasattr(model, "predict_record"):
+                record_prediction = model.predict_record(smoke_test_data.get_housing_data_as_record())
+                if not np.allclose(prediction, record_prediction):
+                    raise Exception(f"Compiled prediction {record_prediction} differs from {prediction}")
+            return model
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def refresh_serving_model(self) -> bool:
+        """
+        It swaps in the model named by the pointer (or the latest version directory when there is no
+        pointer) if it differs from the one being served.
+        :return: True when a new model has been swapped in
+        """
+        try:
+            model_pointer = self.read_model_pointer()
+            if model_pointer is None:
+                model_pointer = (None, self.get_latest_model_path())
+            generation, model_path = model_pointer
+
+            serving_model = self.serving_model
+            if serving_model is not None and serving_model[:2] == (generation, model_path):
+                return False
+
+            model = self.load_and_warm_model(model_path=model_path)
+            self.drift_monitor = self.load_drift_monitor(model_path=model_path)
+            self.serving_model = (generation, model_path, model)
+            logging.info(f"Serving model swapped to generation [{generation}]: [{model_path}]")
+            return True
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def load_drift_monitor(self, model_path: str):
+        """
+        It returns a fresh drift monitor on the reference profile exported next to `model_path`, or
+        None when monitoring is disabled or the model was exported without a profile.
+        """
+        try:
+            if self.data_drift_detector is None:
+                return None
+            reference_profile_file_path = os.path.join(os.path.dirname(model_path), DRIFT_REFERENCE_PROFILE_FILE_NAME)
+            if not os.path.exists(reference_profile_file_path):
+                logging.info(f"No drift reference profile next to [{model_path}], drift is not monitored")
+                return None
+            with open(reference_profile_file_path) as reference_profile_file:
+                reference_profile = json.load(reference_profile_file)
+            return DriftMonitor(data_drift_detector=self.data_drift_detector,
+                                reference_profile=reference_profile,
+                                window_size=self.drift_window_size)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def observe_record(self, record: dict):
+        """
+        It adds one prediction input to the drift window of the serving model, if monitored.
+        """
+        try:
+            drift_monitor = self.drift_monitor
+            if drift_monitor is not None:
+                drift_monitor.observe_record(record)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def observe_dataframe(self, dataframe: pd.DataFrame):
+        try:
+            drift_monitor = self.drift_monitor
+            if drift_monitor is not None:
+                drift_monitor.observe_dataframe(dataframe)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_drift_report(self):
+        """
+        It returns the drift report of the current window against the serving model's reference
+        profile, or None when drift is not monitored.
+        """
+        try:
+            drift_monitor = self.drift_monitor
+            if drift_monitor is None:
+                return None
+            report = drift_monitor.get_drift_report()
+            report["model_path"] = self.serving_model[1] if self.serving_model is not None else None
+            return report
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def _watch_model_pointer(self):
+        last_pointer_key = None
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                stat = os.stat(self.pointer_file_path) if os.path.exists(self.pointer_file_path) \
+                    else os.stat(self.model_dir)
+                pointer_key = (stat.st_ino, stat.st_mtime_ns)
+                if pointer_key != last_pointer_key:
+                    self.refresh_serving_model()
+                    last_pointer_key = pointer_key
+            except Exception as e:
+                # keep serving the previous model, retry on the next poll
+                logging.info(f"Model refresh failed: {HousingException(e, sys)}")
+
+    def start_watcher(self):
+        """
+        It loads the current model and starts a daemon thread that polls the `CURRENT` pointer every
+        `refresh_interval` seconds, loading and warming new generations in the background.
+        """
+        try:
+            if self._watcher is not None:
+                return
+            try:
+                self.refresh_serving_model()
+            except Exception as e:
+                logging.info(f"Initial model load failed: {e}")
+            self._watcher = threading.Thread(target=self._watch_model_pointer,
+                                             name="model-watcher", daemon=True)
+            self._watcher.start()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def stop_watcher(self):
+        self._stop_event.set()
+
+    def collect_metrics(self) -> list:
+        """
+        Collector of `ServiceMetrics`: the model being served and the model cache hits and misses.
+        """
+        try:
+            serving_model = self.serving_model
+            model_info_samples = []
+            if serving_model is not None:
+                model_info_samples.append(({"generation": serving_model[0] if serving_model[0] is not None else "",
+                                            "model_path": os.path.relpath(serving_model[1], self.model_dir),
+                                            "model_class": str(serving_model[2])}, 1))
+            serving_model_hits = sum(values[0] for values in self.serving_model_hits.collect().values())
+            namespace = self.service_metrics.namespace
+            return [
+                (f"{namespace}_model_info", GAUGE_METRIC_TYPE, "Model being served.", model_info_samples),
+                (f"{namespace}_model_cache_hits_total", COUNTER_METRIC_TYPE,
+                 "Model lookups answered from memory.", [({}, serving_model_hits + HousingPredictor.registry.hits)]),
+                (f"{namespace}_model_cache_misses_total", COUNTER_METRIC_TYPE,
+                 "Model lookups that loaded the model from disk.", [({}, HousingPredictor.registry.misses)]),
+            ]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_model(self):
+        try:
+            serving_model = self.serving_model
+            if serving_model is not None:
+                if self.service_metrics.enabled:
+                    self.serving_model_hits.inc()
+                return serving_model[2]
+            model_path, model_key = self.get_current_model_path()
+            return HousingPredictor.registry.get_model(model_path=model_path, model_key=model_key)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
     def predict(self, X):
         try:
-            model_path = self.get_latest_model_path()
-            model = load_object(file_path=model_path)
+            model = self.get_model()
             median_house_value = model.predict(X)
             return median_house_value
         except Exception as e:
-            raise HousingException(e, sys) from e
\ No newline at end of file
+            raise HousingException(e, sys) from e
+
+    def predict_record(self, record: dict):
+        """
+        It scores one record through the model's compiled preprocessing when available and falls
+        back to the DataFrame path for models that do not provide it.
+        """
+        try:
+            start_time = time.perf_counter()
+            model = self.get_model()
+            start_time = self.service_metrics.observe_phase(MODEL_RESOLUTION_PHASE, start_time)
+            if hasattr(model, "transform_record"):
+                transformed_features = model.transform_record(record)
+                start_time = self.service_metrics.observe_phase(PREPROCESSING_PHASE, start_time)
+                prediction = model.trained_model_object.predict(transformed_features)
+            else:
+                prediction = model.predict(pd.DataFrame({column: [value] for column, value in record.items()}))
+            self.service_metrics.observe_phase(PREDICT_PHASE, start_time)
+            return prediction
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def predict_records(self, records: list) -> np.ndarray:
+        """
+        It scores a list of record dicts with a single model call and returns one prediction per
+        record, in order.
+        """
+        try:
+            start_time = time.perf_counter()
+            model = self.get_model()
+            start_time = self.service_metrics.observe_phase(MODEL_RESOLUTION_PHASE, start_time)
+            if hasattr(model, "transform_records"):
+                transformed_features = model.transform_records(records)
+                start_time = self.service_metrics.observe_phase(PREPROCESSING_PHASE, start_time)
+                predictions = model.trained_model_object.predict(transformed_features)
+            else:
+                predictions = model.predict(pd.DataFrame.from_records(records))
+            self.service_metrics.observe_phase(PREDICT_PHASE, start_time)
+            return predictions
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def predict_batch(self, X: pd.DataFrame, chunk_size: int = BATCH_PREDICTION_CHUNK_SIZE) -> np.ndarray:
+        """
+        It scores `X` with one vectorized `predict` call per chunk of `chunk_size` rows, all chunks
+        against the same model, and returns the predictions in row order.
+        """
+        try:
+            start_time = time.perf_counter()
+            model = self.get_model()
+            self.service_metrics.observe_phase(MODEL_RESOLUTION_PHASE, start_time)
+            predictions = []
+            for start in range(0, len(X), chunk_size):
+                start_time = time.perf_counter()
+                chunk = X.iloc[start:start + chunk_size]
+                if hasattr(model, "transform"):
+                    transformed_features = model.transform(chunk)
+                    start_time = self.service_metrics.observe_phase(PREPROCESSING_PHASE, start_time)
+                    predictions.append(model.trained_model_object.predict(transformed_features))
+                else:
+                    predictions.append(model.predict(chunk))
+                self.service_metrics.observe_phase(PREDICT_PHASE, start_time)
+            return np.concatenate(predictions)
+        except Exception as e:
+            raise HousingException(e, sys) from e
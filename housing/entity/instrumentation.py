@@ -0,0 +1,148 @@
+import sys
+import time
+import threading
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is then not recorded
+    resource = None
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+
+StageMetrics = namedtuple("StageMetrics", ["name", "parent", "wall_seconds", "cpu_seconds", "peak_rss_mb",
+                                           "peak_traced_mb", "row_count"])
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RU_MAXRSS_PER_MB = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+# timers currently measuring in this process, innermost last
+_active_timers = []
+
+
+def get_peak_rss_mb() -> float:
+    """
+    It returns the high-water mark of the resident set size of this process and of its finished child
+    processes, e.g. process pool workers, None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / RU_MAXRSS_PER_MB
+
+
+def get_children_cpu_seconds() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageTimer:
+
+    def __init__(self, name: str, parent: str = None, row_count: int = None):
+        """
+        Context manager measuring one stage of this process: wall time, CPU time of the process and
+        of the child processes that finished meanwhile, the peak RSS high-water mark at the end of the
+        stage and, when tracemalloc is tracing, the peak of the traced Python allocations during the
+        stage. Nested timers keep the peaks of their parent right.
+
+        :param name: name of the stage
+        :param parent: name of the enclosing stage
+        :param row_count: number of rows processed, can also be set before the stage exits
+        """
+        self.name = name
+        self.parent = parent
+        self.row_count = row_count
+        self.metrics = None
+        self.peak_traced = 0
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            if _active_timers:
+                # the enclosing stage keeps its peak so far before the peak is reset for this one
+                _active_timers[-1].peak_traced = max(_active_timers[-1].peak_traced,
+                                                     tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        _active_timers.append(self)
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.start_children_cpu = get_children_cpu_seconds()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_seconds = time.perf_counter() - self.start_wall
+        cpu_seconds = time.process_time() - self.start_cpu + get_children_cpu_seconds() - self.start_children_cpu
+        peak_traced_mb = None
+        if tracemalloc.is_tracing():
+            self.peak_traced = max(self.peak_traced, tracemalloc.get_traced_memory()[1])
+            peak_traced_mb = self.peak_traced / (1024 * 1024)
+        _active_timers.remove(self)
+        if _active_timers:
+            _active_timers[-1].peak_traced = max(_active_timers[-1].peak_traced, self.peak_traced)
+        self.metrics = StageMetrics(name=self.name, parent=self.parent, wall_seconds=wall_seconds,
+                                    cpu_seconds=cpu_seconds, peak_rss_mb=get_peak_rss_mb(),
+                                    peak_traced_mb=peak_traced_mb,
+                                    row_count=int(self.row_count) if self.row_count is not None else None)
+        return False
+
+
+class Instrumentation:
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Collects the StageMetrics of the pipeline stages and of the candidate searches of one run.
+
+        :param trace_memory: trace the Python allocations with tracemalloc while a stage is measured,
+        to record the peak of each stage. It slows allocation heavy code down noticeably.
+        :type trace_memory: bool
+        """
+        try:
+            self.trace_memory = trace_memory
+            self.metrics = []
+            # names of the stages being measured, innermost last
+            self.open_stages = []
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @contextmanager
+    def measure(self, name: str, parent: str = None, row_count: int = None):
+        """
+        It measures the enclosed block as a stage and records its metrics, also when it raises. The
+        parent defaults to the innermost stage being measured. The yielded StageTimer takes the
+        `row_count` once it is known.
+        """
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        timer = StageTimer(name=name, parent=parent if parent is not None else self.get_current_stage(),
+                           row_count=row_count)
+        self.open_stages.append(name)
+        try:
+            with timer:
+                yield timer
+        finally:
+            self.open_stages.pop()
+            if started_tracing:
+                tracemalloc.stop()
+            self.record(timer.metrics)
+
+    def get_current_stage(self) -> str:
+        return self.open_stages[-1] if self.open_stages else None
+
+    def record(self, metrics: StageMetrics):
+        with self._lock:
+            self.metrics.append(metrics)
+        logging.info(f"Stage metrics: {metrics}")
+
+    def get_metrics(self) -> list:
+        with self._lock:
+            return list(self.metrics)
+
+    def clear(self):
+        with self._lock:
+            self.metrics = []
@@ -0,0 +1,230 @@
+import os
+import sys
+import uuid
+import sqlite3
+from datetime import datetime
+from collections import namedtuple
+from contextlib import contextmanager
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+
+RetrainingJob = namedtuple("RetrainingJob", ["job_id", "status", "message", "created_time", "start_time",
+                                             "stop_time", "worker_pid", "process_pid", "cancel_requested"])
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+FINISHED_JOB_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+SQLITE_TIMEOUT_SECONDS = 30
+
+
+class JobQueue:
+
+    def __init__(self, db_file_path: str):
+        """
+        Durable queue of retraining jobs in a local SQLite database, shared by the web processes that
+        enqueue and poll jobs and the worker processes that run them.
+
+        A job moves from `queued` to `running` when a worker claims it, and then to `succeeded`,
+        `failed` or `cancelled`; a queued job can also be cancelled directly. Claiming happens in an
+        immediate transaction that also counts the running jobs, so the concurrency limit holds
+        across any number of workers.
+
+        :param db_file_path: path of the SQLite database, created on first use
+        :type db_file_path: str
+        """
+        try:
+            self.db_file_path = db_file_path
+            os.makedirs(os.path.dirname(db_file_path), exist_ok=True)
+            with self.connect() as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        job_id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        message TEXT,
+                        created_time TEXT NOT NULL,
+                        start_time TEXT,
+                        stop_time TEXT,
+                        worker_pid INTEGER,
+                        process_pid INTEGER,
+                        cancel_requested INTEGER NOT NULL DEFAULT 0
+                    )""")
+                connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_time)")
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @contextmanager
+    def connect(self):
+        """
+        It yields a connection in autocommit mode, transactions are started explicitly, and closes it.
+        """
+        connection = sqlite3.connect(self.db_file_path, timeout=SQLITE_TIMEOUT_SECONDS, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def get_time() -> str:
+        return datetime.now().isoformat(sep=" ", timespec="seconds")
+
+    def enqueue(self) -> RetrainingJob:
+        try:
+            job_id = str(uuid.uuid4())
+            with self.connect() as connection:
+                connection.execute("INSERT INTO jobs (job_id, status, message, created_time) VALUES (?, ?, ?, ?)",
+                                   (job_id, JOB_QUEUED, "Job has been queued.", self.get_time()))
+            logging.info(f"Retraining job [{job_id}] queued")
+            return self.get_job(job_id)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_job(self, job_id: str) -> RetrainingJob:
+        """
+        :return: RetrainingJob or None when there is no such job
+        """
+        try:
+            with self.connect() as connection:
+                row = connection.execute(f"SELECT {', '.join(RetrainingJob._fields)} FROM jobs WHERE job_id = ?",
+                                         (job_id,)).fetchone()
+            return RetrainingJob(*row) if row is not None else None
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_jobs(self, statuses: tuple = None, limit: int = None) -> list:
+        """
+        It returns the jobs, most recent first, optionally only those in `statuses`.
+        """
+        try:
+            query = f"SELECT {', '.join(RetrainingJob._fields)} FROM jobs"
+            parameters = []
+            if statuses:
+                query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+                parameters.extend(statuses)
+            query += " ORDER BY created_time DESC, rowid DESC"
+            if limit is not None:
+                query += " LIMIT ?"
+                parameters.append(int(limit))
+            with self.connect() as connection:
+                return [RetrainingJob(*row) for row in connection.execute(query, parameters).fetchall()]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def claim_next_job(self, worker_pid: int, max_concurrent_jobs: int) -> RetrainingJob:
+        """
+        It moves the oldest queued job to `running` on behalf of `worker_pid`, unless
+        `max_concurrent_jobs` jobs are already running.
+        :return: the claimed RetrainingJob or None
+        """
+        try:
+            with self.connect() as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    running_job_count = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = ?",
+                                                           (JOB_RUNNING,)).fetchone()[0]
+                    row = None
+                    if running_job_count < max_concurrent_jobs:
+                        row = connection.execute("SELECT job_id FROM jobs WHERE status = ? "
+                                                 "ORDER BY created_time, rowid LIMIT 1", (JOB_QUEUED,)).fetchone()
+                    if row is not None:
+                        connection.execute("UPDATE jobs SET status = ?, message = ?, start_time = ?, worker_pid = ? "
+                                           "WHERE job_id = ?",
+                                           (JOB_RUNNING, "Job is running.", self.get_time(), worker_pid, row[0]))
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            return self.get_job(row[0]) if row is not None else None
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def set_process_pid(self, job_id: str, process_pid: int):
+        try:
+            with self.connect() as connection:
+                connection.execute("UPDATE jobs SET process_pid = ? WHERE job_id = ?", (process_pid, job_id))
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def finish_job(self, job_id: str, status: str, message: str) -> bool:
+        """
+        It moves a running job to one of `FINISHED_JOB_STATUSES`.
+        :return: False when the job was not running anymore, the first transition wins
+        """
+        try:
+            if status not in FINISHED_JOB_STATUSES:
+                raise Exception(f"[{status}] is not a finished job status")
+            with self.connect() as connection:
+                updated = connection.execute("UPDATE jobs SET status = ?, message = ?, stop_time = ? "
+                                             "WHERE job_id = ? AND status = ?",
+                                             (status, message, self.get_time(), job_id, JOB_RUNNING)).rowcount
+            if updated:
+                logging.info(f"Retraining job [{job_id}] {status}: {message}")
+            return bool(updated)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def cancel(self, job_id: str) -> RetrainingJob:
+        """
+        It cancels a queued job right away and flags a running one, its worker stops it on the next
+        poll. Finished jobs are left as they are.
+        :return: the job after the request, None when there is no such job
+        """
+        try:
+            with self.connect() as connection:
+                connection.execute("UPDATE jobs SET status = ?, message = ?, stop_time = ? "
+                                   "WHERE job_id = ? AND status = ?",
+                                   (JOB_CANCELLED, "Job was cancelled before it started.", self.get_time(),
+                                    job_id, JOB_QUEUED))
+                connection.execute("UPDATE jobs SET cancel_requested = 1, message = ? WHERE job_id = ? AND status = ?",
+                                   ("Cancellation requested.", job_id, JOB_RUNNING))
+            return self.get_job(job_id)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def requeue_jobs(self, job_ids: list, message: str) -> int:
+        """
+        It puts running jobs back in the queue, e.g. when their worker stops before they finish.
+        Jobs whose cancellation was requested are cancelled instead.
+        """
+        try:
+            if not job_ids:
+                return 0
+            placeholders = ', '.join('?' * len(job_ids))
+            with self.connect() as connection:
+                connection.execute(f"UPDATE jobs SET status = ?, message = ?, stop_time = ? "
+                                   f"WHERE job_id IN ({placeholders}) AND status = ? AND cancel_requested = 1",
+                                   (JOB_CANCELLED, "Job was cancelled.", self.get_time(), *job_ids, JOB_RUNNING))
+                return connection.execute(f"UPDATE jobs SET status = ?, message = ?, start_time = NULL, "
+                                          f"worker_pid = NULL, process_pid = NULL "
+                                          f"WHERE job_id IN ({placeholders}) AND status = ?",
+                                          (JOB_QUEUED, message, *job_ids, JOB_RUNNING)).rowcount
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def requeue_orphaned_jobs(self) -> int:
+        """
+        It requeues the running jobs whose worker process is gone, e.g. after a crash or a restart.
+        """
+        try:
+            orphaned_job_ids = []
+            for job in self.get_jobs(statuses=(JOB_RUNNING,)):
+                try:
+                    if job.worker_pid is None:
+                        raise ProcessLookupError()
+                    os.kill(job.worker_pid, 0)
+                except ProcessLookupError:
+                    orphaned_job_ids.append(job.job_id)
+                except PermissionError:
+                    pass
+            requeued_job_count = self.requeue_jobs(job_ids=orphaned_job_ids,
+                                                   message="Job was requeued after its worker stopped.")
+            if orphaned_job_ids:
+                logging.info(f"Requeued {requeued_job_count} orphaned retraining jobs {orphaned_job_ids}")
+            return requeued_job_count
+        except Exception as e:
+            raise HousingException(e, sys) from e
@@ -2,9 +2,11 @@ import os
 import sys
 import yaml
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
 import importlib
 import numpy as np
+from threadpoolctl import threadpool_limits
 
 from sklearn.metrics import r2_score, mean_squared_error
 
@@ -12,6 +14,7 @@ from sklearn.metrics import r2_score, mean_squared_error
 from housing.util.util import read_yaml_file
 from housing.logger.logger import logging
 from housing.exception.exception import HousingException
+from housing.entity.instrumentation import Instrumentation, StageTimer, StageMetrics
 
 GRID_SEARCH_KEY = 'grid_search'
 MODULE_KEY = 'module'
@@ -19,19 +22,47 @@ CLASS_KEY = 'class'
 PARAM_KEY = 'params'
 MODEL_SELECTION_KEY = 'model_selection'
 SEARCH_PARAM_GRID_KEY = "search_param_grid"
+SCHEDULER_KEY = "model_selection_scheduler"
+SCHEDULER_MAX_WORKERS_KEY = "max_workers"
+SCHEDULER_CORE_BUDGET_KEY = "core_budget"
+N_JOBS_KEY = "n_jobs"
+# parameters setting the number of threads of an estimator: scikit-learn and XGBoost n_jobs, its legacy
+# nthread alias and CatBoost thread_count
+ESTIMATOR_THREAD_PARAM_KEYS = [N_JOBS_KEY, "nthread", "thread_count"]
+# thread parameters left out of get_params until set, by top level module of the estimator class
+DEFAULT_ESTIMATOR_THREAD_PARAM_KEYS = {"catboost": "thread_count"}
+SEARCH_STRATEGY_KEY = "search_strategy"
+SEARCH_STRATEGY_NAME_KEY = "name"
+
+# strategy name -> (module, class, keyword receiving the search space)
+SEARCH_STRATEGIES = {
+    "exhaustive": ("sklearn.model_selection", "GridSearchCV", "param_grid"),
+    "randomized": ("sklearn.model_selection", "RandomizedSearchCV", "param_distributions"),
+    "halving": ("sklearn.model_selection", "HalvingGridSearchCV", "param_grid"),
+    "halving_randomized": ("sklearn.model_selection", "HalvingRandomSearchCV", "param_distributions"),
+}
+RACING_KEY = "model_selection_racing"
+RACING_ENABLED_KEY = "enabled"
+RACING_SAMPLE_FRACTIONS_KEY = "sample_fractions"
+RACING_CONFIDENCE_Z_KEY = "confidence_z"
+RACING_RANDOM_STATE_KEY = "random_state"
+HALVING_SEARCH_CLASSES = ("HalvingGridSearchCV", "HalvingRandomSearchCV")
+DISTRIBUTION_SEARCH_CLASSES = ("RandomizedSearchCV", "HalvingRandomSearchCV")
 
 InitializedModelDetail = namedtuple("InitializedModelDetail", ["model_serial_number",
                                                                "model",
                                                                "param_grid_search",
-                                                               "model_name"
-                                                               ])
+                                                               "model_name",
+                                                               "search_strategy"
+                                                               ], defaults=[None])
 
 GridSearchedBestModel = namedtuple("GridSearchedBestModel", ["model_serial_number",
                                                              "model",
                                                              "best_model",
                                                              "best_parameters",
-                                                             "best_score"
-                                                             ])
+                                                             "best_score",
+                                                             "best_score_standard_error"
+                                                             ], defaults=[0.0])
 
 BestModel = namedtuple("BestModel", ["model_serial_number",
                                      "model",
@@ -53,12 +84,14 @@ MetricInfoArtifact = namedtuple("MetricInfoArtifact", ["model_name",
 
 class ModelFactory:
 
-    def __init__(self, model_config_path: str = None):
+    def __init__(self, model_config_path: str = None, instrumentation: Instrumentation = None):
         """
         The function reads a config file and initializes a model object.
 
         :param model_config_path: str = None
         :type model_config_path: str
+        :param instrumentation: records the metrics of every candidate search when given
+        :type instrumentation: Instrumentation
         """
 
         try:
@@ -71,13 +104,34 @@ class ModelFactory:
             self.model_initialization_config: dict = dict(
                 self.config[MODEL_SELECTION_KEY])
 
+            scheduler_config: dict = dict(self.config.get(SCHEDULER_KEY) or {})
+            self.max_workers: int = int(scheduler_config.get(SCHEDULER_MAX_WORKERS_KEY, 1))
+            self.core_budget: int = ModelFactory.get_core_budget(
+                scheduler_config.get(SCHEDULER_CORE_BUDGET_KEY, -1))
+
+            racing_config: dict = dict(self.config.get(RACING_KEY) or {})
+            self.racing_enabled: bool = bool(racing_config.get(RACING_ENABLED_KEY, False))
+            self.racing_sample_fractions: List[float] = sorted(
+                float(fraction) for fraction in racing_config.get(RACING_SAMPLE_FRACTIONS_KEY, []))
+            self.racing_confidence_z: float = float(racing_config.get(RACING_CONFIDENCE_Z_KEY, 2.0))
+            self.racing_random_state: int = racing_config.get(RACING_RANDOM_STATE_KEY, 0)
+
             self.initialized_model_list = None
             self.grid_searched_best_model_list = None
+            self.search_wall_times = dict()
+            self.instrumentation = instrumentation
+            self.racing_eliminated_models = dict()
 
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    def __getstate__(self):
+        # sent to the process pool workers, they return the metrics of their search instead of recording them
+        state = self.__dict__.copy()
+        state["instrumentation"] = None
+        return state
+
     @staticmethod
     def read_params(config_path: str) -> dict:
         """
@@ -95,6 +149,30 @@ class ModelFactory:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    @staticmethod
+    def get_core_budget(core_budget) -> int:
+        """
+        It resolves the configured core budget, -1 (or anything below 1) meaning every available core.
+        """
+        core_budget = int(core_budget)
+        if core_budget < 1:
+            core_budget = os.cpu_count() or 1
+        return core_budget
+
+    @staticmethod
+    def pin_estimator_threads(estimator):
+        """
+        It sets every thread parameter of `estimator` to a single thread, including the ones the
+        estimator leaves out of `get_params` until they are set.
+        """
+        estimator_params = estimator.get_params()
+        thread_params = {key: 1 for key in ESTIMATOR_THREAD_PARAM_KEYS if key in estimator_params}
+        default_thread_param_key = DEFAULT_ESTIMATOR_THREAD_PARAM_KEYS.get(type(estimator).__module__.split(".")[0])
+        if default_thread_param_key is not None:
+            thread_params[default_thread_param_key] = 1
+        if thread_params:
+            estimator.set_params(**thread_params)
+
     @staticmethod
     def update_property_of_class(instance_ref: object, property_data: dict):
         """
@@ -175,7 +253,8 @@ class ModelFactory:
 
     def execute_grid_search_operation(self, initialized_model: InitializedModelDetail,
                                       input_feature,
-                                      output_feature) -> GridSearchedBestModel:
+                                      output_feature,
+                                      n_jobs: int = None) -> GridSearchedBestModel:
         """
         The function takes in an initialized model, input feature and output feature and returns a grid
         searched best model
@@ -184,27 +263,29 @@ class ModelFactory:
         :type initialized_model: InitializedModelDetail
         :param input_feature: The input feature dataframe
         :param output_feature: The target variable
+        :param n_jobs: cores granted to this search by the scheduler. The search runs that many CV fits
+        in parallel while the estimator itself is pinned to a single thread through every one of its
+        `ESTIMATOR_THREAD_PARAM_KEYS`, so nested `n_jobs: -1` or CatBoost and XGBoost thread defaults
+        cannot oversubscribe the machine. None keeps the configured values untouched.
         :return: A GridSearchedBestModel object
         """
         try:
-            grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
-                                                             class_name=self.grid_search_cv_class_name
-                                                             )
-            grid_search_cv_model = grid_search_cv_ref(estimator=initialized_model.model,
-                                                      param_grid=initialized_model.param_grid_search
-                                                      )
-            grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv_model,
-                                                                   self.grid_search_cv_property_data
-                                                                   )
+            grid_search_cv = self.get_search_cv_object(initialized_model=initialized_model)
+            if n_jobs is not None:
+                ModelFactory.pin_estimator_threads(initialized_model.model)
+                grid_search_cv.n_jobs = n_jobs
             message = f'{"$$"* 30} f"Training {type(initialized_model.model).__name__} Started." {"$$"*30}'
             logging.info(message)
             grid_search_cv.fit(input_feature, output_feature)
             message = f'{"##"* 30} f"Training {type(initialized_model.model).__name__}" completed {"##"*30}'
+            best_score_std = grid_search_cv.cv_results_["std_test_score"][grid_search_cv.best_index_]
             grid_searched_best_model = GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
                                                              model=initialized_model.model,
                                                              best_model=grid_search_cv.best_estimator_,
                                                              best_parameters=grid_search_cv.best_params_,
-                                                             best_score=grid_search_cv.best_score_
+                                                             best_score=grid_search_cv.best_score_,
+                                                             best_score_standard_error=best_score_std / np.sqrt(
+                                                                 grid_search_cv.n_splits_)
                                                              )
             return grid_searched_best_model
 
@@ -212,6 +293,48 @@ class ModelFactory:
             logging.info(f'Error Occurred at {HousingException(e,sys)}')
             raise HousingException(e, sys)
 
+    def get_search_cv_object(self, initialized_model: InitializedModelDetail):
+        """
+        It builds the parameter search object of a candidate. The class comes from the candidate's
+        `search_strategy` (exhaustive, randomized, halving, halving_randomized) and falls back to the
+        global `grid_search` class. The global `grid_search` params apply first, then the strategy
+        params (e.g. `n_iter`, `factor`, `min_resources`), and all of them go through `set_params`
+        so unknown keys fail loudly instead of being silently set.
+
+        :param initialized_model: InitializedModelDetail
+        :return: unfitted search object
+        """
+        try:
+            search_strategy = dict(initialized_model.search_strategy or {})
+            strategy_name = search_strategy.pop(SEARCH_STRATEGY_NAME_KEY, None)
+            strategy_params = dict(search_strategy.pop(PARAM_KEY, None) or {})
+
+            if strategy_name is None:
+                module_name, class_name = self.grid_search_cv_module, self.grid_search_cv_class_name
+                param_space_key = "param_distributions" if class_name in DISTRIBUTION_SEARCH_CLASSES \
+                    else "param_grid"
+            elif strategy_name in SEARCH_STRATEGIES:
+                module_name, class_name, param_space_key = SEARCH_STRATEGIES[strategy_name]
+            else:
+                raise Exception(f"Unknown search strategy [{strategy_name}] for "
+                                f"[{initialized_model.model_name}], expected one of {list(SEARCH_STRATEGIES)}")
+
+            if class_name in HALVING_SEARCH_CLASSES:
+                importlib.import_module("sklearn.experimental.enable_halving_search_cv")
+
+            search_cv_ref = ModelFactory.class_for_name(module_name=module_name, class_name=class_name)
+            search_cv = search_cv_ref(estimator=initialized_model.model,
+                                      **{param_space_key: initialized_model.param_grid_search})
+
+            search_cv_params = dict(self.grid_search_cv_property_data)
+            search_cv_params.update(strategy_params)
+            logging.info(f"Search for [{initialized_model.model_name}]: {class_name}({search_cv_params})")
+            search_cv.set_params(**search_cv_params)
+            return search_cv
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
     def get_initialized_model_list(self) -> List[InitializedModelDetail]:
         """
         This function will return a list of model details.
@@ -236,10 +359,13 @@ class ModelFactory:
                 param_grid_search = model_initialization_config[SEARCH_PARAM_GRID_KEY]
                 model_name = f"{model_initialization_config[MODULE_KEY]}.{model_initialization_config[CLASS_KEY]}"
 
+                search_strategy = model_initialization_config.get(SEARCH_STRATEGY_KEY)
+
                 model_initialization_config = InitializedModelDetail(model_serial_number=model_serial_number,
                                                                      model=model,
                                                                      param_grid_search=param_grid_search,
-                                                                     model_name=model_name
+                                                                     model_name=model_name,
+                                                                     search_strategy=search_strategy
                                                                      )
 
                 initialized_model_list.append(model_initialization_config)
@@ -252,7 +378,8 @@ class ModelFactory:
 
     def initiate_best_parameter_search_for_initialized_model(self, initialized_model: InitializedModelDetail,
                                                              input_feature,
-                                                             output_feature) -> GridSearchedBestModel:
+                                                             output_feature,
+                                                             n_jobs: int = None) -> GridSearchedBestModel:
         """
         initiate_best_model_parameter_search(): function will perform paramter search operation and
         it will return you the best optimistic  model with best paramter:
@@ -260,13 +387,15 @@ class ModelFactory:
         param_grid: dictionary of paramter to perform search operation
         input_feature: your all input features
         output_feature: Target/Dependent features
+        n_jobs: cores granted to the search, see `execute_grid_search_operation`
         ================================================================================
         return: Function will return a GridSearchOperation
         """
         try:
             return self.execute_grid_search_operation(initialized_model=initialized_model,
                                                       input_feature=input_feature,
-                                                      output_feature=output_feature)
+                                                      output_feature=output_feature,
+                                                      n_jobs=n_jobs)
         except Exception as e:
             logging.info(f'Error Occurred at {HousingException(e,sys)}')
             raise HousingException(e, sys) from e
@@ -287,11 +416,22 @@ class ModelFactory:
 
         try:
             self.grid_searched_best_model_list = []
+            if self.max_workers > 1 and len(initialized_model_list) > 1:
+                return self.initiate_parallel_parameter_search(initialized_model_list=initialized_model_list,
+                                                               input_feature=input_feature,
+                                                               output_feature=output_feature)
+
+            # one search at a time gets the whole core budget
             for initialized_model in initialized_model_list:
-                grid_search_best_model = self.initiate_best_parameter_search_for_initialized_model(initialized_model=initialized_model,
-                                                                                                   input_feature=input_feature,
-                                                                                                   output_feature=output_feature
-                                                                                                   )
+                with StageTimer(name=ModelFactory.get_search_name(initialized_model),
+                                row_count=len(output_feature)) as search_timer, \
+                        threadpool_limits(limits=self.core_budget):
+                    grid_search_best_model = self.initiate_best_parameter_search_for_initialized_model(initialized_model=initialized_model,
+                                                                                                       input_feature=input_feature,
+                                                                                                       output_feature=output_feature,
+                                                                                                       n_jobs=self.core_budget
+                                                                                                       )
+                self.record_search_metrics(initialized_model, search_timer.metrics)
                 self.grid_searched_best_model_list.append(
                     grid_search_best_model)
             return self.grid_searched_best_model_list
@@ -300,11 +440,133 @@ class ModelFactory:
             logging.info(f'Error Occurred at {HousingException(e,sys)}')
             raise HousingException(e, sys)
 
+    @staticmethod
+    def get_search_name(initialized_model: InitializedModelDetail) -> str:
+        return f"{initialized_model.model_serial_number} {initialized_model.model_name}"
+
+    def record_search_metrics(self, initialized_model: InitializedModelDetail, search_metrics: StageMetrics):
+        self.search_wall_times[initialized_model.model_serial_number] = search_metrics.wall_seconds
+        logging.info(f"Parameter search of [{initialized_model.model_name}] "
+                     f"took {search_metrics.wall_seconds:.2f} seconds")
+        if self.instrumentation is not None:
+            self.instrumentation.record(search_metrics._replace(parent=self.instrumentation.get_current_stage()))
+
+    def initiate_parallel_parameter_search(self, initialized_model_list: List[InitializedModelDetail],
+                                           input_feature,
+                                           output_feature) -> List[GridSearchedBestModel]:
+        """
+        It runs the candidate searches concurrently in a pool of `max_workers` processes. The core
+        budget is split evenly between the concurrent searches so that the total number of busy cores
+        never exceeds `core_budget`. Results keep the order of `initialized_model_list`.
+
+        :param initialized_model_list: List[InitializedModelDetail]
+        :param input_feature: The input features
+        :param output_feature: The target variable
+        :return: a list of GridSearchedBestModel objects.
+        """
+        try:
+            max_workers = min(self.max_workers, len(initialized_model_list), self.core_budget)
+            n_jobs = max(1, self.core_budget // max_workers)
+            logging.info(f"Running {len(initialized_model_list)} parameter searches on {max_workers} "
+                         f"workers with {n_jobs} cores each")
+
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(execute_timed_grid_search_operation, self, initialized_model,
+                                           input_feature, output_feature, n_jobs)
+                           for initialized_model in initialized_model_list]
+                for initialized_model, future in zip(initialized_model_list, futures):
+                    grid_searched_best_model, search_metrics = future.result()
+                    self.record_search_metrics(initialized_model, search_metrics)
+                    self.grid_searched_best_model_list.append(grid_searched_best_model)
+            return self.grid_searched_best_model_list
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def get_racing_survivors(self, grid_searched_best_model_list: List[GridSearchedBestModel],
+                             base_accuracy: float) -> List[str]:
+        """
+        It returns the serial numbers of the candidates still in the race. A candidate is dropped when
+        the upper end of its confidence interval (mean CV score + z * standard error) is below the
+        leader's lower end or below `base_accuracy`, i.e. when it is statistically unable to win.
+
+        :param grid_searched_best_model_list: results of the current rung
+        :param base_accuracy: minimum accepted score
+        :return: serial numbers of the surviving candidates
+        """
+        try:
+            z = self.racing_confidence_z
+            leader = max(grid_searched_best_model_list, key=lambda model: model.best_score)
+            leader_lower_bound = leader.best_score - z * leader.best_score_standard_error
+
+            survivors = []
+            for grid_searched_best_model in grid_searched_best_model_list:
+                upper_bound = grid_searched_best_model.best_score + \
+                    z * grid_searched_best_model.best_score_standard_error
+                if grid_searched_best_model is leader or upper_bound >= max(leader_lower_bound, base_accuracy):
+                    survivors.append(grid_searched_best_model.model_serial_number)
+                else:
+                    self.racing_eliminated_models[grid_searched_best_model.model_serial_number] = float(
+                        grid_searched_best_model.best_score)
+                    logging.info(f"Racing dropped [{grid_searched_best_model.model_serial_number}] with "
+                                 f"score {grid_searched_best_model.best_score:.4f} (upper bound {upper_bound:.4f}) "
+                                 f"against leader [{leader.model_serial_number}] {leader.best_score:.4f}")
+            return survivors
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
+    def race_initialized_models(self, initialized_model_list: List[InitializedModelDetail],
+                                input_feature, output_feature, base_accuracy: float) -> List[InitializedModelDetail]:
+        """
+        It searches every candidate on a shared, progressively growing random subsample of the
+        training data (one rung per `sample_fractions` entry) and drops after each rung the candidates
+        that cannot catch up with the leader, so only the contenders reach the full data search.
+
+        :param initialized_model_list: List[InitializedModelDetail]
+        :param input_feature: The input features
+        :param output_feature: The target variable
+        :param base_accuracy: minimum accepted score
+        :return: the surviving initialized models
+        """
+        try:
+            n_rows = len(output_feature)
+            permutation = np.random.RandomState(self.racing_random_state).permutation(n_rows)
+
+            for fraction in self.racing_sample_fractions:
+                if fraction >= 1.0 or len(initialized_model_list) <= 1:
+                    break
+                sample_index = np.sort(permutation[:max(int(n_rows * fraction), 1)])
+                sample_input = input_feature.iloc[sample_index] if hasattr(input_feature, "iloc") \
+                    else input_feature[sample_index]
+                sample_output = output_feature.iloc[sample_index] if hasattr(output_feature, "iloc") \
+                    else output_feature[sample_index]
+
+                logging.info(f"Racing {len(initialized_model_list)} candidates on "
+                             f"{len(sample_index)} of {n_rows} rows")
+                rung_results = self.initiate_best_parameter_search_for_initialized_models(
+                    initialized_model_list=initialized_model_list,
+                    input_feature=sample_input,
+                    output_feature=sample_output)
+                survivors = self.get_racing_survivors(grid_searched_best_model_list=rung_results,
+                                                      base_accuracy=base_accuracy)
+                initialized_model_list = [initialized_model for initialized_model in initialized_model_list
+                                          if initialized_model.model_serial_number in survivors]
+            return initialized_model_list
+        except Exception as e:
+            logging.info(f'Error Occurred at {HousingException(e,sys)}')
+            raise HousingException(e, sys)
+
     def get_best_model(self, X, y, base_accuracy):
         try:
             logging.info('Started Initializing model from config File')
             initialized_model_list = self.get_initialized_model_list()
             logging.info(f'Initialized Models {initialized_model_list}')
+            if self.racing_enabled:
+                initialized_model_list = self.race_initialized_models(initialized_model_list=initialized_model_list,
+                                                                      input_feature=X,
+                                                                      output_feature=y,
+                                                                      base_accuracy=base_accuracy)
             grid_search_best_model = self.initiate_best_parameter_search_for_initialized_models(initialized_model_list=initialized_model_list,
                                                                                                 input_feature=X,
                                                                                                 output_feature=y)
@@ -316,6 +578,33 @@ class ModelFactory:
             raise HousingException(e, sys)
 
 
+def execute_timed_grid_search_operation(model_factory: ModelFactory,
+                                        initialized_model: InitializedModelDetail,
+                                        input_feature, output_feature, n_jobs: int):
+    """
+    Process pool entry point: runs one candidate search with BLAS/OpenMP threads capped to the cores
+    granted by the scheduler and returns it with the StageMetrics measured in the worker process.
+    """
+    with StageTimer(name=ModelFactory.get_search_name(initialized_model),
+                    row_count=len(output_feature)) as search_timer, threadpool_limits(limits=n_jobs):
+        grid_searched_best_model = model_factory.execute_grid_search_operation(initialized_model=initialized_model,
+                                                                               input_feature=input_feature,
+                                                                               output_feature=output_feature,
+                                                                               n_jobs=n_jobs)
+    return grid_searched_best_model, search_timer.metrics
+
+
+def keeps_fitted_parts(estimator) -> bool:
+    """
+    It tells whether an incremental update keeps the previously fitted parts of `estimator`:
+    `partial_fit` coefficients, or the estimators of a `warm_start` ensemble. Those parts only stay
+    valid while the preprocessing their inputs went through is left unchanged.
+    """
+    estimator_params = estimator.get_params()
+    return hasattr(estimator, "partial_fit") or ("warm_start" in estimator_params and
+                                                 "n_estimators" in estimator_params)
+
+
 def evaluate_regression_model(model_list: list,
                               X_train: np.ndarray,y_train: np.ndarray,
                               X_test: np.ndarray, y_test: np.ndarray,
@@ -0,0 +1,143 @@
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+from housing.entity.service_metrics import ServiceMetrics, Histogram
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 2.0
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class PredictionBatcher:
+
+    def __init__(self, predict_records, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, service_metrics: ServiceMetrics = None):
+        """
+        Coalesces concurrent single record predictions into batches. A batch is scored as soon as
+        `max_batch_size` records are queued or the oldest queued record has waited `max_wait_ms`.
+
+        :param predict_records: callable taking a list of record dicts and returning one prediction
+        per record, in order
+        :param max_batch_size: maximum number of records scored together
+        :param max_wait_ms: maximum time a record waits in the queue for others to join its batch
+        :param service_metrics: when enabled, the size of every batch and the queue wait of every
+        record are exported as histograms on its metrics
+        """
+        try:
+            self.predict_records = predict_records
+            self.max_batch_size = max_batch_size
+            self.max_wait_seconds = max_wait_ms / 1000.0
+            self._queue = queue.Queue()
+            self._worker = None
+            self._metrics_lock = threading.Lock()
+            self.batch_count = 0
+            self.record_count = 0
+            self.max_batch_size_seen = 0
+            self.queue_wait_seconds_total = 0.0
+            self.queue_wait_seconds_max = 0.0
+            self.batch_size_histogram = None
+            self.queue_wait_histogram = None
+            if service_metrics is not None and service_metrics.enabled:
+                namespace = service_metrics.namespace
+                self.batch_size_histogram = Histogram(f"{namespace}_prediction_batch_size",
+                                                      "Number of records scored together by the batcher.",
+                                                      buckets=BATCH_SIZE_BUCKETS)
+                self.queue_wait_histogram = Histogram(f"{namespace}_prediction_batch_queue_wait_seconds",
+                                                      "Time records waited in the batcher queue.")
+                service_metrics.register_metric(self.batch_size_histogram)
+                service_metrics.register_metric(self.queue_wait_histogram)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def submit(self, record: dict) -> Future:
+        """
+        It queues one record and returns a future resolved with its prediction.
+        """
+        future = Future()
+        self._queue.put((record, future, time.perf_counter()))
+        return future
+
+    def predict_record(self, record: dict, timeout: float = None):
+        try:
+            return self.submit(record).result(timeout=timeout)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def _collect_batch(self, first_item) -> list:
+        batch = [first_item]
+        deadline = first_item[2] + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first_item = self._queue.get()
+            if first_item is None:
+                return
+            batch = self._collect_batch(first_item)
+            dispatch_time = time.perf_counter()
+            try:
+                predictions = self.predict_records([record for record, _, _ in batch])
+                for (_, future, _), prediction in zip(batch, predictions):
+                    future.set_result(prediction)
+            except Exception as e:
+                logging.info(f"Batch prediction failed: {HousingException(e, sys)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            self._record_batch(batch=batch, dispatch_time=dispatch_time)
+
+    def _record_batch(self, batch: list, dispatch_time: float):
+        queue_waits = [dispatch_time - enqueue_time for _, _, enqueue_time in batch]
+        with self._metrics_lock:
+            self.batch_count += 1
+            self.record_count += len(batch)
+            self.max_batch_size_seen = max(self.max_batch_size_seen, len(batch))
+            self.queue_wait_seconds_total += sum(queue_waits)
+            self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, max(queue_waits))
+        if self.batch_size_histogram is not None:
+            # only the batcher thread updates the histograms
+            self.batch_size_histogram.observe(len(batch))
+            for queue_wait in queue_waits:
+                self.queue_wait_histogram.observe(queue_wait)
+
+    def get_metrics(self) -> dict:
+        """
+        It returns batch size and queue wait statistics since start.
+        """
+        with self._metrics_lock:
+            return {
+                "batch_count": self.batch_count,
+                "record_count": self.record_count,
+                "mean_batch_size": self.record_count / self.batch_count if self.batch_count else 0.0,
+                "max_batch_size": self.max_batch_size_seen,
+                "mean_queue_wait_ms": 1000.0 * self.queue_wait_seconds_total / self.record_count
+                if self.record_count else 0.0,
+                "max_queue_wait_ms": 1000.0 * self.queue_wait_seconds_max,
+                "queue_depth": self._queue.qsize(),
+            }
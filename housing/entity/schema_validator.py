@@ -0,0 +1,274 @@
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from housing.exception.exception import HousingException
+from housing.constant import *
+
+SchemaValidationReport = namedtuple("SchemaValidationReport", ["is_valid", "row_count",
+                                                               "missing_columns", "unknown_columns",
+                                                               "dtype_mismatches", "domain_violations",
+                                                               "range_violations", "null_rates",
+                                                               "null_rate_violations"])
+
+# number of offending values kept per column in a report
+MAX_REPORTED_VALUES = 10
+STRING_DTYPE_NAMES = {"object", "string", "str"}
+
+
+class SchemaValidator:
+
+    def __init__(self, dataset_schema: dict, include_target: bool = True):
+        """
+        Validates data against `config/schema.yaml`: exact column set, dtypes, domain values of every
+        categorical column, numeric ranges and null rates. The schema is compiled once into arrays and
+        sets so a chunk is checked with one vectorized pass per kind of check, and single records with
+        plain dict lookups.
+
+        :param dataset_schema: content of config/schema.yaml
+        :type dataset_schema: dict
+        :param include_target: whether the target column is expected, False on the prediction path
+        :type include_target: bool
+        """
+        try:
+            self.target_column = dataset_schema[TARGET_COLUMN_KEY]
+            self.column_dtypes = {column: str(dtype)
+                                  for column, dtype in dataset_schema[DATASET_SCHEMA_COLUMNS_KEY].items()
+                                  if include_target or column != self.target_column}
+            self.columns = list(self.column_dtypes)
+            self.column_set = set(self.columns)
+            self.numerical_columns = [column for column, dtype in self.column_dtypes.items()
+                                      if dtype not in STRING_DTYPE_NAMES]
+            self.categorical_columns = [column for column, dtype in self.column_dtypes.items()
+                                        if dtype in STRING_DTYPE_NAMES]
+
+            self.domain_values = {column: set(dataset_schema.get(DOMAIN_VALUE_KEY, {}).get(column) or [])
+                                  for column in self.categorical_columns
+                                  if column in dataset_schema.get(DOMAIN_VALUE_KEY, {})}
+
+            numerical_range = dataset_schema.get(NUMERICAL_RANGE_KEY, {})
+            self.lower_bounds = np.array([numerical_range.get(column, {}).get(RANGE_MIN_KEY, -np.inf)
+                                          for column in self.numerical_columns], dtype=float)
+            self.upper_bounds = np.array([numerical_range.get(column, {}).get(RANGE_MAX_KEY, np.inf)
+                                          for column in self.numerical_columns], dtype=float)
+
+            max_null_rate = dataset_schema.get(MAX_NULL_RATE_KEY, {})
+            self.max_null_rates = pd.Series({column: float(max_null_rate.get(column, 0.0))
+                                             for column in self.columns})
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_chunk_statistics(self, dataframe: pd.DataFrame, coerce_numeric: bool = False) -> dict:
+        """
+        It computes the mergeable statistics of one chunk that `validate` turns into a report.
+
+        :param dataframe: chunk to check
+        :param coerce_numeric: accept any numeric dtype, and strings holding numbers, for numerical
+        columns instead of requiring the exact schema dtype
+        """
+        try:
+            present_columns = [column for column in self.columns if column in dataframe.columns]
+            statistics = {
+                "row_count": len(dataframe),
+                "missing_columns": [column for column in self.columns if column not in dataframe.columns],
+                "unknown_columns": [column for column in dataframe.columns if column not in self.column_set],
+                "dtype_mismatches": {},
+                "domain_violations": {},
+                "range_violations": {},
+                "null_counts": {column: int(null_count)
+                                for column, null_count in dataframe[present_columns].isna().sum().items()},
+            }
+
+            for column in self.categorical_columns:
+                if column in dataframe.columns and not (pd.api.types.is_object_dtype(dataframe[column].dtype) or
+                                                        pd.api.types.is_string_dtype(dataframe[column].dtype)):
+                    statistics["dtype_mismatches"][column] = str(dataframe[column].dtype)
+
+            numerical_columns = [column for column in self.numerical_columns if column in dataframe.columns]
+            numerical_df = dataframe[numerical_columns]
+            for column, dtype in numerical_df.dtypes.items():
+                expected_dtype = self.column_dtypes[column]
+                if str(dtype) == expected_dtype or (coerce_numeric and pd.api.types.is_numeric_dtype(dtype)):
+                    continue
+                # non numeric values become NaN so the range check still covers the numeric ones
+                coerced = pd.to_numeric(numerical_df[column], errors="coerce")
+                numerical_df = numerical_df.assign(**{column: coerced})
+                if not coerce_numeric:
+                    statistics["dtype_mismatches"][column] = str(dtype)
+                    continue
+                invalid_values = dataframe[column][coerced.isna() & dataframe[column].notna()]
+                if len(invalid_values) > 0:
+                    statistics["dtype_mismatches"][column] = \
+                        f"{len(invalid_values)} non numeric values {invalid_values.unique()[:MAX_REPORTED_VALUES].tolist()}"
+
+            if numerical_columns:
+                column_indices = [self.numerical_columns.index(column) for column in numerical_columns]
+                values = numerical_df.to_numpy(dtype=float)
+                lower_bounds = self.lower_bounds[column_indices]
+                upper_bounds = self.upper_bounds[column_indices]
+                out_of_range_counts = ((values < lower_bounds) | (values > upper_bounds)).sum(axis=0)
+                for column_index in np.flatnonzero(out_of_range_counts):
+                    column_values = values[:, column_index]
+                    statistics["range_violations"][numerical_columns[column_index]] = {
+                        "count": int(out_of_range_counts[column_index]),
+                        "min": float(np.nanmin(column_values)),
+                        "max": float(np.nanmax(column_values)),
+                    }
+
+            for column, domain_value in self.domain_values.items():
+                if column not in dataframe.columns or not domain_value:
+                    continue
+                column_values = dataframe[column]
+                invalid_values = column_values[~column_values.isin(domain_value) & column_values.notna()]
+                if len(invalid_values) > 0:
+                    statistics["domain_violations"][column] = {
+                        "count": int(len(invalid_values)),
+                        "values": [str(value) for value in invalid_values.unique()[:MAX_REPORTED_VALUES]],
+                    }
+            return statistics
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def merge_chunk_statistics(statistics: dict, chunk_statistics: dict) -> dict:
+        """
+        It folds the statistics of one more chunk into `statistics`.
+        """
+        try:
+            if statistics is None:
+                return chunk_statistics
+            merged = {
+                "row_count": statistics["row_count"] + chunk_statistics["row_count"],
+                "missing_columns": sorted(set(statistics["missing_columns"]) | set(chunk_statistics["missing_columns"])),
+                "unknown_columns": sorted(set(statistics["unknown_columns"]) | set(chunk_statistics["unknown_columns"])),
+                "dtype_mismatches": {**statistics["dtype_mismatches"], **chunk_statistics["dtype_mismatches"]},
+                "null_counts": {column: statistics["null_counts"].get(column, 0) + null_count
+                                for column, null_count in chunk_statistics["null_counts"].items()},
+                "domain_violations": dict(statistics["domain_violations"]),
+                "range_violations": dict(statistics["range_violations"]),
+            }
+            for column, violation in chunk_statistics["domain_violations"].items():
+                previous = merged["domain_violations"].get(column, {"count": 0, "values": []})
+                merged["domain_violations"][column] = {
+                    "count": previous["count"] + violation["count"],
+                    "values": list(dict.fromkeys(previous["values"] + violation["values"]))[:MAX_REPORTED_VALUES],
+                }
+            for column, violation in chunk_statistics["range_violations"].items():
+                previous = merged["range_violations"].get(column)
+                if previous is not None:
+                    violation = {"count": previous["count"] + violation["count"],
+                                 "min": min(previous["min"], violation["min"]),
+                                 "max": max(previous["max"], violation["max"])}
+                merged["range_violations"][column] = violation
+            return merged
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_report(self, statistics: dict, check_null_rate: bool = True) -> SchemaValidationReport:
+        try:
+            row_count = statistics["row_count"]
+            null_rates = {column: null_count / row_count if row_count else 0.0
+                          for column, null_count in statistics["null_counts"].items()}
+            null_rate_violations = {}
+            if check_null_rate:
+                null_rate_violations = {column: null_rate for column, null_rate in null_rates.items()
+                                        if null_rate > self.max_null_rates[column]}
+            is_valid = not (statistics["missing_columns"] or statistics["unknown_columns"]
+                            or statistics["dtype_mismatches"] or statistics["domain_violations"]
+                            or statistics["range_violations"] or null_rate_violations)
+            return SchemaValidationReport(is_valid=is_valid,
+                                          row_count=row_count,
+                                          missing_columns=statistics["missing_columns"],
+                                          unknown_columns=statistics["unknown_columns"],
+                                          dtype_mismatches=statistics["dtype_mismatches"],
+                                          domain_violations=statistics["domain_violations"],
+                                          range_violations=statistics["range_violations"],
+                                          null_rates=null_rates,
+                                          null_rate_violations=null_rate_violations)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def validate(self, dataframe: pd.DataFrame, check_null_rate: bool = True,
+                 coerce_numeric: bool = False) -> SchemaValidationReport:
+        """
+        It validates one DataFrame.
+
+        :param dataframe: data to check
+        :param check_null_rate: compare null rates with `max_null_rate`, meaningless for a few rows
+        :param coerce_numeric: see `get_chunk_statistics`
+        :return: SchemaValidationReport
+        """
+        try:
+            return self.get_report(self.get_chunk_statistics(dataframe, coerce_numeric=coerce_numeric),
+                                   check_null_rate=check_null_rate)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def validate_chunks(self, chunks, check_null_rate: bool = True,
+                        coerce_numeric: bool = False) -> SchemaValidationReport:
+        """
+        It validates an iterable of DataFrame chunks, holding one chunk in memory at a time.
+        """
+        try:
+            statistics = None
+            for chunk in chunks:
+                statistics = self.merge_chunk_statistics(
+                    statistics, self.get_chunk_statistics(chunk, coerce_numeric=coerce_numeric))
+            if statistics is None:
+                statistics = self.get_chunk_statistics(pd.DataFrame(), coerce_numeric=coerce_numeric)
+            return self.get_report(statistics, check_null_rate=check_null_rate)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def validate_record(self, record: dict) -> SchemaValidationReport:
+        """
+        Fast path for one prediction record: the same checks as `validate` with plain dict lookups,
+        no DataFrame is built. Null rates are not checked.
+        """
+        try:
+            missing_columns = [column for column in self.columns if column not in record]
+            unknown_columns = [column for column in record if column not in self.column_set]
+            dtype_mismatches = {}
+            range_violations = {}
+            for column_index, column in enumerate(self.numerical_columns):
+                value = record.get(column)
+                if value is None:
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    dtype_mismatches[column] = f"non numeric value {value!r}"
+                    continue
+                if value < self.lower_bounds[column_index] or value > self.upper_bounds[column_index]:
+                    range_violations[column] = {"count": 1, "min": value, "max": value}
+            domain_violations = {column: {"count": 1, "values": [str(record[column])]}
+                                 for column, domain_value in self.domain_values.items()
+                                 if domain_value and record.get(column) is not None
+                                 and record[column] not in domain_value}
+            null_rates = {column: float(record.get(column) is None) for column in self.columns}
+            is_valid = not (missing_columns or unknown_columns or dtype_mismatches
+                            or domain_violations or range_violations)
+            return SchemaValidationReport(is_valid=is_valid,
+                                          row_count=1,
+                                          missing_columns=missing_columns,
+                                          unknown_columns=unknown_columns,
+                                          dtype_mismatches=dtype_mismatches,
+                                          domain_violations=domain_violations,
+                                          range_violations=range_violations,
+                                          null_rates=null_rates,
+                                          null_rate_violations={})
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    @staticmethod
+    def get_error_message(report: SchemaValidationReport) -> str:
+        """
+        It returns a one line summary of every failed check of `report`.
+        """
+        failures = [(name, getattr(report, name)) for name in ["missing_columns", "unknown_columns",
+                                                                "dtype_mismatches", "domain_violations",
+                                                                "range_violations", "null_rate_violations"]
+                    if getattr(report, name)]
+        return "; ".join(f"{name}: {value}" for name, value in failures)
@@ -0,0 +1,278 @@
+import sys
+import time
+import bisect
+import threading
+
+from housing.exception.exception import HousingException
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+COUNTER_METRIC_TYPE = "counter"
+GAUGE_METRIC_TYPE = "gauge"
+HISTOGRAM_METRIC_TYPE = "histogram"
+# seconds, from the compiled single record path up to a large batch
+DEFAULT_LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# phases of a prediction request
+FORM_PARSING_PHASE = "form_parsing"
+FRAME_BUILD_PHASE = "frame_build"
+MODEL_RESOLUTION_PHASE = "model_resolution"
+PREPROCESSING_PHASE = "preprocessing"
+PREDICT_PHASE = "predict"
+TEMPLATE_RENDER_PHASE = "template_render"
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class ShardedMetric:
+
+    def __init__(self, name: str, documentation: str, metric_type: str, label_names: tuple = (),
+                 value_size: int = 1):
+        """
+        Base of the lock-free metrics: every thread updates its own shard, a dict of label values to
+        a list of `value_size` numbers, so an update is a plain in-place addition that never waits.
+        Scraping sums the shards; shards of threads that have exited are folded into a retired total,
+        so threads created per request do not grow the metric without bound.
+
+        :param name: metric name
+        :param documentation: HELP text
+        :param metric_type: one of counter, gauge or histogram
+        :param label_names: names of the labels, their values are passed positionally on update
+        :param value_size: number of values kept per label set
+        """
+        try:
+            self.name = name
+            self.documentation = documentation
+            self.metric_type = metric_type
+            self.label_names = tuple(label_names)
+            self.value_size = value_size
+            self._local = threading.local()
+            # (thread, shard), appended by each thread on its first update
+            self._shards = []
+            self._retired = {}
+            # only taken when a thread creates its shard and while scraping
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_values(self, label_values: tuple) -> list:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+        values = shard.get(label_values)
+        if values is None:
+            values = shard[label_values] = [0] * self.value_size
+        return values
+
+    @staticmethod
+    def add_values(total: dict, shard: dict):
+        # list() copies the items in one step, the owning thread may be adding a label set meanwhile
+        for label_values, values in list(shard.items()):
+            total_values = total.get(label_values)
+            if total_values is None:
+                total[label_values] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    total_values[index] += value
+
+    def collect(self) -> dict:
+        """
+        :return: dict of label values to the values summed over all threads
+        """
+        try:
+            with self._lock:
+                live_shards = []
+                for thread, shard in self._shards:
+                    if thread.is_alive():
+                        live_shards.append((thread, shard))
+                    else:
+                        ShardedMetric.add_values(self._retired, shard)
+                self._shards = live_shards
+                total = {label_values: list(values) for label_values, values in self._retired.items()}
+                for _, shard in live_shards:
+                    ShardedMetric.add_values(total, shard)
+            return total
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def get_labels(self, label_values: tuple) -> dict:
+        return dict(zip(self.label_names, label_values))
+
+    def get_samples(self) -> list:
+        """
+        :return: list of (sample name, labels, value)
+        """
+        values_by_labels = self.collect()
+        if not values_by_labels and not self.label_names:
+            # an unlabelled metric is exposed before its first update
+            values_by_labels = {(): [0]}
+        return [(self.name, self.get_labels(label_values), values[0])
+                for label_values, values in sorted(values_by_labels.items())]
+
+
+class Counter(ShardedMetric):
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        super().__init__(name=name, documentation=documentation, metric_type=COUNTER_METRIC_TYPE,
+                         label_names=label_names)
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        self.get_values(label_values)[0] += amount
+
+
+class Gauge(ShardedMetric):
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        """
+        Gauge moved up and down by the threads, e.g. in-flight requests. The value is the sum of
+        all shards, so a thread may decrement what another thread incremented.
+        """
+        super().__init__(name=name, documentation=documentation, metric_type=GAUGE_METRIC_TYPE,
+                         label_names=label_names)
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        self.get_values(label_values)[0] += amount
+
+    def dec(self, label_values: tuple = (), amount: float = 1):
+        self.get_values(label_values)[0] -= amount
+
+
+class Histogram(ShardedMetric):
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (),
+                 buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        """
+        Histogram with fixed upper bounds. Each label set keeps one count per bucket, an overflow
+        count, the sum and the count; an observation is one bisect plus three additions.
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name=name, documentation=documentation, metric_type=HISTOGRAM_METRIC_TYPE,
+                         label_names=label_names, value_size=len(self.buckets) + 3)
+
+    def observe(self, value: float, label_values: tuple = ()):
+        values = self.get_values(label_values)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def get_samples(self) -> list:
+        samples = []
+        for label_values, values in sorted(self.collect().items()):
+            labels = self.get_labels(label_values)
+            cumulative_count = 0
+            for upper_bound, count in zip(self.buckets + (float("inf"),), values[:-2]):
+                cumulative_count += count
+                samples.append((f"{self.name}_bucket", dict(labels, le=format_value(float(upper_bound))),
+                                cumulative_count))
+            samples.append((f"{self.name}_sum", labels, values[-2]))
+            samples.append((f"{self.name}_count", labels, values[-1]))
+        return samples
+
+
+class ServiceMetrics:
+
+    def __init__(self, enabled: bool = True, namespace: str = "housing"):
+        """
+        Operational metrics of the prediction service in the Prometheus text format: request counts
+        and latencies, the latency of each prediction phase and the requests in flight. Components
+        owning other metrics, like the model cache of the predictor, register a collector called on
+        every scrape. Metrics are kept per process, each gunicorn worker is scraped on its own.
+
+        :param enabled: when False every update is a no-op and nothing is recorded
+        :type enabled: bool
+        :param namespace: prefix of the metric names
+        :type namespace: str
+        """
+        try:
+            self.enabled = enabled
+            self.namespace = namespace
+            self.requests = Counter(f"{namespace}_http_requests_total", "HTTP requests handled.",
+                                    label_names=("endpoint", "method", "status"))
+            self.request_latency = Histogram(f"{namespace}_http_request_duration_seconds",
+                                             "Latency of the HTTP requests.", label_names=("endpoint",))
+            self.requests_in_flight = Gauge(f"{namespace}_http_requests_in_flight",
+                                            "HTTP requests being handled.")
+            self.phase_latency = Histogram(f"{namespace}_prediction_phase_duration_seconds",
+                                           "Latency of the phases of the prediction requests.",
+                                           label_names=("phase",))
+            self.metrics = [self.requests, self.request_latency, self.requests_in_flight, self.phase_latency]
+            self.collectors = []
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def observe_phase(self, phase: str, start_time: float) -> float:
+        """
+        It records the time elapsed since `start_time` for `phase`.
+
+        :param phase: one of the *_PHASE names
+        :param start_time: `time.perf_counter()` when the phase started
+        :return: the current `time.perf_counter()`, the start time of the next phase
+        """
+        now = time.perf_counter()
+        if self.enabled:
+            self.phase_latency.observe(now - start_time, (phase,))
+        return now
+
+    def start_request(self):
+        if self.enabled:
+            self.requests_in_flight.inc()
+
+    def finish_request(self, endpoint: str, method: str, status: int, start_time: float):
+        if self.enabled:
+            self.requests_in_flight.dec()
+            self.requests.inc((endpoint, method, str(status)))
+            self.request_latency.observe(time.perf_counter() - start_time, (endpoint,))
+
+    def register_metric(self, metric: ShardedMetric):
+        """
+        It adds a metric owned and updated by another component, like the batch sizes of the
+        prediction batcher, to the rendered metrics.
+        """
+        self.metrics.append(metric)
+
+    def register_collector(self, collector):
+        """
+        :param collector: callable returning a list of (name, metric type, documentation, samples),
+        samples being a list of (labels dict, value)
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        It returns all metrics in the Prometheus text exposition format.
+        """
+        try:
+            families = [(metric.name, metric.metric_type, metric.documentation, metric.get_samples())
+                        for metric in self.metrics]
+            for collector in self.collectors:
+                families.extend((name, metric_type, documentation,
+                                 [(name, labels, value) for labels, value in samples])
+                                for name, metric_type, documentation, samples in collector())
+
+            lines = []
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{sample_name}{format_labels(labels)} {format_value(value)}"
+                             for sample_name, labels, value in samples)
+            return "\n".join(lines) + "\n"
+        except Exception as e:
+            raise HousingException(e, sys) from e
@@ -25,18 +25,32 @@ def error_message_detail(error, error_detail: sys):
     return error_message
 
 
+def get_error_message(error: Exception) -> str:
+    """
+    It returns the message of the error wrapped by nested HousingExceptions, without their tracebacks.
+    """
+    while isinstance(error, HousingException) and error.args:
+        error = error.args[0]
+    return str(error)
+
+
 class HousingException(Exception):
-    def __init__(self, error_message, error_detail: sys):
+    def __init__(self, error_message, error_detail: sys = None):
         """
         A constructor function that initializes the class.
 
         :param error_message: The error message that will be displayed to the user
-        :param error_detail: This is the error message that you want to display
+        :param error_detail: This is the error message that you want to display, None when
+        `error_message` already is the detailed message
         :type error_detail: sys
         """
         super().__init__(error_message)
         self.error_message = error_message_detail(
-            error_message, error_detail=error_detail)
+            error_message, error_detail=error_detail) if error_detail is not None else str(error_message)
+
+    def __reduce__(self):
+        # raised in process pool workers: the root message is sent back with the detailed one as state
+        return HousingException, (get_error_message(self),), {"error_message": self.error_message}
 
     def __str__(self):
         return self.error_message
@@ -6,11 +6,12 @@ import uuid
 
 from threading import Thread
 from housing.config.configuration import Configuration
-from housing.exception.exception import HousingException
+from housing.exception.exception import HousingException, get_error_message
 from housing.logger.logger import logging
 
 from housing.constant import *
-from housing.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact
+from housing.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact, \
+    IncrementalTrainingState
 from housing.entity.config_entity import DataIngestionConfig, DataTransformationConfig, DataValidationConfig, ModelTrainerConfig, ModelEvaluationConfig
 from housing.component.data_ingestion import DataIngestion
 from housing.component.data_validation import DataValidation
@@ -18,6 +19,16 @@ from housing.component.data_transformation import DataTransformation
 from housing.component.model_trainer import ModelTrainer
 from housing.component.model_evaluation import ModelEvaluation
 from housing .component.model_pusher import ModelPusher
+from housing.entity.artifact_cache import ArtifactCache
+from housing.entity.artifact_store import ArtifactStore
+from housing.entity.model_factory import ModelFactory
+from housing.entity.housing_estimator import HousingEstimatorModel
+from housing.entity.data_drift import DataDriftDetector
+from housing.entity.schema_validator import SchemaValidator
+from housing.entity.experiment_store import ExperimentStore, EXPERIMENT_COLUMNS
+from housing.entity.instrumentation import Instrumentation
+from housing.util.util import get_file_hash, load_object, load_numpy_array_data, read_yaml_file, \
+    write_yaml_file_atomically
 
 Experiment = namedtuple("Experiment", ["experiment_id", "initialization_timestamp", "artifact_time_stamp",
                                        "running_status", "start_time", "stop_time", "execution_time", "message",
@@ -30,25 +41,154 @@ class Pipeline(Thread):
                                         experiment_file_path=None, accuracy=None, is_model_accepted=None
                                         )
     experiment_file_path = None
+    experiment_store: ExperimentStore = None
 
-    def __init__(self, config: Configuration = Configuration()) -> None:
+    def __init__(self, config: Configuration = None) -> None:
         """
         The function takes in a configuration object and sets it to the class variable config
 
-        :param config: Configuration = Configuration()
+        :param config: Configuration, read from config/config.yaml when not given
         :type config: Configuration
         """
         try:
+            if config is None:
+                config = Configuration()
             os.makedirs(
                 config.training_pipeline_config.artifact_dir, exist_ok=True)
-            Pipeline.experiment_file_path = os.path.join(
+            Pipeline.experiment_file_path = config.training_pipeline_config.experiment_store_file_path
+            Pipeline.experiment_store = ExperimentStore(db_file_path=Pipeline.experiment_file_path)
+            legacy_experiment_file_path = os.path.join(
                 config.training_pipeline_config.artifact_dir, EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME)
+            if os.path.exists(legacy_experiment_file_path) and Pipeline.experiment_store.get_experiment_count() == 0:
+                Pipeline.experiment_store.import_experiment_csv(csv_file_path=legacy_experiment_file_path)
             super().__init__(daemon=False, name="pipeline")
             self.config = config
+            self.artifact_cache = None
+            if config.training_pipeline_config.artifact_cache_dir is not None:
+                self.artifact_cache = ArtifactCache(
+                    cache_dir=config.training_pipeline_config.artifact_cache_dir)
+            self.artifact_store = ArtifactStore(enabled=config.training_pipeline_config.in_memory_handoff)
+            self.incremental_state = None
+            # seconds spent in each stage of the current run
+            self.stage_durations = {}
+            self.instrumentation = Instrumentation(trace_memory=config.training_pipeline_config.trace_memory)
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
+    def get_incremental_state(self) -> IncrementalTrainingState:
+        """
+        It returns the state recorded by the last accepted run when incremental training is enabled
+        and that run can be continued, otherwise None and the pipeline trains from scratch.
+        :return: IncrementalTrainingState or None
+        """
+        try:
+            incremental_state_file_path = self.config.training_pipeline_config.incremental_state_file_path
+            if incremental_state_file_path is None or not os.path.exists(incremental_state_file_path):
+                return None
+
+            incremental_state_info = read_yaml_file(file_path=incremental_state_file_path)
+            if set(IncrementalTrainingState._fields) - set(incremental_state_info):
+                logging.info(f"Incremental state [{incremental_state_file_path}] is outdated, training from scratch")
+                return None
+
+            incremental_state = IncrementalTrainingState(**incremental_state_info)
+            for file_path in [incremental_state.preprocessed_object_file_path,
+                              incremental_state.trained_model_file_path,
+                              incremental_state.train_file_path,
+                              incremental_state.test_file_path]:
+                if not os.path.exists(file_path):
+                    logging.info(f"Incremental state is stale, [{file_path}] is missing, training from scratch")
+                    return None
+
+            logging.info(f"Training incrementally from {incremental_state}")
+            return incremental_state
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def save_incremental_state(self, data_ingestion_artifact: DataIngestionArtifact,
+                               data_transformation_artifact: DataTransformationArtifact,
+                               model_trainer_artifact: ModelTrainerArtifact):
+        """
+        It records the raw rows, ingested splits, preprocessing object and model of an accepted run as
+        the starting point of the next incremental run.
+        """
+        try:
+            incremental_state_file_path = self.config.training_pipeline_config.incremental_state_file_path
+            if incremental_state_file_path is None:
+                return
+
+            incremental_state = IncrementalTrainingState(
+                raw_row_count=int(data_ingestion_artifact.raw_row_count),
+                preprocessed_object_file_path=data_transformation_artifact.preprocessed_object_file_path,
+                trained_model_file_path=model_trainer_artifact.trained_model_file_path,
+                train_file_path=data_ingestion_artifact.train_file_path,
+                test_file_path=data_ingestion_artifact.test_file_path,
+                train_row_count=len(load_numpy_array_data(
+                    data_transformation_artifact.transformed_train_target_file_path, mmap_mode='r')))
+            write_yaml_file_atomically(file_path=incremental_state_file_path, data=incremental_state._asdict())
+            logging.info(f"Saved incremental state {incremental_state}")
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def run_cached_stage(self, stage_name: str, get_fingerprint_inputs, artifact_type, run_stage):
+        """
+        It runs a pipeline stage through the artifact cache: when a previous run recorded an artifact
+        for the same input fingerprint, that artifact is returned and the stage is skipped.
+
+        :param stage_name: name of the stage, used as cache namespace
+        :param get_fingerprint_inputs: callable returning the dict of stage inputs to fingerprint
+        :param artifact_type: namedtuple class of the stage artifact
+        :param run_stage: callable running the stage and returning its artifact
+        :return: the stage artifact
+        """
+        try:
+            if self.artifact_cache is None:
+                return run_stage()
+
+            fingerprint = ArtifactCache.get_fingerprint(get_fingerprint_inputs())
+            artifact = self.artifact_cache.get_artifact(stage_name=stage_name,
+                                                        fingerprint=fingerprint,
+                                                        artifact_type=artifact_type)
+            if artifact is None:
+                artifact = run_stage()
+                self.artifact_cache.save_artifact(stage_name=stage_name,
+                                                  fingerprint=fingerprint,
+                                                  artifact=artifact)
+            return artifact
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys)
+
+    def run_timed_stage(self, stage_name: str, start_stage, get_row_count=None, **kwargs):
+        """
+        It runs a stage under the instrumentation, which records its wall and CPU time, memory peaks
+        and rows processed, and saves the progress of the experiment.
+
+        :param stage_name: one of `EXPERIMENT_STAGE_NAMES`
+        :param start_stage: the `start_*` method of the stage, called with `kwargs`
+        :param get_row_count: callable returning the number of rows the stage processed from its artifact
+        :return: the stage artifact
+        """
+        try:
+            with self.instrumentation.measure(name=stage_name) as stage_timer:
+                artifact = start_stage(**kwargs)
+                if get_row_count is not None:
+                    stage_timer.row_count = get_row_count(artifact)
+            return artifact
+        finally:
+            self.stage_durations[stage_name] = stage_timer.metrics.wall_seconds
+            self.save_experiment()
+
+    def get_ingested_row_count(self, data_ingestion_artifact: DataIngestionArtifact) -> int:
+        """
+        It returns the number of rows ingested by this run, the new rows only when training incrementally.
+        """
+        previous_row_count = self.incremental_state.raw_row_count if self.incremental_state is not None else 0
+        return data_ingestion_artifact.raw_row_count - previous_row_count
+
     def start_data_ingestion(self) -> DataIngestionArtifact:
         """
         It takes in a config object, creates a data ingestion object, and then initiates the data
@@ -57,7 +197,10 @@ class Pipeline(Thread):
         """
         try:
             data_ingestion = DataIngestion(
-                data_ingestion_config=self.config.get_data_ingestion_config())
+                data_ingestion_config=self.config.get_data_ingestion_config(),
+                artifact_cache=self.artifact_cache,
+                artifact_store=self.artifact_store,
+                incremental_state=self.incremental_state)
 
             return data_ingestion.initiate_data_ingestion()
         except Exception as e:
@@ -73,10 +216,25 @@ class Pipeline(Thread):
         :type data_ingestion_artifact: DataIngestionArtifact
         """
         try:
-            data_validation = DataValidation(data_validation_config=self.config.get_data_validation_config(
-            ), data_ingestion_artifact=data_ingestion_artifact)
-
-            return data_validation.initiate_data_validation()
+            data_validation_config = self.config.get_data_validation_config()
+            data_validation = DataValidation(data_validation_config=data_validation_config,
+                                             data_ingestion_artifact=data_ingestion_artifact,
+                                             artifact_store=self.artifact_store)
+
+            return self.run_cached_stage(
+                stage_name=DATA_VALIDATION_ARTIFACT_DIR_NAME,
+                get_fingerprint_inputs=lambda: {
+                    "train_file": get_file_hash(data_ingestion_artifact.train_file_path),
+                    "test_file": get_file_hash(data_ingestion_artifact.test_file_path),
+                    "schema_file": get_file_hash(data_validation_config.schema_file_path),
+                    "drift_settings": {key: value for key, value in data_validation_config._asdict().items()
+                                       if not key.endswith("_path")},
+                    "code_version": ArtifactCache.get_code_version(sys.modules[DataValidation.__module__],
+                                                                   sys.modules[DataDriftDetector.__module__],
+                                                                   sys.modules[SchemaValidator.__module__])
+                },
+                artifact_type=DataValidationArtifact,
+                run_stage=data_validation.initiate_data_validation)
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
@@ -93,11 +251,26 @@ class Pipeline(Thread):
         :return: DataValidationArtifact
         """
         try:
-            data_transformation = DataTransformation(data_transformation_config=self.config.get_data_transformation_config(),
+            data_transformation_config = self.config.get_data_transformation_config()
+            data_transformation = DataTransformation(data_transformation_config=data_transformation_config,
                                                      data_ingestion_artifact=data_ingestion_artifact,
-                                                     data_validation_artifact=data_validation_artifact)
-
-            return data_transformation.initiate_data_transformation()
+                                                     data_validation_artifact=data_validation_artifact,
+                                                     artifact_store=self.artifact_store,
+                                                     incremental_state=self.incremental_state)
+
+            return self.run_cached_stage(
+                stage_name=DATA_TRANSFORMATION_ARTIFACT_DIR_KEY,
+                get_fingerprint_inputs=lambda: {
+                    "train_file": get_file_hash(data_ingestion_artifact.train_file_path),
+                    "test_file": get_file_hash(data_ingestion_artifact.test_file_path),
+                    "schema_file": get_file_hash(data_validation_artifact.schema_file_path),
+                    "add_bedroom_per_room": data_transformation_config.add_bedroom_per_room,
+                    "incremental_state": None if self.incremental_state is None else self.incremental_state._asdict(),
+                    "code_version": ArtifactCache.get_code_version(sys.modules[DataTransformation.__module__],
+                                                                   sys.modules[HousingEstimatorModel.__module__])
+                },
+                artifact_type=DataTransformationArtifact,
+                run_stage=data_transformation.initiate_data_transformation)
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
@@ -115,10 +288,35 @@ class Pipeline(Thread):
         :return: an instance of the `ModelTrainerArtifact` class.
         """
         try:
-            model_trainer = ModelTrainer(model_trainer_config=self.config.get_model_trainer_config(),
-                                         data_transformation_artifact=data_transformation_artifact
+            model_trainer_config = self.config.get_model_trainer_config()
+            model_trainer = ModelTrainer(model_trainer_config=model_trainer_config,
+                                         data_transformation_artifact=data_transformation_artifact,
+                                         artifact_store=self.artifact_store,
+                                         incremental_state=self.incremental_state,
+                                         instrumentation=self.instrumentation
                                          )
-            return model_trainer.initiate_model_trainer()
+            return self.run_cached_stage(
+                stage_name=MODEL_TRAINER_ARTIFACT_DIR,
+                get_fingerprint_inputs=lambda: {
+                    "transformed_train_file": get_file_hash(data_transformation_artifact.transformed_train_file_path),
+                    "transformed_test_file": get_file_hash(data_transformation_artifact.transformed_test_file_path),
+                    "transformed_train_target_file": get_file_hash(
+                        data_transformation_artifact.transformed_train_target_file_path),
+                    "transformed_test_target_file": get_file_hash(
+                        data_transformation_artifact.transformed_test_target_file_path),
+                    "preprocessed_object_file": get_file_hash(
+                        data_transformation_artifact.preprocessed_object_file_path),
+                    "model_config_file": get_file_hash(model_trainer_config.model_config_file_path),
+                    "base_accuracy": model_trainer_config.base_accuracy,
+                    "incremental_estimators": model_trainer_config.incremental_estimators,
+                    "model_file_format": model_trainer_config.model_file_format,
+                    "incremental_state": None if self.incremental_state is None else self.incremental_state._asdict(),
+                    "code_version": ArtifactCache.get_code_version(sys.modules[ModelTrainer.__module__],
+                                                                   sys.modules[ModelFactory.__module__],
+                                                                   sys.modules[HousingEstimatorModel.__module__])
+                },
+                artifact_type=ModelTrainerArtifact,
+                run_stage=model_trainer.initiate_model_trainer)
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
@@ -150,14 +348,16 @@ class Pipeline(Thread):
                 model_evaluation_config=self.config.get_model_evaluation_config(),
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_validation_artifact=data_validation_artifact,
-                model_trainer_artifact=model_trainer_artifact
+                model_trainer_artifact=model_trainer_artifact,
+                artifact_store=self.artifact_store
             )
             return model_evaluator.initiate_model_evaluation()
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
-    def start_model_pusher(self, model_evaluation_artifact: ModelEvaluationArtifact):
+    def start_model_pusher(self, model_evaluation_artifact: ModelEvaluationArtifact,
+                           data_validation_artifact: DataValidationArtifact = None):
         """
         This function initiates a model pusher with a given configuration and model evaluation artifact.
 
@@ -166,13 +366,17 @@ class Pipeline(Thread):
         such as the model file path, evaluation metrics, and any additional metadata. This object is
         used by the ModelPusher class to push the model to a deployment environment
         :type model_evaluation_artifact: ModelEvaluationArtifact
+        :param data_validation_artifact: its drift reference profile is exported with the model
+        :type data_validation_artifact: DataValidationArtifact
         :return: The method is returning the result of calling the `initiate_model_pusher()` method of
         an instance of the `ModelPusher` class.
         """
         try:
             model_pusher = ModelPusher(
                 model_pusher_config=self.config.get_model_pusher_config(),
-                model_evaluation_artifact=model_evaluation_artifact
+                model_evaluation_artifact=model_evaluation_artifact,
+                reference_profile_file_path=data_validation_artifact.reference_profile_file_path
+                if data_validation_artifact is not None else None
             )
             return model_pusher.initiate_model_pusher()
         except Exception as e:
@@ -192,6 +396,8 @@ class Pipeline(Thread):
             logging.info("Pipeline starting.")
 
             experiment_id = str(uuid.uuid4())
+            self.stage_durations = {}
+            self.instrumentation.clear()
 
             Pipeline.experiment = Experiment(experiment_id=experiment_id,
                                              initialization_timestamp=self.config.time_stamp,
@@ -209,24 +415,54 @@ class Pipeline(Thread):
 
             self.save_experiment()
 
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(
+            self.incremental_state = self.get_incremental_state()
+
+            data_ingestion_artifact = self.run_timed_stage("data_ingestion", self.start_data_ingestion,
+                                                           get_row_count=self.get_ingested_row_count)
+            if not data_ingestion_artifact.is_ingested:
+                logging.info(f"Pipeline stopped: {data_ingestion_artifact.message}")
+                stop_time = datetime.now()
+                Pipeline.experiment = Pipeline.experiment._replace(running_status=False,
+                                                                   stop_time=stop_time,
+                                                                   execution_time=stop_time - Pipeline.experiment.start_time,
+                                                                   message=data_ingestion_artifact.message)
+                self.save_experiment()
+                return Pipeline.experiment
+
+            # the splits hold every row trained on so far, also when training incrementally
+            data_validation_artifact = self.run_timed_stage(
+                "data_validation", self.start_data_validation,
+                get_row_count=lambda artifact: data_ingestion_artifact.raw_row_count,
                 data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
+            data_transformation_artifact = self.run_timed_stage(
+                "data_transformation", self.start_data_transformation,
+                get_row_count=lambda artifact: data_ingestion_artifact.raw_row_count,
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_validation_artifact=data_validation_artifact
             )
-            model_trainer_artifact = self.start_model_trainer(
-                data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(model_trainer_artifact=model_trainer_artifact,
-                                                                    data_ingestion_artifact=data_ingestion_artifact,
-                                                                    data_validation_artifact=data_validation_artifact)
+            model_trainer_artifact = self.run_timed_stage(
+                "model_trainer", self.start_model_trainer,
+                get_row_count=lambda artifact: len(load_numpy_array_data(
+                    data_transformation_artifact.transformed_train_target_file_path, mmap_mode='r')),
+                data_transformation_artifact=data_transformation_artifact)
+            model_evaluation_artifact = self.run_timed_stage(
+                "model_evaluation", self.start_model_evaluation,
+                get_row_count=lambda artifact: len(load_numpy_array_data(
+                    data_transformation_artifact.transformed_test_target_file_path, mmap_mode='r')),
+                model_trainer_artifact=model_trainer_artifact,
+                data_ingestion_artifact=data_ingestion_artifact,
+                data_validation_artifact=data_validation_artifact)
             print(model_evaluation_artifact)
 
             if model_evaluation_artifact.is_model_accepted:
-                model_pusher_artifact = self.start_model_pusher(
-                    model_evaluation_artifact=model_evaluation_artifact)
+                model_pusher_artifact = self.run_timed_stage(
+                    "model_pusher", self.start_model_pusher,
+                    model_evaluation_artifact=model_evaluation_artifact,
+                    data_validation_artifact=data_validation_artifact)
                 logging.info(f'Model pusher artifact: {model_pusher_artifact}')
+                self.save_incremental_state(data_ingestion_artifact=data_ingestion_artifact,
+                                            data_transformation_artifact=data_transformation_artifact,
+                                            model_trainer_artifact=model_trainer_artifact)
             else:
                 logging.info("Trained model rejected.")
             logging.info("Pipeline completed.")
@@ -248,6 +484,14 @@ class Pipeline(Thread):
             self.save_experiment()
 
         except Exception as e:
+            if Pipeline.experiment.running_status:
+                # the failed run is recorded and does not block the next one
+                stop_time = datetime.now()
+                Pipeline.experiment = Pipeline.experiment._replace(running_status=False,
+                                                                   stop_time=stop_time,
+                                                                   execution_time=stop_time - Pipeline.experiment.start_time,
+                                                                   message=f"Pipeline has failed: {get_error_message(e)}")
+                self.save_experiment()
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
 
@@ -261,32 +505,21 @@ class Pipeline(Thread):
         except Exception as e:
             logging.info(f"Error Occurred at {HousingException(e,sys)}")
             raise HousingException(e, sys)
+        finally:
+            # live objects are only shared within one run
+            self.artifact_store.clear()
 
     def save_experiment(self):
         """
-        This function saves experiment data to a CSV file.
+        This function upserts the experiment row, with the stage durations and metrics so far, in the
+        experiment store.
         """
         try:
             if Pipeline.experiment.experiment_id is not None:
-                experiment = Pipeline.experiment
-                experiment_dict = experiment._asdict()
-                experiment_dict: dict = {key: [value]
-                                         for key, value in experiment_dict.items()}
-
-                experiment_dict.update({
-                    "created_time_stamp": [datetime.now()],
-                    "experiment_file_path": [os.path.basename(Pipeline.experiment.experiment_file_path)]})
-
-                experiment_report = pd.DataFrame(experiment_dict)
-
-                os.makedirs(os.path.dirname(
-                    Pipeline.experiment_file_path), exist_ok=True)
-                if os.path.exists(Pipeline.experiment_file_path):
-                    experiment_report.to_csv(
-                        Pipeline.experiment_file_path, index=False, header=False, mode="a")
-                else:
-                    experiment_report.to_csv(
-                        Pipeline.experiment_file_path, mode="w", index=False, header=True)
+                Pipeline.experiment_store.save_experiment(experiment=Pipeline.experiment,
+                                                          stage_durations=self.stage_durations)
+                Pipeline.experiment_store.save_stage_metrics(experiment_id=Pipeline.experiment.experiment_id,
+                                                             stage_metrics=self.instrumentation.get_metrics())
             else:
                 print("First start experiment")
 
@@ -297,25 +530,24 @@ class Pipeline(Thread):
     @classmethod
     def get_experiments_status(cls, limit: int = 5) -> pd.DataFrame:
         """
-        This function reads a CSV file containing experiment data and returns a pandas DataFrame with
-        the most recent experiments up to a specified limit.
+        This function reads the most recent experiments, up to a specified limit, from the experiment
+        store and returns them as a pandas DataFrame.
 
         :param cls: The parameter `cls` is a reference to the class itself. It is commonly used in class
         methods to access class-level variables or methods
         :param limit: The limit parameter is an integer that specifies the number of most recent
-        experiments to retrieve from the experiment file. If not specified, the default value is 5,
+        experiments to retrieve from the experiment store. If not specified, the default value is 5,
         defaults to 5
         :type limit: int (optional)
         :return: A pandas DataFrame containing the status of the experiments, with a limit on the number
         of rows returned. The columns "experiment_file_path" and "initialization_timestamp" are dropped
-        from the DataFrame. If the experiment file path does not exist, an empty DataFrame is returned.
+        from the DataFrame. If no pipeline was created yet, an empty DataFrame is returned.
         If an error occurs, a HousingException is raised with the error message and system information.
         """
         try:
-            if os.path.exists(Pipeline.experiment_file_path):
-                df = pd.read_csv(Pipeline.experiment_file_path)
-                limit = -1 * int(limit)
-                return df[limit:].drop(columns=["experiment_file_path", "initialization_timestamp"], axis=1)
+            if Pipeline.experiment_store is not None:
+                df = pd.DataFrame(Pipeline.experiment_store.get_experiments(limit=limit), columns=EXPERIMENT_COLUMNS)
+                return df.drop(columns=["experiment_file_path", "initialization_timestamp"])
             else:
                 return pd.DataFrame()
         except Exception as e:
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import multiprocessing
+
+from housing.constant import get_current_time_stamp
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+from housing.config.configuration import Configuration
+from housing.entity.job_queue import JobQueue, RetrainingJob, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED
+
+DEFAULT_POLL_INTERVAL_SECONDS = 2.0
+# seconds a cancelled job gets to exit after SIGTERM before it is killed
+CANCEL_GRACE_SECONDS = 10.0
+
+
+def run_retraining_job(job_queue_file_path: str, job_id: str):
+    """
+    Entry point of the child process of one job: it runs a whole training pipeline and records its
+    outcome. A crash of the process is recorded by the worker from the exit code instead.
+    """
+    # the worker's handlers are inherited on fork, terminating the job must stop it
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    job_queue = JobQueue(db_file_path=job_queue_file_path)
+    try:
+        from housing.pipeline.pipeline import Pipeline
+
+        pipeline = Pipeline(config=Configuration(current_time_stamp=get_current_time_stamp()))
+        pipeline.run()
+        experiment = Pipeline.experiment
+        job_queue.finish_job(job_id=job_id, status=JOB_SUCCEEDED,
+                             message=f"Experiment [{experiment.experiment_id}]: {experiment.message}")
+    except Exception as e:
+        logging.info(f"Error Occurred at {HousingException(e,sys)}")
+        job_queue.finish_job(job_id=job_id, status=JOB_FAILED, message=str(e))
+        sys.exit(1)
+
+
+class RetrainingWorker:
+
+    def __init__(self, job_queue: JobQueue, max_concurrent_jobs: int = 1,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS):
+        """
+        Runs the retraining jobs of `job_queue` out of the web process. Every job runs in its own
+        child process, so training never competes with serving threads for the GIL, a job can be
+        cancelled by terminating its process, and a crashing job can not take the worker down.
+
+        :param job_queue: queue the jobs are claimed from
+        :type job_queue: JobQueue
+        :param max_concurrent_jobs: maximum number of jobs running at once, across all workers
+        :type max_concurrent_jobs: int
+        :param poll_interval: seconds between two polls of the queue
+        :type poll_interval: float
+        """
+        try:
+            self.job_queue = job_queue
+            self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+            self.poll_interval = poll_interval
+            # job_id -> child process
+            self.processes = {}
+            self.is_stopping = False
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def start_job(self, job: RetrainingJob):
+        try:
+            process = multiprocessing.Process(target=run_retraining_job,
+                                              args=(self.job_queue.db_file_path, job.job_id),
+                                              name=f"retraining-{job.job_id}")
+            process.start()
+            self.job_queue.set_process_pid(job_id=job.job_id, process_pid=process.pid)
+            self.processes[job.job_id] = process
+            logging.info(f"Retraining job [{job.job_id}] started in process [{process.pid}]")
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def stop_process(self, process: multiprocessing.Process):
+        process.terminate()
+        process.join(CANCEL_GRACE_SECONDS)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def poll_running_jobs(self):
+        """
+        It stops the jobs whose cancellation was requested and records the jobs whose process
+        exited without recording an outcome.
+        """
+        try:
+            for job_id, process in list(self.processes.items()):
+                job = self.job_queue.get_job(job_id)
+                if process.is_alive() and job.cancel_requested:
+                    logging.info(f"Cancelling retraining job [{job_id}]")
+                    self.stop_process(process)
+                    self.job_queue.finish_job(job_id=job_id, status=JOB_CANCELLED, message="Job was cancelled.")
+                if not process.is_alive():
+                    process.join()
+                    self.job_queue.finish_job(job_id=job_id, status=JOB_FAILED,
+                                              message=f"Job process exited with code {process.exitcode}.")
+                    del self.processes[job_id]
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def claim_jobs(self):
+        try:
+            while len(self.processes) < self.max_concurrent_jobs:
+                job = self.job_queue.claim_next_job(worker_pid=os.getpid(),
+                                                    max_concurrent_jobs=self.max_concurrent_jobs)
+                if job is None:
+                    return
+                self.start_job(job)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def stop(self, *args):
+        self.is_stopping = True
+
+    def run(self, once: bool = False):
+        """
+        It claims and runs jobs until stopped. On SIGTERM or SIGINT the running jobs are terminated
+        and put back in the queue for the next worker.
+
+        :param once: return as soon as the queue is empty and no job is running
+        """
+        try:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+            self.job_queue.requeue_orphaned_jobs()
+            logging.info(f"Retraining worker [{os.getpid()}] started, "
+                         f"max concurrent jobs [{self.max_concurrent_jobs}]")
+            while not self.is_stopping:
+                self.poll_running_jobs()
+                self.claim_jobs()
+                if once and not self.processes:
+                    break
+                time.sleep(self.poll_interval)
+
+            if self.processes:
+                for process in self.processes.values():
+                    self.stop_process(process)
+                self.job_queue.requeue_jobs(job_ids=list(self.processes),
+                                            message="Job was requeued after its worker stopped.")
+                self.processes.clear()
+            logging.info(f"Retraining worker [{os.getpid()}] stopped")
+        except Exception as e:
+            logging.info(f"Error Occurred at {HousingException(e,sys)}")
+            raise HousingException(e, sys) from e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the queued retraining jobs.")
+    parser.add_argument("--max-concurrent-jobs", type=int, default=None,
+                        help="defaults to training_pipeline_config.max_concurrent_jobs")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL_SECONDS,
+                        help="seconds between two polls of the queue")
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args(argv)
+
+    training_pipeline_config = Configuration().training_pipeline_config
+    max_concurrent_jobs = args.max_concurrent_jobs if args.max_concurrent_jobs is not None \
+        else training_pipeline_config.max_concurrent_jobs
+    worker = RetrainingWorker(job_queue=JobQueue(db_file_path=training_pipeline_config.job_queue_file_path),
+                              max_concurrent_jobs=max_concurrent_jobs,
+                              poll_interval=args.poll_interval)
+    worker.run(once=args.once)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import os
+import sys
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from housing.exception.exception import HousingException
+from housing.logger.logger import logging
+from housing.entity.housing_predictor import HousingPredictor
+from housing.util.util import load_object
+
+SAVED_MODELS_DIR_NAME = "saved_models"
+PREDICTION_COLUMN_NAME = "predicted_median_house_value"
+DEFAULT_CHUNK_SIZE = 50000
+PARQUET_FILE_EXTENSION = ".parquet"
+
+# model loaded once per worker process by `init_worker`
+_worker_model = None
+
+
+def init_worker(model_path: str):
+    """
+    Process pool initializer, every worker loads the model once. Plain numpy arrays of models saved
+    in the joblib format, like linear coefficients and preprocessing statistics, stay memory mapped;
+    tree based models copy their nodes on load, so every worker holds its own copy of them.
+    """
+    global _worker_model
+    _worker_model = load_object(file_path=model_path, mmap_mode="r")
+
+
+def score_chunk(chunk_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    It appends the model prediction to every row of `chunk_df`.
+    """
+    try:
+        chunk_df[PREDICTION_COLUMN_NAME] = _worker_model.predict(chunk_df)
+        return chunk_df
+    except Exception as e:
+        raise HousingException(e, sys) from e
+
+
+def read_input_chunks(input_file_path: str, chunk_size: int):
+    """
+    It lazily yields `chunk_size` row DataFrames from a CSV or Parquet file, so only one chunk of
+    the input is in memory at a time.
+    """
+    try:
+        if input_file_path.endswith(PARQUET_FILE_EXTENSION):
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(input_file_path)
+            for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+                yield record_batch.to_pandas()
+        else:
+            yield from pd.read_csv(input_file_path, chunksize=chunk_size)
+    except Exception as e:
+        raise HousingException(e, sys) from e
+
+
+class PredictionWriter:
+
+    def __init__(self, output_file_path: str):
+        """
+        Appends scored chunks to a CSV or Parquet output file as they are produced.
+        """
+        try:
+            self.output_file_path = output_file_path
+            self.is_parquet = output_file_path.endswith(PARQUET_FILE_EXTENSION)
+            self.parquet_writer = None
+            self.rows_written = 0
+            output_dir = os.path.dirname(output_file_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def write(self, scored_df: pd.DataFrame):
+        try:
+            if self.is_parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(scored_df, preserve_index=False)
+                if self.parquet_writer is None:
+                    self.parquet_writer = pq.ParquetWriter(self.output_file_path, table.schema)
+                self.parquet_writer.write_table(table)
+            else:
+                scored_df.to_csv(self.output_file_path, index=False,
+                                 mode="w" if self.rows_written == 0 else "a",
+                                 header=self.rows_written == 0)
+            self.rows_written += len(scored_df)
+        except Exception as e:
+            raise HousingException(e, sys) from e
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def score_file(input_file_path: str, output_file_path: str, model_path: str,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> int:
+    """
+    It streams `input_file_path` through the model at `model_path` chunk by chunk and writes the
+    predictions incrementally to `output_file_path`. With `workers` > 1 chunks are scored in a process
+    pool; at most two chunks per worker are in flight so memory stays flat whatever the input size,
+    and chunks are written in input order.
+
+    :return: number of rows scored
+    """
+    try:
+        logging.info(f"Scoring [{input_file_path}] with model [{model_path}] into [{output_file_path}]")
+        writer = PredictionWriter(output_file_path=output_file_path)
+        try:
+            if workers <= 1:
+                init_worker(model_path=model_path)
+                for chunk_df in read_input_chunks(input_file_path, chunk_size):
+                    writer.write(score_chunk(chunk_df))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                         initargs=(model_path,)) as executor:
+                    pending = deque()
+                    for chunk_df in read_input_chunks(input_file_path, chunk_size):
+                        pending.append(executor.submit(score_chunk, chunk_df))
+                        if len(pending) >= 2 * workers:
+                            writer.write(pending.popleft().result())
+                    while pending:
+                        writer.write(pending.popleft().result())
+        finally:
+            writer.close()
+        logging.info(f"Scored {writer.rows_written} rows into [{output_file_path}]")
+        return writer.rows_written
+    except Exception as e:
+        logging.info(f"Error Occurred at {HousingException(e,sys)}")
+        raise HousingException(e, sys) from e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file with the latest saved model.")
+    parser.add_argument("--input", required=True, help="input .csv or .parquet file")
+    parser.add_argument("--output", required=True, help="output .csv or .parquet file")
+    parser.add_argument("--model-dir", default=os.path.join(os.getcwd(), SAVED_MODELS_DIR_NAME),
+                        help="directory of exported models, the latest one is used")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="number of scoring processes")
+    args = parser.parse_args(argv)
+
+    model_path = HousingPredictor(model_dir=args.model_dir).get_latest_model_path()
+    rows_scored = score_file(input_file_path=args.input, output_file_path=args.output,
+                             model_path=model_path, chunk_size=args.chunk_size, workers=args.workers)
+    print(f"Scored {rows_scored} rows into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Everything the prediction server needs, and nothing of the training stack: unpickling a saved model
+# only needs housing.entity.housing_estimator and the sklearn modules of the pickled objects.
+from housing.entity.housing_estimator import FeatureGenerator, CompiledPreprocessor, HousingEstimatorModel
+from housing.entity.housing_predictor import HousingData, HousingBatchData, HousingPredictor
+from housing.entity.prediction_batcher import PredictionBatcher
+from housing.entity.schema_validator import SchemaValidator
+from housing.entity.data_drift import DataDriftDetector
+from housing.entity.service_metrics import ServiceMetrics, PROMETHEUS_CONTENT_TYPE, FORM_PARSING_PHASE, \
+    FRAME_BUILD_PHASE, TEMPLATE_RENDER_PHASE
+from housing.exception.exception import HousingException
+
+SAVED_MODELS_DIR_NAME = "saved_models"
+# directory of app.py, the module gunicorn imports
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULE_NAME = "app"
+DEFAULT_STARTUP_RUNS = 3
+DEFAULT_MAX_IMPORT_SECONDS = 3.0
+# modules the serving import path must never load
+TRAINING_STACK_MODULES = ["housing.pipeline", "housing.component", "housing.config",
+                          "xgboost", "catboost", "evidently", "requests", "sklearn.ensemble"]
+
+STARTUP_PROBE = """
+import sys, json, time
+def get_loaded_training_modules():
+    return [module for module in housing.serving.TRAINING_STACK_MODULES
+            if any(name == module or name.startswith(module + ".") for name in sys.modules)]
+start = time.perf_counter()
+import housing.serving
+__import__(sys.argv[1])
+import_seconds = time.perf_counter() - start
+loaded_training_modules = get_loaded_training_modules()
+model_load_seconds = None
+model_training_modules = []
+model_dir = sys.argv[2]
+if model_dir:
+    start = time.perf_counter()
+    predictor = housing.serving.HousingPredictor(model_dir=model_dir)
+    predictor.load_and_warm_model(model_path=predictor.get_latest_model_path())
+    model_load_seconds = time.perf_counter() - start
+    model_training_modules = sorted(set(get_loaded_training_modules()) - set(loaded_training_modules))
+print(json.dumps({"import_seconds": import_seconds, "model_load_seconds": model_load_seconds,
+                  "loaded_training_modules": loaded_training_modules,
+                  "model_training_modules": model_training_modules}))
+"""
+
+
+def measure_startup(model_dir: str = None, app_dir: str = APP_DIR) -> dict:
+    """
+    It imports `app` from `app_dir` in a fresh interpreter, like a booting gunicorn worker, and
+    returns the import time, the time to load and warm the latest model of `model_dir` when given,
+    and the training stack modules each of them pulled in.
+
+    `app` loads the serving model at import, so it is imported with `MODEL_DIR` pointing to an empty
+    directory and the model is loaded afterwards: unpickling legitimately imports the modules of the
+    pickled estimator, and a legacy pickle whose classes live in `housing.component.model_trainer`
+    is expected to pull in `housing.component`, `housing.config` and `sklearn.ensemble`.
+    """
+    try:
+        with tempfile.TemporaryDirectory() as empty_model_dir:
+            completed = subprocess.run([sys.executable, "-c", STARTUP_PROBE, APP_MODULE_NAME, model_dir or ""],
+                                       capture_output=True, text=True, check=True, cwd=app_dir,
+                                       env={**os.environ, "MODEL_DIR": empty_model_dir})
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    except subprocess.CalledProcessError as e:
+        raise HousingException(Exception(e.stderr), sys) from e
+    except Exception as e:
+        raise HousingException(e, sys) from e
+
+
+def check_startup(runs: int = DEFAULT_STARTUP_RUNS, max_import_seconds: float = DEFAULT_MAX_IMPORT_SECONDS,
+                  model_dir: str = None, app_dir: str = APP_DIR) -> dict:
+    """
+    It measures the cold start `runs` times and checks the median import time against
+    `max_import_seconds` and that importing `app` loaded no training stack module. The modules
+    loading the model pulled in are reported, not checked.
+
+    :return: dict with the measurements and `passed`
+    """
+    try:
+        measurements = [measure_startup(model_dir=model_dir, app_dir=app_dir) for _ in range(max(1, runs))]
+        result = {
+            "import_seconds": statistics.median(m["import_seconds"] for m in measurements),
+            "model_load_seconds": statistics.median(m["model_load_seconds"] for m in measurements)
+            if model_dir else None,
+            "loaded_training_modules": sorted(set(name for m in measurements
+                                                  for name in m["loaded_training_modules"])),
+            "model_training_modules": sorted(set(name for m in measurements
+                                                 for name in m["model_training_modules"])),
+            "max_import_seconds": max_import_seconds,
+        }
+        result["passed"] = result["import_seconds"] <= max_import_seconds and \
+            not result["loaded_training_modules"]
+        return result
+    except Exception as e:
+        raise HousingException(e, sys) from e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of app.py and fail when it is "
+                                                 "too slow or imports the training stack.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_STARTUP_RUNS, help="number of fresh interpreters")
+    parser.add_argument("--max-import-seconds", type=float, default=DEFAULT_MAX_IMPORT_SECONDS,
+                        help="budget of the median import time")
+    parser.add_argument("--model-dir", default=None,
+                        help=f"also time loading the latest model of this directory, e.g. {SAVED_MODELS_DIR_NAME}")
+    parser.add_argument("--app-dir", default=APP_DIR, help="directory holding app.py and config/")
+    args = parser.parse_args(argv)
+
+    result = check_startup(runs=args.runs, max_import_seconds=args.max_import_seconds, model_dir=args.model_dir,
+                           app_dir=args.app_dir)
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
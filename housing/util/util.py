@@ -1,9 +1,12 @@
 import os
 import sys
+import shutil
+import hashlib
 import yaml
 import pandas as pd
 import numpy as np
 import dill
+import joblib
 
 
 from housing.exception.exception import HousingException
@@ -25,6 +28,75 @@ def read_yaml_file(file_path: str) -> dict:
         raise HousingException(e, sys)
 
 
+def save_data(dataframe: pd.DataFrame, file_path: str):
+    """
+    Save dataframe in the format given by the file extension: .parquet, .feather or .csv
+    dataframe: pd.DataFrame
+    file_path: str
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_extension = os.path.splitext(file_path)[1]
+        if file_extension == ".parquet":
+            dataframe.to_parquet(file_path, index=False)
+        elif file_extension == ".feather":
+            dataframe.reset_index(drop=True).to_feather(file_path)
+        else:
+            dataframe.to_csv(file_path, index=False)
+    except Exception as e:
+        logging.info(f"Error Occurred at {HousingException(e,sys)}")
+        raise HousingException(e, sys)
+
+
+def read_data(file_path: str, dtype: dict = None) -> pd.DataFrame:
+    """
+    Read dataframe stored as .parquet, .feather or .csv
+    file_path: str
+    dtype: dict column dtypes applied while parsing csv files, columnar files are already typed
+    """
+    try:
+        file_extension = os.path.splitext(file_path)[1]
+        if file_extension == ".parquet":
+            return pd.read_parquet(file_path)
+        if file_extension == ".feather":
+            return pd.read_feather(file_path)
+        return pd.read_csv(file_path, dtype=dtype)
+    except Exception as e:
+        logging.info(f"Error Occurred at {HousingException(e,sys)}")
+        raise HousingException(e, sys)
+
+
+def read_data_in_chunks(file_path: str, chunk_size: int, dtype: dict = None):
+    """
+    Yield the dataframe stored as .parquet, .feather or .csv `chunk_size` rows at a time
+    file_path: str
+    chunk_size: int
+    dtype: dict column dtypes applied while parsing csv files, columnar files are already typed
+    """
+    try:
+        file_extension = os.path.splitext(file_path)[1]
+        if file_extension == ".parquet":
+            import pyarrow.parquet as pq
+
+            for record_batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+                yield record_batch.to_pandas()
+        elif file_extension == ".feather":
+            import pyarrow as pa
+
+            # feather v2 is the arrow ipc file format
+            with pa.memory_map(file_path) as source:
+                reader = pa.ipc.open_file(source)
+                for batch_index in range(reader.num_record_batches):
+                    table = pa.Table.from_batches([reader.get_batch(batch_index)])
+                    for offset in range(0, table.num_rows, chunk_size):
+                        yield table.slice(offset, chunk_size).to_pandas()
+        else:
+            yield from pd.read_csv(file_path, dtype=dtype, chunksize=chunk_size)
+    except Exception as e:
+        logging.info(f"Error Occurred at {HousingException(e,sys)}")
+        raise HousingException(e, sys)
+
+
 def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
     """
     file_path : str
@@ -37,13 +109,14 @@ def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
 
         schema = dataset_schema[DATASET_SCHEMA_COLUMNS_KEY]
 
-        dataframe = pd.read_csv(file_path)
+        dataframe = read_data(file_path=file_path, dtype=schema)
 
         error_message = ""
 
         for column in dataframe.columns:
             if column in list(schema.keys()):
-                dataframe[column] = dataframe[column].astype(schema[column])
+                if dataframe[column].dtype != schema[column]:
+                    dataframe[column] = dataframe[column].astype(schema[column])
             else:
                 error_message = f'{error_message} \nColumn {column} is not in the schema'
         if len(error_message) > 0:
@@ -66,47 +139,92 @@ def save_numpy_array_data(file_path: str,  array: np.array):
         os.makedirs(dir_path, exist_ok=True)
 
         with open(file_path, 'wb') as file_obj:
-            np.save(file=file_obj, arr=array)
+            np.save(file=file_obj, arr=np.ascontiguousarray(array))
 
     except Exception as e:
         logging.info(f"Error Occurred at {HousingException(e,sys)}")
         raise HousingException(e, sys)
 
 
-def save_object(file_path: str, obj):
+def save_object(file_path: str, obj, object_format: str = PICKLE_OBJECT_FORMAT):
     """
     file_path: str
     obj: Any sort of object
+    object_format: str 'pickle' dills the object into `file_path`. 'joblib' dumps it uncompressed
+    into a data file next to `file_path`, named after its content hash, and writes a small manifest
+    naming that file at `file_path`; numpy arrays of the object can then be memory mapped on load
     """
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
 
-        with open(file_path, 'wb') as file_obj:
-            dill.dump(file=file_obj, obj=obj)
+        if object_format == PICKLE_OBJECT_FORMAT:
+            with open(file_path, 'wb') as file_obj:
+                dill.dump(file=file_obj, obj=obj)
+            return
+
+        if object_format != JOBLIB_OBJECT_FORMAT:
+            raise Exception(f"Unknown object format [{object_format}]")
+
+        temp_data_file_path = f"{file_path}.{os.getpid()}.tmp"
+        joblib.dump(obj, temp_data_file_path)
+        data_file_name = f"{os.path.basename(file_path)}.{get_file_hash(temp_data_file_path)[:16]}.joblib"
+        os.replace(temp_data_file_path, os.path.join(dir_path, data_file_name))
+
+        manifest = {OBJECT_FORMAT_KEY: JOBLIB_OBJECT_FORMAT,
+                    OBJECT_DATA_FILE_NAME_KEY: data_file_name,
+                    OBJECT_CLASS_KEY: f"{type(obj).__module__}.{type(obj).__name__}"}
+        temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_file_path, "w") as manifest_file:
+            manifest_file.write(f"{OBJECT_MANIFEST_HEADER}\n")
+            yaml.dump(manifest, manifest_file)
+        os.replace(temp_file_path, file_path)
 
     except Exception as e:
         logging.info(f"Error Occurred at {HousingException(e,sys)}")
         raise HousingException(e, sys)
 
 
-def load_numpy_array_data(file_path: str) -> np.array:
+def read_object_manifest(file_path: str):
+    """
+    Return the manifest written by `save_object` at `file_path`, None for a plain pickle
+    file_path: str
+    """
+    try:
+        with open(file_path, "rb") as file_obj:
+            header = file_obj.read(len(OBJECT_MANIFEST_HEADER))
+        if header != OBJECT_MANIFEST_HEADER.encode():
+            return None
+        return read_yaml_file(file_path=file_path)
+    except Exception as e:
+        raise HousingException(e, sys)
+
+
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     file_path: str
+    mmap_mode: str None reads the whole array into memory, 'r' returns a read only memory mapped
+    view of the uncompressed .npy file
     """
     try:
-        with open(file_path, 'rb') as file_obj:
-            return np.load(file_obj)
+        return np.load(file_path, mmap_mode=mmap_mode)
     except Exception as e:
         logging.info(f"Error Occurred at {HousingException(e,sys)}")
         raise HousingException(e, sys)
 
 
-def load_object(file_path: str):
+def load_object(file_path: str, mmap_mode: str = None):
     """
     file_path: str
+    mmap_mode: str only used for the 'joblib' format, 'r' memory maps the numpy arrays of the object
+    read only. Only plain array attributes stay mapped: sklearn trees, and so random forest and
+    gradient boosting models, copy their node arrays into memory they own on load
     """
     try:
+        manifest = read_object_manifest(file_path=file_path)
+        if manifest is not None:
+            data_file_path = os.path.join(os.path.dirname(file_path), manifest[OBJECT_DATA_FILE_NAME_KEY])
+            return joblib.load(data_file_path, mmap_mode=mmap_mode)
         with open(file_path, "rb") as file_obj:
             return dill.load(file_obj)
     except Exception as e:
@@ -127,3 +245,71 @@ def write_yaml_file(file_path: str, data: dict = None):
                 yaml.dump(data, yaml_file)
     except Exception as e:
         raise HousingException(e, sys)
+
+
+def write_yaml_file_atomically(file_path: str, data: dict):
+    """
+    Write yaml file so that readers only ever see the previous or the complete new content
+    file_path: str
+    data: dict
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_file_path, "w") as yaml_file:
+            yaml.dump(data, yaml_file)
+            yaml_file.flush()
+            os.fsync(yaml_file.fileno())
+        os.replace(temp_file_path, file_path)
+    except Exception as e:
+        raise HousingException(e, sys)
+
+
+def copy_file_atomically(src: str, dst: str):
+    """
+    Copy a file under a temporary name and rename it into place, so `dst` never exists half written
+    src: str
+    dst: str
+    """
+    try:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        temp_file_path = f"{dst}.{os.getpid()}.tmp"
+        shutil.copy(src=src, dst=temp_file_path)
+        with open(temp_file_path, "rb") as file_obj:
+            os.fsync(file_obj.fileno())
+        os.replace(temp_file_path, dst)
+    except Exception as e:
+        raise HousingException(e, sys)
+
+
+def copy_object_atomically(src: str, dst: str):
+    """
+    Copy a file written by `save_object`, its data file first when it has a manifest, so `dst` only
+    ever names a complete object
+    src: str
+    dst: str
+    """
+    try:
+        manifest = read_object_manifest(file_path=src)
+        if manifest is not None:
+            data_file_name = manifest[OBJECT_DATA_FILE_NAME_KEY]
+            copy_file_atomically(src=os.path.join(os.path.dirname(src), data_file_name),
+                                 dst=os.path.join(os.path.dirname(dst), data_file_name))
+        copy_file_atomically(src=src, dst=dst)
+    except Exception as e:
+        raise HousingException(e, sys)
+
+
+def get_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Return the sha256 hex digest of a file, read in chunks
+    file_path: str
+    """
+    try:
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+    except Exception as e:
+        raise HousingException(e, sys)
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from housing.component.data_transformation import DataTransformation
+from housing.entity.artifact_entity import DataValidationArtifact
+from housing.entity.config_entity import DataTransformationConfig
+from housing.entity.housing_estimator import CompiledPreprocessor
+
+SCHEMA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "config", "schema.yaml")
+OCEAN_PROXIMITY_CATEGORIES = ["NEAR BAY", "<1H OCEAN", "INLAND", "NEAR OCEAN", "ISLAND"]
+
+
+def get_housing_frame(row_count: int = 60) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    housing_df = pd.DataFrame({
+        "longitude": rng.uniform(-124.0, -115.0, row_count),
+        "latitude": rng.uniform(32.5, 42.0, row_count),
+        "housing_median_age": rng.integers(1, 52, row_count).astype(float),
+        "total_rooms": rng.uniform(100.0, 8000.0, row_count),
+        "total_bedrooms": rng.uniform(20.0, 1500.0, row_count),
+        "population": rng.uniform(50.0, 5000.0, row_count),
+        "households": rng.uniform(20.0, 1500.0, row_count),
+        "median_income": rng.uniform(0.5, 15.0, row_count),
+        "ocean_proximity": [OCEAN_PROXIMITY_CATEGORIES[index % len(OCEAN_PROXIMITY_CATEGORIES)]
+                            for index in range(row_count)],
+    })
+    housing_df.loc[[3, 17, 41], "total_bedrooms"] = np.nan
+    housing_df.loc[[8, 29], "median_income"] = np.nan
+    housing_df.loc[[12, 50], "ocean_proximity"] = np.nan
+    return housing_df
+
+
+@pytest.mark.parametrize("add_bedroom_per_room", [True, False])
+def test_compiled_preprocessing_matches_sklearn(add_bedroom_per_room):
+    data_transformation = DataTransformation(
+        data_transformation_config=DataTransformationConfig(add_bedroom_per_room=add_bedroom_per_room,
+                                                            transformed_train_dir=None,
+                                                            transformed_test_dir=None,
+                                                            preprocessed_object_file_path=None),
+        data_ingestion_artifact=None,
+        data_validation_artifact=DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH,
+                                                        report_file_path=None,
+                                                        report_page_file_path=None,
+                                                        is_validated=True,
+                                                        message=None,
+                                                        reference_profile_file_path=None))
+    housing_df = get_housing_frame()
+    preprocessing_obj = data_transformation.get_data_transformer_object().fit(housing_df)
+
+    compiled_preprocessor = CompiledPreprocessor(preprocessing_object=preprocessing_obj)
+
+    assert compiled_preprocessor.get_parity_error(preprocessing_object=preprocessing_obj, X=housing_df) <= 1e-9
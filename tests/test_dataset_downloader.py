@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from housing.entity.dataset_downloader import DatasetDownloader
+from housing.exception.exception import HousingException
+
+ARCHIVE_NAME = "housing.tgz"
+PART_SIZE = 1000
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the archive of the server with byte range, ETag and If-Range support. Ranges starting at
+    `server.failing_range_start` are answered with a server error.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_archive_headers(self, status: int, content_length: int):
+        self.send_response(status)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(content_length))
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.send_archive_headers(200, len(self.server.content))
+
+    def do_GET(self):
+        content = self.server.content
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header is None or (if_range is not None and if_range != self.server.etag):
+            self.send_archive_headers(200, len(content))
+            self.wfile.write(content)
+            return
+
+        start, end = [int(position) for position in range_header[len("bytes="):].split("-")]
+        self.server.requested_ranges.append((start, end))
+        if start == self.server.failing_range_start:
+            self.send_error(503)
+            return
+        self.send_archive_headers(206, end - start + 1)
+        self.wfile.write(content[start:end + 1])
+
+
+@pytest.fixture
+def archive_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    server.content = os.urandom(5 * PART_SIZE + 123)
+    server.etag = '"v1"'
+    server.requested_ranges = []
+    server.failing_range_start = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/{ARCHIVE_NAME}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_download_in_ranges(archive_server, tmp_path):
+    dataset_downloader = DatasetDownloader(download_dir=str(tmp_path), download_workers=3, part_size=PART_SIZE)
+
+    file_path = dataset_downloader.download(url=archive_server.url, sha256=get_sha256(archive_server.content))
+
+    with open(file_path, "rb") as archive_file:
+        assert archive_file.read() == archive_server.content
+    assert sorted(archive_server.requested_ranges) == [
+        (start, min(start + PART_SIZE, len(archive_server.content)) - 1)
+        for start in range(0, len(archive_server.content), PART_SIZE)]
+    assert sorted(os.listdir(tmp_path)) == [ARCHIVE_NAME, f"{ARCHIVE_NAME}.yaml"]
+
+
+def test_download_resumes_after_truncated_part(archive_server, tmp_path):
+    dataset_downloader = DatasetDownloader(download_dir=str(tmp_path), download_workers=1, part_size=PART_SIZE)
+    archive_server.failing_range_start = 3 * PART_SIZE
+    with pytest.raises(HousingException):
+        dataset_downloader.download(url=archive_server.url)
+
+    # the first range is cut short as if the connection dropped
+    with open(os.path.join(tmp_path, f"{ARCHIVE_NAME}.part0"), "r+b") as part_file:
+        part_file.truncate(PART_SIZE // 4)
+    archive_server.failing_range_start = None
+    archive_server.requested_ranges = []
+
+    file_path = dataset_downloader.download(url=archive_server.url, sha256=get_sha256(archive_server.content))
+
+    with open(file_path, "rb") as archive_file:
+        assert archive_file.read() == archive_server.content
+    # only the rest of the truncated range and the failed range are fetched again
+    requested_starts = sorted(start for start, _ in archive_server.requested_ranges)
+    assert requested_starts == [PART_SIZE // 4, 3 * PART_SIZE]
+
+
+def test_download_discards_parts_of_changed_remote_file(archive_server, tmp_path):
+    dataset_downloader = DatasetDownloader(download_dir=str(tmp_path), download_workers=1, part_size=PART_SIZE)
+    archive_server.failing_range_start = 3 * PART_SIZE
+    with pytest.raises(HousingException):
+        dataset_downloader.download(url=archive_server.url)
+
+    archive_server.content = os.urandom(len(archive_server.content))
+    archive_server.etag = '"v2"'
+    archive_server.failing_range_start = None
+
+    file_path = dataset_downloader.download(url=archive_server.url)
+
+    with open(file_path, "rb") as archive_file:
+        assert archive_file.read() == archive_server.content
+
+
+def test_download_reuses_cached_archive_of_same_etag(archive_server, tmp_path):
+    dataset_downloader = DatasetDownloader(download_dir=str(tmp_path), download_workers=2, part_size=PART_SIZE)
+    dataset_downloader.download(url=archive_server.url)
+    archive_server.requested_ranges = []
+
+    file_path = dataset_downloader.download(url=archive_server.url)
+
+    with open(file_path, "rb") as archive_file:
+        assert archive_file.read() == archive_server.content
+    assert archive_server.requested_ranges == []
+
+    archive_server.content = os.urandom(len(archive_server.content))
+    archive_server.etag = '"v2"'
+
+    file_path = dataset_downloader.download(url=archive_server.url)
+
+    with open(file_path, "rb") as archive_file:
+        assert archive_file.read() == archive_server.content
+    assert archive_server.requested_ranges
+
+
+def test_download_rejects_sha256_mismatch(archive_server, tmp_path):
+    dataset_downloader = DatasetDownloader(download_dir=str(tmp_path), download_workers=2, part_size=PART_SIZE)
+
+    with pytest.raises(HousingException, match="Checksum mismatch"):
+        dataset_downloader.download(url=archive_server.url, sha256=get_sha256(b"another archive"))
+
+    assert os.listdir(tmp_path) == []
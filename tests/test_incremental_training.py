@@ -0,0 +1,107 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+from housing.component.data_transformation import DataTransformation
+from housing.component.model_trainer import ModelTrainer
+from housing.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, IncrementalTrainingState
+from housing.entity.config_entity import DataTransformationConfig, ModelTrainerConfig
+from housing.entity.housing_estimator import HousingEstimatorModel
+from housing.util.util import load_numpy_array_data, load_object, save_data, save_object
+
+SCHEMA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "config", "schema.yaml")
+OCEAN_PROXIMITY_CATEGORIES = ["NEAR BAY", "<1H OCEAN", "INLAND", "NEAR OCEAN", "ISLAND"]
+PREVIOUS_ROW_COUNT = 150
+PREVIOUS_ESTIMATORS = 10
+
+
+def get_housing_frame(row_count: int, income_scale: float, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    housing_df = pd.DataFrame({
+        "longitude": rng.uniform(-124.0, -115.0, row_count),
+        "latitude": rng.uniform(32.5, 42.0, row_count),
+        "housing_median_age": rng.integers(1, 52, row_count).astype(float),
+        "total_rooms": rng.uniform(100.0, 8000.0, row_count),
+        "total_bedrooms": rng.uniform(20.0, 1500.0, row_count),
+        "population": rng.uniform(50.0, 5000.0, row_count),
+        "households": rng.uniform(20.0, 1500.0, row_count),
+        "median_income": rng.uniform(0.5, 15.0, row_count) * income_scale,
+        "ocean_proximity": [OCEAN_PROXIMITY_CATEGORIES[index % len(OCEAN_PROXIMITY_CATEGORIES)]
+                            for index in range(row_count)],
+    })
+    housing_df["median_house_value"] = housing_df["median_income"] * 40000.0 + rng.normal(0.0, 5000.0, row_count)
+    return housing_df
+
+
+@pytest.mark.parametrize("estimator", [GradientBoostingRegressor(n_estimators=PREVIOUS_ESTIMATORS, random_state=0),
+                                       RandomForestRegressor(n_estimators=PREVIOUS_ESTIMATORS, random_state=0)])
+def test_incremental_update_keeps_previous_stages(estimator, tmp_path):
+    data_validation_artifact = DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH, report_file_path=None,
+                                                      report_page_file_path=None, is_validated=True, message=None,
+                                                      reference_profile_file_path=None)
+    previous_df = get_housing_frame(row_count=PREVIOUS_ROW_COUNT, income_scale=1.0, seed=0)
+    # the new rows are scaled differently, refitting the scalers on them would move every input
+    train_df = pd.concat([previous_df, get_housing_frame(row_count=100, income_scale=3.0, seed=1)],
+                         ignore_index=True)
+    input_feature_df = previous_df.drop(columns=["median_house_value"])
+
+    previous_transformation = DataTransformation(
+        data_transformation_config=DataTransformationConfig(add_bedroom_per_room=True, transformed_train_dir=None,
+                                                            transformed_test_dir=None,
+                                                            preprocessed_object_file_path=None),
+        data_ingestion_artifact=None, data_validation_artifact=data_validation_artifact)
+    previous_preprocessing_obj = previous_transformation.get_data_transformer_object().fit(input_feature_df)
+    previous_input_arr = previous_preprocessing_obj.transform(input_feature_df)
+    estimator.fit(previous_input_arr, previous_df["median_house_value"].to_numpy())
+    previous_estimator = copy.deepcopy(estimator)
+
+    preprocessed_object_file_path = str(tmp_path / "previous" / "preprocessed.pkl")
+    trained_model_file_path = str(tmp_path / "previous" / "model.pkl")
+    save_object(file_path=preprocessed_object_file_path, obj=previous_preprocessing_obj)
+    save_object(file_path=trained_model_file_path,
+                obj=HousingEstimatorModel(preprocessing_object=previous_preprocessing_obj,
+                                          trained_model_object=estimator))
+    train_file_path = str(tmp_path / "ingested" / "train.parquet")
+    test_file_path = str(tmp_path / "ingested" / "test.parquet")
+    save_data(dataframe=train_df, file_path=train_file_path)
+    save_data(dataframe=get_housing_frame(row_count=40, income_scale=2.0, seed=2), file_path=test_file_path)
+    incremental_state = IncrementalTrainingState(raw_row_count=PREVIOUS_ROW_COUNT,
+                                                 preprocessed_object_file_path=preprocessed_object_file_path,
+                                                 trained_model_file_path=trained_model_file_path,
+                                                 train_file_path=train_file_path, test_file_path=test_file_path,
+                                                 train_row_count=PREVIOUS_ROW_COUNT)
+
+    data_transformation_artifact = DataTransformation(
+        data_transformation_config=DataTransformationConfig(
+            add_bedroom_per_room=True, transformed_train_dir=str(tmp_path / "transformed" / "train"),
+            transformed_test_dir=str(tmp_path / "transformed" / "test"),
+            preprocessed_object_file_path=str(tmp_path / "transformed" / "preprocessed.pkl")),
+        data_ingestion_artifact=DataIngestionArtifact(train_file_path=train_file_path, test_file_path=test_file_path,
+                                                      is_ingested=True, message=None, raw_row_count=len(train_df)),
+        data_validation_artifact=data_validation_artifact,
+        incremental_state=incremental_state).initiate_data_transformation()
+    model_trainer = ModelTrainer(
+        model_trainer_config=ModelTrainerConfig(trained_model_file_path=None, base_accuracy=0.6,
+                                                model_config_file_path=None, incremental_estimators=5,
+                                                model_file_format=None),
+        data_transformation_artifact=data_transformation_artifact, incremental_state=incremental_state)
+    X_train = load_numpy_array_data(data_transformation_artifact.transformed_train_file_path)
+    y_train = load_numpy_array_data(data_transformation_artifact.transformed_train_target_file_path)
+    updated_estimator = model_trainer.update_trained_model(
+        estimator=load_object(file_path=trained_model_file_path).trained_model_object,
+        X=X_train, y=y_train, new_row_start=PREVIOUS_ROW_COUNT)
+
+    assert len(updated_estimator.estimators_) == PREVIOUS_ESTIMATORS + 5
+    # the previous rows reach the previous stages exactly as when those stages were fitted
+    previous_rows_arr = X_train[:PREVIOUS_ROW_COUNT]
+    np.testing.assert_allclose(previous_rows_arr, previous_input_arr)
+    if isinstance(updated_estimator, GradientBoostingRegressor):
+        previous_stages_prediction = list(updated_estimator.staged_predict(previous_rows_arr))[PREVIOUS_ESTIMATORS - 1]
+    else:
+        previous_stages_prediction = np.mean([tree.predict(previous_rows_arr)
+                                              for tree in updated_estimator.estimators_[:PREVIOUS_ESTIMATORS]], axis=0)
+    np.testing.assert_allclose(previous_stages_prediction, previous_estimator.predict(previous_input_arr))
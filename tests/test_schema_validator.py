@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pytest
+
+from housing.entity.schema_validator import SchemaValidator
+from housing.util.util import read_yaml_file
+
+SCHEMA_FILE_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "config", "schema.yaml")
+
+
+def get_housing_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "longitude": [-122.23, -122.22, -200.0],
+        "latitude": [37.88, 37.86, 37.85],
+        "housing_median_age": [41.0, 21.0, 52.0],
+        "total_rooms": [880.0, 7099.0, 1467.0],
+        "total_bedrooms": [129.0, 1106.0, 190.0],
+        "population": [322.0, 2401.0, 496.0],
+        "households": [126.0, 1138.0, 177.0],
+        "median_income": [8.3252, 8.3014, 7.2574],
+        "ocean_proximity": ["NEAR BAY", "NEAR BAY", "NEAR BAY"],
+        "median_house_value": [452600.0, 358500.0, 352100.0],
+    })
+
+
+@pytest.mark.parametrize("coerce_numeric", [False, True])
+def test_string_in_numeric_column_is_reported(coerce_numeric):
+    schema_validator = SchemaValidator(dataset_schema=read_yaml_file(file_path=SCHEMA_FILE_PATH))
+    housing_df = get_housing_frame()
+    housing_df["total_rooms"] = housing_df["total_rooms"].astype(object)
+    housing_df.loc[1, "total_rooms"] = "many"
+
+    report = schema_validator.validate(housing_df, check_null_rate=False, coerce_numeric=coerce_numeric)
+
+    assert not report.is_valid
+    assert "total_rooms" in report.dtype_mismatches
+    # the other numerical columns are still range checked
+    assert report.range_violations["longitude"]["count"] == 1
+    assert "total_rooms" not in report.range_violations
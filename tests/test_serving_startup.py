@@ -0,0 +1,8 @@
+from housing.serving import check_startup
+
+
+def test_serving_import_path_stays_light():
+    result = check_startup(runs=1)
+
+    assert result["loaded_training_modules"] == []
+    assert result["passed"], result